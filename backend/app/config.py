@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+import os
 
 # When creating a Settings instance,
 # pydantic-settings will automatically check for environment variables
@@ -15,6 +16,127 @@ class Settings(BaseSettings):
     default_ai_provider: str = "openai"
     openai_api_key: str = ""
     gemini_api_key: str = ""
+    openai_base_url: str = ""  # Override for OpenAI-compatible servers
+
+    # Warm up configured providers at startup; /api/ready reports the outcome
+    prewarm_providers: bool = True
+    warmup_timeout_seconds: float = 10.0
+    warmup_retry_seconds: float = 30.0  # Minimum gap between warm-up retries
+
+    # HTTP clients used by the provider SDKs. Connections are kept alive
+    # between bursts and, with HTTP/2, requests are multiplexed over them
+    openai_http2: bool = True
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 100
+    gemini_http2: bool = True
+    gemini_max_connections: int = 100
+    gemini_max_keepalive_connections: int = 100
+    upstream_keepalive_expiry_seconds: float = 60.0
+    upstream_connect_timeout_seconds: float = 5.0
+    upstream_read_timeout_seconds: float = 60.0
+
+    # Per-provider scheduling of calls between interactive requests,
+    # background refreshes and batch work (prefetch); weights set each
+    # lane's share of free slots while several lanes are queued
+    scheduler_enabled: bool = True
+    scheduler_max_concurrency: int = 16
+    scheduler_max_queue: int = 256
+    scheduler_weight_interactive: float = 8
+    scheduler_weight_refresh: float = 2
+    scheduler_weight_batch: float = 1
+    # Adapt each provider's concurrency limit (starting at
+    # scheduler_max_concurrency) to its latency and overload errors:
+    # "gradient", "aimd" or "fixed"
+    concurrency_limit_algorithm: str = "gradient"
+    concurrency_limit_min: int = 2
+    concurrency_limit_max: int = 128
+
+    # Cancel provider calls for requests whose client has disconnected
+    cancel_on_disconnect: bool = True
+
+    # Opt-in profiling of /api/chat requests
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_header: str = "X-Profile"
+    profiling_dir: str = "/tmp/historic-events-profiles"
+    profiling_max_files: int = 50
+    profiling_interval_ms: float = 1.0
+
+    # Include per-stage timings in the body of chat responses
+    response_timings_enabled: bool = False
+
+    # Server-side cache of generated date events
+    events_cache_ttl_seconds: int = 3600
+    events_cache_max_entries: int = 2048
+    events_cache_stale_seconds: int = 604800  # Serve expired entries while refreshing
+    events_cache_variants: int = 5  # Response variants kept per date and provider
+    # Compact storage: cached events are compressed with a zstd dictionary
+    # trained on the first events cached; serialized response bodies are
+    # kept for the most recently served variants only
+    events_cache_dictionary_size: int = 16384
+    events_cache_dictionary_training_events: int = 2000
+    events_cache_max_bodies: int = 256
+    # "tinylfu" keeps popular dates cached through bursts of one-off keys
+    # (prefetches, batch jobs, rarely asked dates); "lru" evicts the least
+    # recently used key
+    events_cache_policy: str = "tinylfu"
+
+    # Answer free-form chat prompts from completions of near-identical
+    # prompts (cosine similarity of hashed n-gram vectors)
+    semantic_cache_enabled: bool = True
+    semantic_cache_max_entries: int = 10000
+    semantic_cache_policy: str = "tinylfu"  # Or "lru", see events_cache_policy
+    semantic_cache_threshold: float = 0.85
+    semantic_cache_ttl_seconds: int = 3600
+    semantic_cache_dimensions: int = 512  # Power of two; 2 KB per entry
+    # Entries compared per lookup at most: prompts of the same scope and
+    # numbers (e.g. all undated questions) share a partition
+    semantic_cache_max_partition_entries: int = 2048
+
+    # Ask providers for schema-constrained JSON on templated requests
+    structured_output_enabled: bool = True
+
+    # Jaccard similarity above which two events of the same year are duplicates
+    events_dedup_threshold: float = 0.5
+
+    # On-disk store of generated events, used to answer dates without a provider
+    event_store_enabled: bool = True
+    event_store_path: str = "data/events.db"
+    event_store_min_events: int = 10  # Below this a date is too thin to answer from
+    event_store_sample_size: int = 10
+
+    # Batch generation jobs (POST /api/jobs), kept in the event store database
+    jobs_workers: int = 2
+    jobs_max_items: int = 2000
+    jobs_max_attempts: int = 3
+    jobs_lease_seconds: float = 300  # Longer than a provider call can take
+    jobs_poll_interval_seconds: float = 2.0
+    jobs_retry_backoff_seconds: float = 5.0  # Doubles with each failed attempt
+
+    # Background refresh of stale date events
+    events_refresh_workers: int = 2
+    events_refresh_queue_size: int = 64
+
+    # Compression of API responses; smaller bodies are sent as is
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+
+    # Speculative generation of the dates next to a requested one
+    prefetch_enabled: bool = False
+    prefetch_radius: int = 1  # Days on each side of the requested date
+    prefetch_queue_size: int = 16
+    prefetch_budget_per_minute: float = 30
+
+    # WebSocket date queries (/api/ws/events): generations run at once per
+    # connection, requests accepted before new ones are refused, and
+    # replies buffered before generations wait for the client to read
+    ws_max_inflight: int = 4
+    ws_max_pending: int = 32
+    ws_send_queue_size: int = 16
+
+    # HTTP caching of date events by browsers and CDNs
+    events_http_max_age: int = 300
+    events_http_stale_while_revalidate: int = 86400
 
 
 # The @lru_cache() decorator is a nice optimization
@@ -25,3 +147,25 @@ class Settings(BaseSettings):
 @lru_cache()
 def get_settings():
     return Settings()
+
+
+def get_cors_origins():
+    environment = os.getenv("ENVIRONMENT")
+
+    if environment == "production":
+        # Get allowed origins from environment variable
+        origins_env = os.getenv("ALLOWED_ORIGINS", "")
+        if origins_env:
+            origins = [origin.strip() for origin in origins_env.split(",")]
+        else:
+            # Fallback defaults
+            origins = ["https://www.historicevents.ai", "https://historicevents.ai"]
+
+        return origins
+    else:
+        return [
+            "http://localhost:3000",
+            "http://localhost:5173",
+            "http://127.0.0.1:3000",
+            "http://localhost:8080",
+        ]
@@ -1,38 +1,50 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
-from .routers import chat
-from .config import get_settings
-import os
+from .routers import chat, debug, events, events_ws, jobs, metrics
+from .config import get_cors_origins, get_settings
+from .services.warmup import get_startup_state, warm_up_providers
+from .services.batch_jobs import get_job_runner
+from .services.event_prefetcher import get_event_prefetcher
+from .services.event_refresher import get_event_refresher
+from .services.event_store import get_event_store
+from .utils.compression import compress, is_compressible, negotiate_encoding
+from .utils.http_cache import weak_etag
+from .utils.profiling import SamplingProfiler, should_profile, save_profile
+from .utils.timing import record_stage, start_request_timer
+import asyncio
 
 load_dotenv(override=True)
 
-app = FastAPI(
-    title="AI Chat API", description="AI-powered historic events API", version="1.0.0"
-)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+
+    # Import SDKs, create clients and connect to providers before serving,
+    # so the first request does not pay for it
+    if settings.prewarm_providers:
+        await warm_up_providers(get_startup_state(), settings.warmup_timeout_seconds)
 
-def get_cors_origins():
-    environment = os.getenv("ENVIRONMENT")
+    # Resume batch jobs left unfinished by the previous run
+    get_job_runner().start(jobs.run_job_item)
 
-    if environment == "production":
-        # Get allowed origins from environment variable
-        origins_env = os.getenv("ALLOWED_ORIGINS", "")
-        if origins_env:
-            origins = [origin.strip() for origin in origins_env.split(",")]
-        else:
-            # Fallback defaults
-            origins = ["https://www.historicevents.ai", "https://historicevents.ai"]
+    yield
 
-        return origins
-    else:
-        return [
-            "http://localhost:3000",
-            "http://localhost:5173",
-            "http://127.0.0.1:3000",
-            "http://localhost:8080",
-        ]
+    await get_job_runner().close()
+    await get_event_prefetcher().close()
+    await get_event_refresher().close()
+    get_event_store().close()
+
+
+app = FastAPI(
+    title="AI Chat API",
+    description="AI-powered historic events API",
+    version="1.0.0",
+    lifespan=lifespan,
+)
 
 
 # CORS middleware
@@ -44,8 +56,107 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def profile_chat_requests(request: Request, call_next):
+    """
+    Profile /api/chat requests when forced by header or picked by sampling.
+    Covers dependency resolution, the endpoint itself and serialization.
+    """
+    settings = get_settings()
+
+    if request.url.path != "/api/chat" or not should_profile(
+        request.headers,
+        settings.profiling_enabled,
+        settings.profiling_header,
+        settings.profiling_sample_rate,
+    ):
+        return await call_next(request)
+
+    profiler = SamplingProfiler(interval=settings.profiling_interval_ms / 1000)
+    profiler.start()
+    try:
+        return await call_next(request)
+    finally:
+        profiler.stop()
+        await asyncio.to_thread(
+            save_profile,
+            settings.profiling_dir,
+            "chat",
+            profiler.collapsed(),
+            settings.profiling_max_files,
+        )
+
+
+@app.middleware("http")
+async def compress_responses(request: Request, call_next):
+    """
+    Compress API responses above the size threshold with the best coding
+    the client accepts. Responses that are already encoded (precompressed
+    cached events) or have no known length (streams) are passed through.
+    """
+    response = await call_next(request)
+
+    settings = get_settings()
+    length = response.headers.get("content-length")
+    if (
+        not settings.compression_enabled
+        or not request.url.path.startswith("/api")
+        or "content-encoding" in response.headers
+        or length is None
+        or int(length) < settings.compression_min_size
+        or not is_compressible(response.headers.get("content-type"))
+    ):
+        return response
+
+    # Keep the Vary: Origin that CORS adds, or shared caches would serve
+    # one origin's Access-Control-Allow-Origin to another
+    vary = response.headers.get("vary", "")
+    if "accept-encoding" not in vary.lower():
+        response.headers.add_vary_header("Accept-Encoding")
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    with record_stage("compress"):
+        compressed = compress(body, encoding)
+
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    headers["Content-Encoding"] = encoding
+    if "etag" in headers:
+        headers["etag"] = weak_etag(headers["etag"])
+    return Response(
+        content=compressed,
+        status_code=response.status_code,
+        headers=headers,
+        background=response.background,
+    )
+
+
+@app.middleware("http")
+async def add_server_timing(request: Request, call_next):
+    """
+    Time API requests stage by stage and report them in a Server-Timing header.
+    """
+    if not request.url.path.startswith("/api"):
+        return await call_next(request)
+
+    timer = start_request_timer()
+    with timer.stage("total"):
+        response = await call_next(request)
+
+    response.headers["Server-Timing"] = timer.server_timing_header()
+    return response
+
+
 # Include routers
 app.include_router(chat.router, prefix="/api", tags=["chat"])
+app.include_router(events.router, prefix="/api", tags=["events"])
+app.include_router(events_ws.router, prefix="/api", tags=["events"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(debug.router, prefix="/api", tags=["debug"])
+app.include_router(metrics.router, prefix="/api", tags=["metrics"])
 
 
 @app.get("/")
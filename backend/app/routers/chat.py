@@ -1,21 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+import time
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Hashable,
+    List,
+    Optional,
+    Dict,
+    Any,
+    Tuple,
+    TypeVar,
+)
 import logging
 
 from app.services import get_service
 from app.services.ai_service import AIService
+from app.services.concurrency_limit import get_concurrency_limiter
+from app.services.scheduler import (
+    JobPreempted,
+    SchedulerFull,
+    get_scheduler,
+)
+from app.services.semantic_cache import get_semantic_cache
+from app.services.warmup import get_startup_state, warm_up_providers
 from app.utils.provider_utils import (
     PROVIDER_CONFIG,
     normalize_messages_for_provider,
 )
+from app.utils.disconnect import (
+    CLIENT_CLOSED_REQUEST,
+    ClientDisconnected,
+    cancel_on_disconnect,
+)
+from app.utils.event_dedup import dedupe_response
 from app.utils.response_cleanup import clean_ai_response
+from app.utils.timing import get_request_timer, record_stage
 
 from ..config import get_settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class ChatMessage(BaseModel):
     role: str = Field(
@@ -47,6 +77,9 @@ class ChatResponse(BaseModel):
     usage: Optional[Dict[str, Any]] = Field(
         None, description="Token usage information if available"
     )
+    timings: Optional[Dict[str, float]] = Field(
+        None, description="Per-stage durations in milliseconds, if enabled"
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -90,74 +123,216 @@ async def get_provider_models(provider: str):
     return PROVIDER_CONFIG[provider]["default_models"]
 
 
-@router.post(
-    "/chat",
-    response_model=ChatResponse,
-    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
-)
-async def chat(request: ChatRequest, service: AIService = Depends(get_service)):
+def get_provider_name(service: AIService) -> str:
     """
-    Generate a chat completion using the specified AI provider.
-    Supports both OpenAI and Gemini API formats.
+    Get the provider name from the service class name.
     """
-    try:
-        # Get provider from service class name
-        provider_name = service.__class__.__name__.replace("Service", "").lower()
+    return (
+        getattr(service, "__class__", type(service))
+        .__name__.replace("Service", "")
+        .lower()
+    )
 
-        # Convert pydantic models to dictionaries
-        messages = [
-            {"role": msg.role, "content": msg.content} for msg in request.messages
-        ]
 
+async def complete_chat(
+    service: AIService,
+    messages: List[Dict[str, str]],
+    temperature: Optional[float] = 0.7,
+    model: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    response_schema: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Normalize messages, call the provider and clean up its response.
+    Returns the cleaned response as a JSON array of strings.
+    """
+    provider_name = get_provider_name(service)
+
+    with record_stage("normalize"):
         # Normalize messages for the specific provider
         normalized_messages = normalize_messages_for_provider(messages, provider_name)
 
-        logger.info(
-            f"Sending request to {provider_name} with {len(normalized_messages)} messages"
-        )
+    logger.info(
+        f"Sending request to {provider_name} with {len(normalized_messages)} messages"
+    )
+
+    # Prepare service parameters
+    service_params = {
+        "messages": normalized_messages,
+        "temperature": temperature,
+    }
 
-        # Prepare service parameters
-        service_params = {
-            "messages": normalized_messages,
-            "temperature": request.temperature,
-        }
+    # Add model if specified
+    if model:
+        service_params["model"] = model
 
-        # Add model if specified
-        if request.model:
-            service_params["model"] = request.model
+    # Add max_tokens if specified
+    if max_tokens:
+        service_params["max_tokens"] = max_tokens
 
-        # Add max_tokens if specified
-        if request.max_tokens:
-            service_params["max_tokens"] = request.max_tokens
+    # Use the provider's structured output mode if a schema is given
+    if response_schema is not None:
+        service_params["response_schema"] = response_schema
 
-        # Use the service to get a response
+    # Use the service to get a response, once the scheduler admits the call
+    async with provider_slot(provider_name):
         response_text = await service.chat_completion(**service_params)
 
+    with record_stage("cleanup"):
         cleaned_response = clean_ai_response(response_text, provider_name)
 
-        logger.info(
-            f"Received response from {provider_name}: {len(cleaned_response)} characters"
+    with record_stage("dedup"):
+        cleaned_response = dedupe_response(
+            cleaned_response, get_settings().events_dedup_threshold
         )
-        logger.debug(f"Cleaned response preview: {cleaned_response[:200]}...")
-
-        return ChatResponse(
-            response=cleaned_response,
-            provider=provider_name,
-            model=request.model,
-            # Note: Usage information would need to be implemented in the service layer
-            usage=None,
+
+    logger.info(
+        f"Received response from {provider_name}: {len(cleaned_response)} characters"
+    )
+    logger.debug(f"Cleaned response preview: {cleaned_response[:200]}...")
+
+    return cleaned_response
+
+
+async def run_for_client(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Await request work, cancelling it if the client disconnects
+    (unless disabled in settings).
+    """
+    if not get_settings().cancel_on_disconnect:
+        return await awaitable
+    return await cancel_on_disconnect(request, awaitable)
+
+
+@asynccontextmanager
+async def provider_slot(provider_name: str) -> AsyncIterator[None]:
+    """
+    Wait for the provider's scheduler to admit a call in the current lane,
+    and feed the call's outcome to the provider's adaptive limit.
+    """
+    if not get_settings().scheduler_enabled:
+        yield
+        return
+
+    scheduler = get_scheduler(provider_name)
+    with record_stage("queue"):
+        lane_name = await scheduler.acquire()
+    try:
+        async with get_concurrency_limiter(provider_name).measure():
+            yield
+    finally:
+        scheduler.release(lane_name)
+
+
+def semantic_cache_key(
+    messages: List[Dict[str, str]], provider_name: str, request: ChatRequest
+) -> Optional[Tuple[str, Hashable]]:
+    """
+    Get the prompt a chat request is cached by, its last user message,
+    and the scope of everything else the completion depends on.
+    Returns None if the request does not end with a user message.
+    """
+    if not messages or messages[-1]["role"] != "user":
+        return None
+    scope = (
+        provider_name,
+        request.model,
+        request.temperature,
+        request.max_tokens,
+        tuple((msg["role"], msg["content"]) for msg in messages[:-1]),
+    )
+    return messages[-1]["content"], scope
+
+
+def render_response(
+    payload: ChatResponse, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serialize a response model, attaching stage timings if enabled.
+    Serialized here so the serialize stage shows up in Server-Timing.
+    """
+    timer = get_request_timer()
+    if timer is not None and get_settings().response_timings_enabled:
+        payload.timings = timer.as_dict()
+
+    with record_stage("serialize"):
+        body = payload.model_dump_json()
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.post(
+    "/chat",
+    response_model=ChatResponse,
+    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+)
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    service: AIService = Depends(get_service),
+):
+    """
+    Generate a chat completion using the specified AI provider.
+    Supports both OpenAI and Gemini API formats.
+    Near-identical prompts are answered from the semantic cache.
+    The provider call is cancelled if the client disconnects.
+    """
+    provider_name = get_provider_name(service)
+
+    try:
+        # Convert pydantic models to dictionaries
+        messages = [
+            {"role": msg.role, "content": msg.content} for msg in request.messages
+        ]
+
+        cache_key = None
+        if get_settings().semantic_cache_enabled:
+            cache_key = semantic_cache_key(messages, provider_name, request)
+        if cache_key is not None:
+            with record_stage("semantic_cache"):
+                match = get_semantic_cache().lookup(*cache_key)
+            if match is not None:
+                return render_response(
+                    ChatResponse(
+                        response=match.entry.response,
+                        provider=provider_name,
+                        model=request.model,
+                        usage=None,
+                    )
+                )
+
+        cleaned_response = await run_for_client(
+            http_request,
+            complete_chat(
+                service,
+                messages,
+                temperature=request.temperature,
+                model=request.model,
+                max_tokens=request.max_tokens,
+            ),
+        )
+        if cache_key is not None:
+            get_semantic_cache().store(*cache_key, cleaned_response)
+
+        return render_response(
+            ChatResponse(
+                response=cleaned_response,
+                provider=provider_name,
+                model=request.model,
+                # Note: Usage information would need to be implemented in the service layer
+                usage=None,
+            )
         )
 
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except (SchedulerFull, JobPreempted) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Chat completion error: {str(e)}", exc_info=True)
-        provider_name = (
-            getattr(service, "__class__", type(service))
-            .__name__.replace("Service", "")
-            .lower()
-        )
         raise HTTPException(
             status_code=500, detail=f"AI API error from {provider_name}: {str(e)}"
         )
@@ -180,3 +355,23 @@ async def health_check():
         "providers_configured": provider_status,
         "default_provider": settings.default_ai_provider,
     }
+
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness check: 200 once provider clients are warm, 503 until then.
+    Failed warm-ups are retried at most every warmup_retry_seconds.
+    """
+    settings = get_settings()
+    state = get_startup_state()
+
+    if not state.ready and (
+        state.last_attempt is None
+        or time.monotonic() - state.last_attempt >= settings.warmup_retry_seconds
+    ):
+        await warm_up_providers(state, settings.warmup_timeout_seconds)
+
+    return JSONResponse(
+        status_code=200 if state.ready else 503, content=state.as_dict()
+    )
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import List, Dict, Any
+import os
+
+from app.utils.profiling import PROFILE_EXTENSION, list_profiles
+
+from ..config import get_settings
+
+router = APIRouter()
+
+
+def _require_profiling() -> str:
+    settings = get_settings()
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled")
+    return settings.profiling_dir
+
+
+@router.get("/debug/profiles", response_model=List[Dict[str, Any]])
+async def get_profiles():
+    """
+    List saved request profiles, newest first.
+    """
+    return list_profiles(_require_profiling())
+
+
+@router.get("/debug/profiles/{name}", response_class=PlainTextResponse)
+async def get_profile(name: str):
+    """
+    Download a saved profile in collapsed-stack format.
+    """
+    directory = _require_profiling()
+
+    if os.path.basename(name) != name or not name.endswith(PROFILE_EXTENSION):
+        raise HTTPException(status_code=400, detail=f"Invalid profile name: {name}")
+
+    path = os.path.join(directory, name)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Profile {name} not found")
+
+    with open(path, encoding="utf-8") as f:
+        return f.read()
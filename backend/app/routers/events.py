@@ -0,0 +1,486 @@
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import random
+import logging
+
+from app.models.chat import ChatMessage, ChatRequest
+from app.services import get_service
+from app.services.ai_service import AIService
+from app.services.event_cache import CachedEvents, get_event_cache, make_cache_key
+from app.services.event_prefetcher import get_event_prefetcher
+from app.services.event_refresher import Job, get_event_refresher
+from app.services.event_index import get_event_index
+from app.services.event_store import get_event_store
+from app.services.scheduler import JobPreempted, SchedulerFull
+from app.utils.compression import PrecompressedBody, negotiate_encoding
+from app.utils.disconnect import CLIENT_CLOSED_REQUEST, ClientDisconnected
+from app.utils.event_dedup import merge_event_lists
+from app.utils.http_cache import (
+    cache_control_header,
+    etag_matches,
+    make_etag,
+    weak_etag,
+)
+from app.utils.prompt_templates import (
+    DEFAULT_TEMPLATE,
+    adjacent_dates,
+    build_messages,
+    get_supported_templates,
+    get_template,
+    parse_month_day,
+)
+from app.utils.timing import record_stage
+
+from .chat import (
+    ChatResponse,
+    ErrorResponse,
+    complete_chat,
+    get_provider_name,
+    render_response,
+    run_for_client,
+)
+from ..config import get_settings
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class EventsResponse(ChatResponse):
+    date: str = Field(..., description="Date the events occurred on (MM-DD)")
+    template: str = Field(..., description="Prompt template used for generation")
+
+
+class StoredEventResponse(BaseModel):
+    date: str = Field(..., description="Date of the event (MM-DD)")
+    year: int = Field(..., description="Year of the event, negative for BC")
+    text: str = Field(..., description="Event description")
+    provider: str = Field(..., description="Provider that generated the event")
+
+
+class EventSearchResponse(BaseModel):
+    events: List[StoredEventResponse] = Field(..., description="Matching events")
+    count: int = Field(..., description="Number of events returned")
+
+
+def _caching_headers(etag: str) -> Dict[str, str]:
+    settings = get_settings()
+    return {
+        "ETag": etag,
+        "Cache-Control": cache_control_header(
+            settings.events_http_max_age,
+            settings.events_http_stale_while_revalidate,
+        ),
+    }
+
+
+async def _render_cached(
+    entry: CachedEvents,
+    payload: Callable[[], EventsResponse],
+    headers: Dict[str, str],
+    accept_encoding: Optional[str],
+) -> Response:
+    """
+    Serve a cached variant from its stored body, compressing it at most
+    once per content coding while the body stays among the recently
+    served ones.
+    """
+    settings = get_settings()
+    if settings.response_timings_enabled or not settings.compression_enabled:
+        # Timings make every body different, nothing to reuse
+        return render_response(payload(), headers=headers)
+
+    def build() -> PrecompressedBody:
+        with record_stage("serialize"):
+            return PrecompressedBody(
+                payload().model_dump_json().encode(), settings.compression_min_size
+            )
+
+    rendered = get_event_cache().rendered_body(entry, build)
+    with record_stage("compress"):
+        encoding, body = await rendered.get(negotiate_encoding(accept_encoding))
+
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = weak_etag(headers["ETag"])
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def event_generator(service: AIService, template: str, month_day: str) -> Job:
+    """
+    Build the job that generates events for a date and adds them to the
+    cache and the event store.
+    """
+    settings = get_settings()
+    template_config = get_template(template)
+    messages = build_messages(template, month_day)
+    provider_name = get_provider_name(service)
+    cache_key = make_cache_key(template, provider_name, month_day)
+    response_schema = (
+        template_config.get("response_schema")
+        if settings.structured_output_enabled
+        else None
+    )
+
+    async def generate() -> CachedEvents:
+        cleaned_response = await complete_chat(
+            service,
+            messages,
+            temperature=template_config["temperature"],
+            response_schema=response_schema,
+        )
+        entry = get_event_cache().set(cache_key, cleaned_response, provider_name)
+
+        if settings.event_store_enabled:
+
+            def store_events() -> None:
+                stored = get_event_store().add_events(
+                    month_day, json.loads(cleaned_response), provider_name
+                )
+                get_event_index().add(stored)
+
+            try:
+                await asyncio.to_thread(store_events)
+            except Exception as e:
+                logger.warning(f"Could not store events for {month_day}: {e}")
+
+        return entry
+
+    return generate
+
+
+def _interactive_generation():
+    # Tells the prefetcher to hold off while a user waits on a provider
+    if get_settings().prefetch_enabled:
+        return get_event_prefetcher().interactive()
+    return nullcontext()
+
+
+def _prefetch_adjacent(service: AIService, template: str, month_day: str) -> None:
+    """
+    Queue generation of the dates around month_day that are not cached yet.
+    """
+    cache = get_event_cache()
+    refresher = get_event_refresher()
+    prefetcher = get_event_prefetcher()
+    provider_name = get_provider_name(service)
+
+    # Farthest first, as the prefetcher runs the newest job first
+    for date in reversed(adjacent_dates(month_day, get_settings().prefetch_radius)):
+        key = make_cache_key(template, provider_name, date)
+        if cache.get_variants(key) or refresher.is_pending(key):
+            continue
+
+        generate = event_generator(service, template, date)
+
+        async def prefetch(key: str = key, generate: Job = generate) -> None:
+            # The date may have been requested while the job was queued
+            if not cache.get_variants(key):
+                await refresher.run(key, generate)
+
+        prefetcher.submit(key, prefetch)
+
+
+def validate_events_request(
+    template: str, month_day: str
+) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Check the template and date of an events request.
+
+    Returns:
+        Tuple of (normalized template name, chat messages for the date)
+
+    Raises:
+        HTTPException: 404 for an unknown template, 400 for an invalid date
+    """
+    template = template.lower()
+    if template not in get_supported_templates():
+        raise HTTPException(status_code=404, detail=f"Template {template} not found")
+
+    try:
+        messages = build_messages(template, month_day)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return template, messages
+
+
+async def get_events_service(
+    template: str, messages: List[Dict[str, str]], provider: Optional[str]
+) -> AIService:
+    return await get_service(
+        ChatRequest(
+            messages=[ChatMessage(**msg) for msg in messages],
+            provider=provider,
+            temperature=get_template(template)["temperature"],
+        )
+    )
+
+
+def cached_variants(
+    service: AIService, template: str, month_day: str
+) -> List[CachedEvents]:
+    """
+    Get the cached variants of a date, scheduling a background top-up
+    when the pool is short or stale.
+    """
+    cache = get_event_cache()
+    cache_key = make_cache_key(template, get_provider_name(service), month_day)
+
+    with record_stage("cache"):
+        variants = cache.lookup(cache_key)
+
+    if variants and cache.needs_top_up(cache_key):
+        # Serve what we have now and add a new variant for later requests
+        get_event_refresher().schedule(
+            cache_key, event_generator(service, template, month_day)
+        )
+    return variants
+
+
+async def generate_variant(
+    service: AIService, template: str, month_day: str
+) -> CachedEvents:
+    """
+    Generate a variant for a date that has none, joining a generation
+    already in flight for it.
+
+    Raises:
+        SchedulerFull, JobPreempted: If the provider call was not admitted
+        Exception: If generation failed
+    """
+    cache_key = make_cache_key(template, get_provider_name(service), month_day)
+    # Leaving cancels the generation only if no other request awaits it
+    with _interactive_generation():
+        return await get_event_refresher().run(
+            cache_key, event_generator(service, template, month_day)
+        )
+
+
+async def get_date_events(
+    month_day: str, provider: Optional[str], template: str
+) -> Dict[str, Any]:
+    """
+    Answer one date query the way GET /api/events/{month_day} does,
+    from the cached variants or a new generation.
+
+    Raises:
+        HTTPException: For invalid queries
+        SchedulerFull, JobPreempted: If the provider call was not admitted
+        Exception: If generation failed
+    """
+    template, messages = validate_events_request(template, month_day)
+    service = await get_events_service(template, messages, provider)
+    provider_name = get_provider_name(service)
+
+    variants = cached_variants(service, template, month_day)
+    if variants:
+        cache_key = make_cache_key(template, provider_name, month_day)
+        entry = get_event_cache().get(cache_key) or variants[-1]
+    else:
+        entry = await generate_variant(service, template, month_day)
+
+    if get_settings().prefetch_enabled:
+        _prefetch_adjacent(service, template, month_day)
+
+    payload = EventsResponse(
+        response=entry.response,
+        provider=provider_name,
+        date=month_day,
+        template=template,
+    ).model_dump()
+    payload["etag"] = entry.etag
+    return payload
+
+
+# Declared before /events/{month_day} so "search" is not taken for a date
+@router.get(
+    "/events/search",
+    response_model=EventSearchResponse,
+    responses={400: {"model": ErrorResponse}},
+)
+async def search_events(
+    date: Optional[str] = None,
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    q: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """
+    Search stored events by date (MM-DD) or month, year range and keywords,
+    without calling a provider.
+    """
+    if date is None and month is None and not q:
+        raise HTTPException(
+            status_code=400, detail="Specify at least one of date, month or q"
+        )
+
+    if date is not None:
+        try:
+            parse_month_day(date)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    with record_stage("index"):
+        events = await asyncio.to_thread(
+            get_event_index().query,
+            month_day=date,
+            month=month,
+            year_from=year_from,
+            year_to=year_to,
+            keywords=q,
+            limit=limit,
+        )
+
+    return EventSearchResponse(
+        events=[
+            StoredEventResponse(
+                date=e.month_day, year=e.year, text=e.text, provider=e.provider
+            )
+            for e in events
+        ],
+        count=len(events),
+    )
+
+
+@router.get(
+    "/events/{month_day}",
+    response_model=EventsResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+    },
+)
+async def get_events(
+    request: Request,
+    month_day: str,
+    provider: Optional[str] = None,
+    template: str = DEFAULT_TEMPLATE,
+    merge: bool = False,
+    source: str = "provider",
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Generate historic events for a date (MM-DD) from a server-side prompt template.
+    Responses are cached and carry an ETag, so conditional requests with
+    If-None-Match are answered with 304 without calling a provider.
+    Expired entries are served while they are refreshed in the background.
+
+    Each date keeps a pool of response variants and a random one is served
+    per request; the pool is topped up in the background when it runs low
+    or old. With merge=true, the events of all variants are merged instead.
+
+    With source=index, the date is answered from the local event store when
+    it holds enough events, and from a provider only when it is thin.
+    """
+    settings = get_settings()
+
+    template, messages = validate_events_request(template, month_day)
+
+    if source not in ("provider", "index"):
+        raise HTTPException(
+            status_code=400, detail=f"Invalid source {source}, use provider or index"
+        )
+
+    if source == "index" and settings.event_store_enabled:
+        with record_stage("index"):
+            stored = await asyncio.to_thread(get_event_store().get_events, month_day)
+
+        if len(stored) >= settings.event_store_min_events:
+            # Seeded by the date's stored events, so the body and its ETag
+            # stay the same, and revalidate, until the store changes
+            stored.sort(key=lambda e: (e.year, e.text))
+            version = make_etag(month_day, *(e.text for e in stored))
+            sample = random.Random(version).sample(
+                stored, min(len(stored), settings.event_store_sample_size)
+            )
+            response_text = json.dumps(
+                [e.format() for e in sorted(sample, key=lambda e: e.year)],
+                ensure_ascii=False,
+            )
+            etag = make_etag(month_day, response_text)
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=_caching_headers(etag))
+
+            return render_response(
+                EventsResponse(
+                    response=response_text,
+                    provider="index",
+                    date=month_day,
+                    template=template,
+                ),
+                headers=_caching_headers(etag),
+            )
+
+    service = await get_events_service(template, messages, provider)
+    provider_name = get_provider_name(service)
+    cache = get_event_cache()
+    cache_key = make_cache_key(template, provider_name, month_day)
+
+    variants = cached_variants(service, template, month_day)
+    if not variants:
+        try:
+            variants = [
+                await run_for_client(
+                    request, generate_variant(service, template, month_day)
+                )
+            ]
+        except ClientDisconnected:
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+        except (SchedulerFull, JobPreempted) as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            logger.error(f"Events generation error: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=500, detail=f"AI API error from {provider_name}: {str(e)}"
+            )
+
+    if settings.prefetch_enabled:
+        _prefetch_adjacent(service, template, month_day)
+
+    if merge:
+        etag = make_etag(*(v.etag for v in variants))
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=_caching_headers(etag))
+
+        response_text = json.dumps(
+            merge_event_lists(
+                [json.loads(v.response) for v in variants],
+                threshold=settings.events_dedup_threshold,
+            ),
+            ensure_ascii=False,
+        )
+    else:
+        # A client holding any current variant does not need a new one
+        for variant in variants:
+            if etag_matches(if_none_match, variant.etag):
+                return Response(status_code=304, headers=_caching_headers(variant.etag))
+
+        entry = cache.get(cache_key) or variants[-1]
+        return await _render_cached(
+            entry,
+            lambda: EventsResponse(
+                response=entry.response,
+                provider=provider_name,
+                date=month_day,
+                template=template,
+            ),
+            _caching_headers(entry.etag),
+            accept_encoding,
+        )
+
+    return render_response(
+        EventsResponse(
+            response=response_text,
+            provider=provider_name,
+            date=month_day,
+            template=template,
+        ),
+        headers=_caching_headers(etag),
+    )
@@ -0,0 +1,192 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import logging
+
+from app.services.scheduler import JobPreempted, SchedulerFull
+from app.utils.metrics import get_metrics
+from app.utils.prompt_templates import DEFAULT_TEMPLATE
+
+from .events import get_date_events
+from ..config import get_cors_origins, get_settings
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Close code for a connection from an origin that is not allowed
+POLICY_VIOLATION = 1008
+
+
+class EventsSocket:
+    """
+    One WebSocket connection carrying many date queries.
+
+    Client messages:
+        {"type": "get", "id": "1", "date": "07-20", "provider": "openai",
+         "template": "historian"}
+        {"type": "cancel", "id": "1"}
+
+    Server messages, tagged with the request id:
+        {"type": "events", "id": "1", "date": ..., "response": ..., ...}
+        {"type": "error", "id": "1", "status": 400, "detail": ...}
+        {"type": "cancelled", "id": "1"}
+
+    Backpressure: at most max_inflight queries run at once and at most
+    max_pending are accepted (running or waiting), beyond which queries
+    are refused with status 429. Replies go through a bounded queue; a
+    client that stops reading first stalls its own queries and then the
+    reading of its messages, rather than growing server memory.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_inflight: int,
+        max_pending: int,
+        send_queue_size: int,
+    ):
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._outbox: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(send_queue_size)
+        self._queries: Dict[str, asyncio.Task] = {}
+
+    async def run(self) -> None:
+        receiver = asyncio.create_task(self._receive_loop())
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            # The sender only stops when a send fails, after which nothing
+            # drains the outbox and the receiver and queries would block on
+            # it for good, so either loop stopping ends the connection
+            await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Queries of a gone client are cancelled like HTTP requests are
+            tasks = [receiver, sender, *self._queries.values()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.wait(tasks)
+
+        if not sender.cancelled() and sender.exception() is not None:
+            logger.warning(
+                f"Closing WebSocket after a failed send: {sender.exception()}"
+            )
+        if not receiver.cancelled() and not isinstance(
+            receiver.exception(), (type(None), WebSocketDisconnect)
+        ):
+            raise receiver.exception()
+
+    async def _send_loop(self) -> None:
+        while True:
+            message = await self._outbox.get()
+            await self.websocket.send_json(message)
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        # Waits while the outbox is full, i.e. while the client is not reading
+        await self._outbox.put(message)
+
+    async def _error(self, request_id: Optional[str], status: int, detail: str) -> None:
+        await self._send(
+            {"type": "error", "id": request_id, "status": status, "detail": detail}
+        )
+
+    async def _receive_loop(self) -> None:
+        while True:
+            text = await self.websocket.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                await self._error(None, 400, "Messages must be JSON objects")
+                continue
+            if not isinstance(message, dict):
+                await self._error(None, 400, "Messages must be JSON objects")
+                continue
+
+            request_id = message.get("id")
+            if request_id is None:
+                await self._error(None, 400, "Missing request id")
+                continue
+            request_id = str(request_id)
+
+            kind = message.get("type")
+            if kind == "get":
+                await self._start_query(request_id, message)
+            elif kind == "cancel":
+                await self._cancel_query(request_id)
+            else:
+                await self._error(request_id, 400, f"Unknown message type {kind}")
+
+    async def _start_query(self, request_id: str, message: Dict[str, Any]) -> None:
+        if request_id in self._queries:
+            await self._error(request_id, 409, f"Request {request_id} is in progress")
+            return
+        if len(self._queries) >= self.max_pending:
+            get_metrics().increment("ws.rejected")
+            await self._error(
+                request_id, 429, f"Too many pending requests, limit {self.max_pending}"
+            )
+            return
+
+        task = asyncio.create_task(self._query(request_id, message))
+        self._queries[request_id] = task
+        task.add_done_callback(lambda _: self._forget(request_id, task))
+        get_metrics().increment("ws.requests")
+
+    def _forget(self, request_id: str, task: asyncio.Task) -> None:
+        # The id may have been reused since this query was cancelled
+        if self._queries.get(request_id) is task:
+            del self._queries[request_id]
+
+    async def _cancel_query(self, request_id: str) -> None:
+        task = self._queries.pop(request_id, None)
+        if task is None or task.done():
+            await self._error(request_id, 404, f"No request {request_id} in progress")
+            return
+
+        # The generation itself stops only if no other request awaits it
+        task.cancel()
+        get_metrics().increment("ws.cancelled")
+        await self._send({"type": "cancelled", "id": request_id})
+
+    async def _query(self, request_id: str, message: Dict[str, Any]) -> None:
+        async with self._slots:
+            try:
+                payload = await get_date_events(
+                    message.get("date", ""),
+                    message.get("provider"),
+                    message.get("template") or DEFAULT_TEMPLATE,
+                )
+            except HTTPException as e:
+                await self._error(request_id, e.status_code, str(e.detail))
+                return
+            except (SchedulerFull, JobPreempted) as e:
+                await self._error(request_id, 503, str(e))
+                return
+            except Exception as e:
+                logger.error(f"WebSocket events error: {str(e)}", exc_info=True)
+                await self._error(request_id, 500, f"AI API error: {str(e)}")
+                return
+
+            await self._send({"type": "events", "id": request_id, **payload})
+
+
+@router.websocket("/ws/events")
+async def events_socket(websocket: WebSocket):
+    """
+    Query many dates over one connection, with replies tagged by request
+    id, in-connection cancellation and backpressure (see EventsSocket).
+    """
+    # Browsers do not apply CORS to WebSockets, so check the origin here
+    origin = websocket.headers.get("origin")
+    if origin is not None and origin not in get_cors_origins():
+        await websocket.close(code=POLICY_VIOLATION)
+        return
+
+    settings = get_settings()
+    await websocket.accept()
+    await EventsSocket(
+        websocket,
+        max_inflight=settings.ws_max_inflight,
+        max_pending=settings.ws_max_pending,
+        send_queue_size=settings.ws_send_queue_size,
+    ).run()
@@ -0,0 +1,227 @@
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, List, Optional, Set
+import asyncio
+import json
+import logging
+
+from app.models.chat import ChatMessage, ChatRequest
+from app.services import get_service
+from app.services.batch_jobs import JobItem, JobStatus, get_job_runner
+from app.services.event_cache import get_event_cache, make_cache_key
+from app.services.event_refresher import get_event_refresher
+from app.utils.prompt_templates import (
+    DEFAULT_TEMPLATE,
+    build_messages,
+    date_range,
+    get_supported_templates,
+    get_template,
+    parse_month_day,
+)
+
+from .chat import ErrorResponse, get_provider_name
+from .events import event_generator
+from ..config import get_settings
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class JobRequest(BaseModel):
+    dates: Optional[List[str]] = Field(None, description="Dates to generate (MM-DD)")
+    start: Optional[str] = Field(
+        None, description="First date of a range (MM-DD), wraps around the year"
+    )
+    end: Optional[str] = Field(None, description="Last date of a range (MM-DD)")
+    templates: List[str] = Field(
+        default_factory=lambda: [DEFAULT_TEMPLATE],
+        description="Prompt templates to generate each date with",
+    )
+    provider: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    id: str
+    status: str = Field(..., description="queued, running or completed")
+    provider: Optional[str] = None
+    total: int = Field(..., description="Number of date and template pairs")
+    pending: int
+    running: int
+    done: int
+    failed: int
+    progress: float = Field(..., description="Finished share of the items, 0 to 1")
+    created_at: float
+    updated_at: float
+    results_url: str
+
+
+def _job_response(job: JobStatus) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        status=job.state,
+        provider=job.provider,
+        total=job.total,
+        pending=job.pending,
+        running=job.running,
+        done=job.done,
+        failed=job.failed,
+        progress=round((job.done + job.failed) / job.total, 4) if job.total else 1.0,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        results_url=f"/api/jobs/{job.id}/results",
+    )
+
+
+def _job_dates(job_request: JobRequest) -> List[str]:
+    """
+    Resolve the dates of a job request, raising ValueError for bad input.
+    """
+    dates = list(job_request.dates or [])
+    for month_day in dates:
+        parse_month_day(month_day)
+
+    if (job_request.start is None) != (job_request.end is None):
+        raise ValueError("Specify both start and end of the date range")
+    if job_request.start is not None:
+        dates += date_range(job_request.start, job_request.end)
+
+    if not dates:
+        raise ValueError("Specify dates or a start and end date")
+    # Keep the first occurrence of each date, in request order
+    return list(dict.fromkeys(dates))
+
+
+async def run_job_item(item: JobItem) -> str:
+    """
+    Generate events for one date and template of a job, through the same
+    cache and deduplication as GET /api/events/{month_day}.
+    A date that is already cached is answered without a provider call.
+    """
+    messages = build_messages(item.template, item.month_day)
+    service = await get_service(
+        ChatRequest(
+            messages=[ChatMessage(**msg) for msg in messages],
+            provider=item.provider,
+            temperature=get_template(item.template)["temperature"],
+        )
+    )
+    cache_key = make_cache_key(
+        item.template, get_provider_name(service), item.month_day
+    )
+
+    variants = get_event_cache().get_variants(cache_key)
+    if variants:
+        return variants[-1].response
+
+    entry = await get_event_refresher().run(
+        cache_key, event_generator(service, item.template, item.month_day)
+    )
+    return entry.response
+
+
+@router.post(
+    "/jobs",
+    response_model=JobResponse,
+    status_code=202,
+    responses={400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+)
+async def create_job(job_request: JobRequest, response: Response):
+    """
+    Queue generation of events for many dates and templates.
+    The job runs on background workers; poll GET /api/jobs/{id} for
+    progress and read GET /api/jobs/{id}/results for the events.
+    """
+    settings = get_settings()
+
+    templates = [template.lower() for template in job_request.templates]
+    for template in templates:
+        if template not in get_supported_templates():
+            raise HTTPException(
+                status_code=404, detail=f"Template {template} not found"
+            )
+
+    try:
+        dates = _job_dates(job_request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items = [
+        {"month_day": month_day, "template": template}
+        for month_day in dates
+        for template in templates
+    ]
+    if len(items) > settings.jobs_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Job has {len(items)} items, the limit is {settings.jobs_max_items}",
+        )
+
+    # Fails here, not in the workers, if the provider is unknown or unconfigured
+    await get_service(ChatRequest(messages=[], provider=job_request.provider))
+
+    runner = get_job_runner()
+    runner.start(run_job_item)
+    job = await runner.submit(job_request.provider, items)
+
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return _job_response(job)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+async def get_job(job_id: str):
+    """
+    Get the progress of a job.
+    """
+    job = await asyncio.to_thread(get_job_runner().store.status, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}/results", responses={404: {"model": ErrorResponse}})
+async def get_job_results(job_id: str, follow: bool = True):
+    """
+    Stream the finished items of a job as NDJSON, one line per date and
+    template, as they finish. With follow=true (the default) the stream
+    stays open until the job completes; otherwise it ends with the items
+    finished so far.
+    """
+    store = get_job_runner().store
+    if await asyncio.to_thread(store.status, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    poll_interval = get_settings().jobs_poll_interval_seconds
+
+    async def lines() -> AsyncIterator[str]:
+        sent: Set[int] = set()
+        while True:
+            # Read the status first, so results finished in between are not lost
+            finished = (await asyncio.to_thread(store.status, job_id)).finished
+            for result in await asyncio.to_thread(store.results, job_id):
+                if result.seq in sent:
+                    continue
+                sent.add(result.seq)
+                yield json.dumps(
+                    {
+                        "date": result.month_day,
+                        "template": result.template,
+                        "status": result.status,
+                        "events": (
+                            json.loads(result.result)
+                            if result.result is not None
+                            else None
+                        ),
+                        "error": result.error,
+                    },
+                    ensure_ascii=False,
+                ) + "\n"
+            if finished or not follow:
+                return
+            await asyncio.sleep(poll_interval)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from typing import Any, Dict
+
+from app.utils.metrics import get_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_model=Dict[str, Any])
+async def get_metrics_snapshot():
+    """
+    Counters and upstream connection pool usage of this worker process.
+    """
+    return get_metrics().snapshot()
@@ -1,26 +1,79 @@
+import importlib
+from functools import lru_cache
+from types import ModuleType
+from typing import List
 from fastapi import HTTPException, logger
 from ..config import get_settings
 from ..models.chat import ChatRequest
 from ..utils.provider_utils import validate_provider_request
+from ..utils.timing import record_stage
 from .ai_service import AIService
-from .openai_service import OpenAIService
-from .gemini_service import GeminiService
+
+# Provider SDKs are slow to import, so each service module is imported
+# the first time its provider is used rather than with this package
+SERVICE_MODULES = {
+    "openai": "app.services.openai_service",
+    "gemini": "app.services.gemini_service",
+}
+
+
+def load_service_module(provider: str) -> ModuleType:
+    """Import the service module (and SDK) for a provider"""
+    return importlib.import_module(SERVICE_MODULES[provider.lower()])
+
+
+def get_provider_api_key(provider: str) -> str:
+    """Get the configured API key for a provider, empty if not set"""
+    settings = get_settings()
+    api_keys = {
+        "openai": settings.openai_api_key,
+        "gemini": settings.gemini_api_key,
+    }
+    return api_keys.get(provider.lower()) or ""
+
+
+def get_configured_providers() -> List[str]:
+    """Get the providers that have an API key configured"""
+    return [p for p in SERVICE_MODULES if get_provider_api_key(p)]
 
 
 def get_ai_service(provider: str, api_key: str) -> AIService:
     """Factory function to get the appropriate AI service"""
-    if provider.lower() == "openai":
-        return OpenAIService(api_key)
-    elif provider.lower() == "gemini":
-        return GeminiService(api_key)
-    else:
+    return _create_service(provider.lower(), api_key)
+
+
+@lru_cache()
+def _create_service(provider: str, api_key: str) -> AIService:
+    # Services are long-lived so their HTTP clients keep connections warm
+    if provider not in SERVICE_MODULES:
         raise ValueError(f"Unknown AI provider: {provider}")
 
+    from .http_transport import create_http_client, get_transport_settings
+
+    http_client = create_http_client(provider)
+    timeout = get_transport_settings(provider).timeout
+    if provider == "openai":
+        return load_service_module("openai").OpenAIService(
+            api_key,
+            base_url=get_settings().openai_base_url,
+            http_client=http_client,
+            timeout=timeout,
+        )
+    else:
+        return load_service_module("gemini").GeminiService(
+            api_key, http_client=http_client, timeout=timeout
+        )
+
 
 async def get_service(request: ChatRequest) -> AIService:
     """
     Get the appropriate AI service based on the request.
     """
+    with record_stage("resolve"):
+        return _resolve_service(request)
+
+
+def _resolve_service(request: ChatRequest) -> AIService:
     settings = get_settings()
 
     # Determine provider
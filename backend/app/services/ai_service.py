@@ -9,6 +9,18 @@ class AIService(ABC):
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
         temperature: Optional[float] = 0.7,
+        response_schema: Optional[Dict[str, Any]] = None,
     ) -> str:
-        """Get a chat completion from the AI service"""
+        """
+        Get a chat completion from the AI service.
+        With response_schema (a JSON schema), the provider's structured
+        output mode is used and the response is JSON matching it.
+        """
+        pass
+
+    async def warm_up(self) -> None:
+        """
+        Make a cheap authenticated call so the client has its connection
+        (DNS, TLS) set up before real traffic arrives
+        """
         pass
@@ -0,0 +1,480 @@
+"""
+Background batch jobs.
+A job generates events for many dates and templates. Its items are kept
+in the local SQLite store and claimed one at a time by a small worker
+pool, so progress survives restarts and any worker process can serve
+status and results.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..config import get_settings
+from ..utils.metrics import get_metrics
+from .scheduler import BATCH, JobPreempted, SchedulerFull, lane
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    provider TEXT,
+    total INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    month_day TEXT NOT NULL,
+    template TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE INDEX IF NOT EXISTS job_items_by_status ON job_items (status, lease_until);
+"""
+
+
+@dataclass
+class JobItem:
+    job_id: str
+    seq: int
+    month_day: str
+    template: str
+    provider: Optional[str]
+    attempts: int
+
+
+@dataclass
+class JobStatus:
+    id: str
+    provider: Optional[str]
+    total: int
+    pending: int
+    running: int
+    done: int
+    failed: int
+    created_at: float
+    updated_at: float
+
+    @property
+    def finished(self) -> bool:
+        return self.done + self.failed == self.total
+
+    @property
+    def state(self) -> str:
+        if self.finished:
+            return "completed"
+        if self.pending == self.total:
+            return "queued"
+        return "running"
+
+
+@dataclass
+class JobResult:
+    seq: int
+    month_day: str
+    template: str
+    status: str
+    result: Optional[str]
+    error: Optional[str]
+
+
+class JobStore:
+    """
+    SQLite-backed job and item state, in the same database file as the
+    event store. Items are claimed with a lease: an item whose worker
+    died (e.g. on a restart) is claimed again once its lease expires.
+    A pending item's lease_until, if set, is when it may be retried.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def create(self, provider: Optional[str], items: List[Dict[str, str]]) -> JobStatus:
+        """
+        Create a job.
+
+        Args:
+            provider: Provider to generate with, or None for the default
+            items: Dictionaries with "month_day" and "template"
+
+        Returns:
+            Status of the new job
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, provider, total, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (job_id, provider, len(items), now),
+                )
+                conn.executemany(
+                    "INSERT INTO job_items "
+                    "(job_id, seq, month_day, template, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (job_id, seq, item["month_day"], item["template"], PENDING, now)
+                        for seq, item in enumerate(items)
+                    ],
+                )
+        return self.status(job_id)
+
+    def claim(self, lease_seconds: float) -> Optional[JobItem]:
+        """
+        Claim the oldest pending item that is not backing off, or a
+        running one whose lease expired.
+
+        Returns:
+            The claimed item, or None if there is nothing to do
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = conn.execute(
+                    "UPDATE job_items SET status = ?, attempts = attempts + 1, "
+                    "lease_until = ?, updated_at = ? "
+                    "WHERE rowid = ("
+                    "  SELECT rowid FROM job_items "
+                    "  WHERE (status = ? AND (lease_until IS NULL OR lease_until <= ?)) "
+                    "  OR (status = ? AND lease_until < ?) "
+                    "  ORDER BY rowid LIMIT 1"
+                    ") RETURNING job_id, seq, month_day, template, attempts",
+                    (RUNNING, now + lease_seconds, now, PENDING, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                (provider,) = conn.execute(
+                    "SELECT provider FROM jobs WHERE id = ?", (row[0],)
+                ).fetchone()
+        job_id, seq, month_day, template, attempts = row
+        return JobItem(job_id, seq, month_day, template, provider, attempts)
+
+    def finish(
+        self,
+        item: JobItem,
+        status: str,
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+        retry_in: float = 0,
+    ) -> None:
+        """
+        Record the outcome of an item: DONE or FAILED, or PENDING to retry,
+        no sooner than retry_in seconds from now.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "UPDATE job_items SET status = ?, result = ?, error = ?, "
+                    "lease_until = ?, updated_at = ? WHERE job_id = ? AND seq = ?",
+                    (
+                        status,
+                        result,
+                        error,
+                        now + retry_in if retry_in > 0 else None,
+                        now,
+                        item.job_id,
+                        item.seq,
+                    ),
+                )
+
+    def release(self, item: JobItem, retry_in: float = 0) -> None:
+        """
+        Put an interrupted item back in the queue without counting the
+        attempt, to be claimed again no sooner than retry_in seconds from now.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "UPDATE job_items SET status = ?, attempts = attempts - 1, "
+                    "lease_until = ?, updated_at = ? WHERE job_id = ? AND seq = ?",
+                    (
+                        PENDING,
+                        now + retry_in if retry_in > 0 else None,
+                        now,
+                        item.job_id,
+                        item.seq,
+                    ),
+                )
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        with self._lock:
+            conn = self._connection()
+            job = conn.execute(
+                "SELECT id, provider, total, created_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(
+                conn.execute(
+                    "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? "
+                    "GROUP BY status",
+                    (job_id,),
+                ).fetchall()
+            )
+            (updated_at,) = conn.execute(
+                "SELECT MAX(updated_at) FROM job_items WHERE job_id = ?", (job_id,)
+            ).fetchone()
+
+        job_id, provider, total, created_at = job
+        return JobStatus(
+            id=job_id,
+            provider=provider,
+            total=total,
+            pending=counts.get(PENDING, 0),
+            running=counts.get(RUNNING, 0),
+            done=counts.get(DONE, 0),
+            failed=counts.get(FAILED, 0),
+            created_at=created_at,
+            updated_at=updated_at or created_at,
+        )
+
+    def results(self, job_id: str) -> List[JobResult]:
+        """
+        Get the finished items of a job, in request order.
+        """
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT seq, month_day, template, status, result, error "
+                    "FROM job_items WHERE job_id = ? AND status IN (?, ?) "
+                    "ORDER BY seq",
+                    (job_id, DONE, FAILED),
+                )
+                .fetchall()
+            )
+        return [JobResult(*row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+Executor = Callable[[JobItem], Awaitable[str]]
+
+
+class JobRunner:
+    """
+    Worker pool that claims job items from the store and runs them with
+    an executor, in the scheduler's batch lane.
+
+    Workers poll the store, so items queued by another process or left
+    unfinished by a previous one are picked up too: items interrupted by
+    a shutdown right away, items of a crashed process once their lease
+    expires. A failed item is retried after retry_backoff seconds,
+    doubling with each attempt, until it has been attempted max_attempts
+    times. An item whose provider call was not admitted (the scheduler
+    queue was full, or it was preempted by higher-priority calls) is not
+    counted as attempted, and is retried after retry_backoff seconds.
+
+    Store calls run in a thread. A worker that cannot reach the store
+    (e.g. the database is locked by another process) logs it and polls
+    again; an item whose outcome could not be recorded is claimed again
+    once its lease expires.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int,
+        max_attempts: int,
+        lease_seconds: float,
+        poll_interval: float,
+        retry_backoff: float,
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self._executor: Optional[Executor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self, executor: Executor) -> None:
+        """
+        Start the workers on the running loop, if not started yet.
+        """
+        self._executor = executor
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(
+        self, provider: Optional[str], items: List[Dict[str, str]]
+    ) -> JobStatus:
+        """
+        Store a new job and wake the workers.
+        """
+        job = await asyncio.to_thread(self.store.create, provider, items)
+        get_metrics().increment("jobs.created")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def _store_call(self, name: str, *args, **kwargs) -> Any:
+        """
+        Call a store method in a thread. Raises sqlite3.Error after
+        logging it.
+        """
+        try:
+            return await asyncio.to_thread(getattr(self.store, name), *args, **kwargs)
+        except sqlite3.Error as e:
+            get_metrics().increment("jobs.store_errors")
+            logger.warning(f"Job store {name} failed: {e}")
+            raise
+
+    async def _claim(self) -> Optional[JobItem]:
+        claim = asyncio.ensure_future(self._store_call("claim", self.lease_seconds))
+        try:
+            return await asyncio.shield(claim)
+        except asyncio.CancelledError:
+            # Shutting down: the claim goes on in its thread, give back
+            # the item it gets
+            try:
+                item = await claim
+                if item is not None:
+                    await self._store_call("release", item)
+            except sqlite3.Error:
+                pass
+            raise
+
+    async def _next_item(self) -> JobItem:
+        while True:
+            try:
+                item = await self._claim()
+            except sqlite3.Error:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if item is not None:
+                return item
+            self._wakeup.clear()
+            # Not wait_for: on Python 3.11 it can swallow a cancellation that
+            # arrives as the timeout fires, and the worker would not stop
+            wakeup = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({wakeup}, timeout=self.poll_interval)
+            finally:
+                wakeup.cancel()
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._next_item()
+            try:
+                await self._run(item)
+            except sqlite3.Error:
+                # Logged already, the item is claimed again when its lease expires
+                pass
+
+    async def _run(self, item: JobItem) -> None:
+        try:
+            with lane(BATCH):
+                result = await self._executor(item)
+        except asyncio.CancelledError:
+            # Shutting down: leave the item for the next worker to start,
+            # or once its lease expires if the store fails
+            try:
+                await self._store_call("release", item)
+            except sqlite3.Error:
+                pass
+            raise
+        except (SchedulerFull, JobPreempted) as e:
+            # Not the item's fault: wait for interactive load to ease
+            await self._store_call("release", item, retry_in=self.retry_backoff)
+            get_metrics().increment("jobs.items.deferred")
+            logger.info(f"Job {item.job_id} item {item.month_day} deferred: {e}")
+            return
+        except Exception as e:
+            if item.attempts < self.max_attempts:
+                await self._store_call(
+                    "finish",
+                    item,
+                    PENDING,
+                    error=str(e),
+                    retry_in=self.retry_backoff * 2 ** (item.attempts - 1),
+                )
+                get_metrics().increment("jobs.items.retried")
+                logger.info(
+                    f"Job {item.job_id} item {item.month_day} failed, retrying: {e}"
+                )
+            else:
+                await self._store_call("finish", item, FAILED, error=str(e))
+                get_metrics().increment("jobs.items.failed")
+                logger.warning(f"Job {item.job_id} item {item.month_day} failed: {e}")
+            return
+        await self._store_call("finish", item, DONE, result=result)
+        get_metrics().increment("jobs.items.done")
+
+    async def close(self) -> None:
+        """
+        Stop the workers. Items they were running go back to pending.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        self.store.close()
+
+
+@lru_cache()
+def get_job_runner() -> JobRunner:
+    settings = get_settings()
+    return JobRunner(
+        JobStore(settings.event_store_path),
+        workers=settings.jobs_workers,
+        max_attempts=settings.jobs_max_attempts,
+        lease_seconds=settings.jobs_lease_seconds,
+        poll_interval=settings.jobs_poll_interval_seconds,
+        retry_backoff=settings.jobs_retry_backoff_seconds,
+    )
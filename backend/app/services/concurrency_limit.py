@@ -0,0 +1,273 @@
+"""
+Adaptive concurrency limits for provider calls.
+Measures each provider call and moves the provider scheduler's limit with
+it: up while latency holds, down when latency climbs or the provider
+starts shedding load (429, 5xx, timeouts).
+"""
+
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from ..config import get_settings
+from ..utils.metrics import get_metrics
+from .scheduler import PriorityScheduler, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Provider statuses that mean "too much load", as opposed to a bad request
+OVERLOAD_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Check whether a provider call failed because the provider is overloaded.
+
+    Args:
+        error: Exception raised by the provider SDK
+
+    Returns:
+        True for timeouts and 408/429/5xx responses, also when wrapped in
+        another exception (the services re-raise SDK errors as Exception)
+    """
+    seen = set()
+    candidate: Optional[BaseException] = error
+    while candidate is not None and id(candidate) not in seen:
+        seen.add(id(candidate))
+        if isinstance(candidate, (asyncio.TimeoutError, httpx.TimeoutException)):
+            return True
+        # openai errors carry status_code, google-genai errors carry code
+        status = getattr(candidate, "status_code", None) or getattr(
+            candidate, "code", None
+        )
+        if status in OVERLOAD_STATUSES:
+            return True
+        candidate = candidate.__cause__ or candidate.__context__
+    return False
+
+
+class FixedLimit:
+    """Keeps the initial limit, for comparison and to turn adaptation off."""
+
+    name = "fixed"
+
+    def __init__(self, initial: float, min_limit: int, max_limit: int):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = self._clamp(initial)
+
+    def update(self, rtt: float, in_flight: int, dropped: bool) -> float:
+        return self.limit
+
+    def _clamp(self, limit: float) -> float:
+        return min(float(self.max_limit), max(float(self.min_limit), limit))
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class AIMDLimit(FixedLimit):
+    """
+    Additive increase, multiplicative decrease: +1 per limit's worth of
+    successful calls, times backoff on every overload error.
+    Ignores latency, so it only backs off once the provider sheds load.
+    """
+
+    name = "aimd"
+
+    def __init__(
+        self, initial: float, min_limit: int, max_limit: int, backoff: float = 0.9
+    ):
+        super().__init__(initial, min_limit, max_limit)
+        self.backoff = backoff
+
+    def update(self, rtt: float, in_flight: int, dropped: bool) -> float:
+        if dropped:
+            self.limit = self._clamp(self.limit * self.backoff)
+        elif in_flight * 2 >= self.limit:
+            # Only grow when the limit is what holds traffic back
+            self.limit = self._clamp(self.limit + 1 / self.limit)
+        return self.limit
+
+
+class GradientLimit(FixedLimit):
+    """
+    Latency gradient: compares recent latency (a short moving average)
+    with the baseline, a long moving average of latency, and shrinks the
+    limit once recent latency rises past tolerance times the baseline
+    (calls queueing at the provider). Otherwise the limit grows by
+    sqrt(limit) headroom. Overload errors back off like AIMD.
+
+    The baseline is an average rather than the fastest call seen: LLM
+    latency varies severalfold with output length regardless of load,
+    and a minimum would read that spread as queueing.
+    """
+
+    name = "gradient"
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float = 1.25,
+        smoothing: float = 0.2,
+        short_window: int = 10,
+        baseline_window: int = 500,
+        backoff: float = 0.9,
+    ):
+        super().__init__(initial, min_limit, max_limit)
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.backoff = backoff
+        self.short_window = short_window
+        self._short_alpha = 2 / (short_window + 1)
+        self._baseline_alpha = 2 / (baseline_window + 1)
+        self._samples = 0
+        self.short_rtt: Optional[float] = None
+        self.baseline_rtt: Optional[float] = None
+
+    def _update_baseline(self, rtt: float) -> None:
+        self._samples += 1
+        if self.baseline_rtt is None:
+            self.baseline_rtt = rtt
+        elif self._samples <= self.short_window:
+            # Plain average while warming up
+            self.baseline_rtt += (rtt - self.baseline_rtt) / self._samples
+        else:
+            alpha = self._baseline_alpha
+            if self.short_rtt > self.tolerance * self.baseline_rtt:
+                # Latency raised by our own queueing would otherwise become
+                # the new normal and let the limit ratchet up; still follow
+                # it slowly, in case the provider got slower for everyone
+                alpha /= 10
+            self.baseline_rtt += alpha * (rtt - self.baseline_rtt)
+
+        # After a period of queueing the baseline has drifted up; let it
+        # follow latency back down instead of waiting out the long window
+        if self.short_rtt is not None and self.baseline_rtt > 2 * self.short_rtt:
+            self.baseline_rtt *= 0.95
+
+    def update(self, rtt: float, in_flight: int, dropped: bool) -> float:
+        if dropped:
+            self.limit = self._clamp(self.limit * self.backoff)
+            return self.limit
+
+        if self.short_rtt is None:
+            self.short_rtt = rtt
+        self.short_rtt += self._short_alpha * (rtt - self.short_rtt)
+        self._update_baseline(rtt)
+
+        if in_flight * 2 < self.limit:
+            return self.limit
+
+        gradient = max(
+            0.5, min(1.0, self.tolerance * self.baseline_rtt / self.short_rtt)
+        )
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = self._clamp(
+            self.limit * (1 - self.smoothing) + target * self.smoothing
+        )
+        return self.limit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rtt_ms_short": round((self.short_rtt or 0.0) * 1000, 3),
+            "rtt_ms_baseline": round((self.baseline_rtt or 0.0) * 1000, 3),
+        }
+
+
+ALGORITHMS = {cls.name: cls for cls in (FixedLimit, AIMDLimit, GradientLimit)}
+
+
+class ConcurrencyLimiter:
+    """
+    Feeds provider call outcomes to a limit algorithm and applies the
+    resulting limit to the provider's scheduler.
+    """
+
+    def __init__(
+        self, scheduler: PriorityScheduler, algorithm: FixedLimit, clock=time.monotonic
+    ):
+        self.scheduler = scheduler
+        self.algorithm = algorithm
+        self.clock = clock
+        self.samples = 0
+        self.drops = 0
+        scheduler.set_limit(int(algorithm.limit))
+
+    @asynccontextmanager
+    async def measure(self) -> AsyncIterator[None]:
+        """
+        Time a provider call holding a scheduler slot and update the limit.
+        Cancelled calls and errors other than overload are not sampled.
+        """
+        in_flight = self.scheduler.running
+        started = self.clock()
+        try:
+            yield
+        except Exception as e:
+            if is_overload_error(e):
+                self.record(self.clock() - started, in_flight, dropped=True)
+            raise
+        else:
+            self.record(self.clock() - started, in_flight, dropped=False)
+
+    def record(self, rtt: float, in_flight: int, dropped: bool) -> None:
+        self.samples += 1
+        self.drops += int(dropped)
+        previous = self.scheduler.limit
+        limit = int(self.algorithm.update(rtt, in_flight, dropped))
+        if limit != previous:
+            self.scheduler.set_limit(limit)
+            logger.debug(
+                f"{self.scheduler.name} concurrency limit {previous} -> {limit}"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "algorithm": self.algorithm.name,
+            "limit": self.scheduler.limit,
+            "estimate": round(self.algorithm.limit, 3),
+            "min_limit": self.algorithm.min_limit,
+            "max_limit": self.algorithm.max_limit,
+            "samples": self.samples,
+            "drops": self.drops,
+            **self.algorithm.stats(),
+        }
+
+
+def create_limit(
+    algorithm: str, initial: float, min_limit: int, max_limit: int
+) -> FixedLimit:
+    """
+    Create a limit algorithm by name.
+
+    Raises:
+        ValueError: If the algorithm is unknown
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown concurrency limit algorithm: {algorithm}")
+    return ALGORITHMS[algorithm](initial, min_limit, max_limit)
+
+
+@lru_cache()
+def get_concurrency_limiter(provider: str) -> ConcurrencyLimiter:
+    settings = get_settings()
+    limiter = ConcurrencyLimiter(
+        get_scheduler(provider),
+        create_limit(
+            settings.concurrency_limit_algorithm,
+            settings.scheduler_max_concurrency,
+            settings.concurrency_limit_min,
+            settings.concurrency_limit_max,
+        ),
+    )
+    get_metrics().register(f"limiter.{provider}", limiter.stats)
+    return limiter
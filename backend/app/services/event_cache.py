@@ -0,0 +1,302 @@
+"""
+In-memory cache of generated events, keyed by date, provider and template.
+Each key holds a small pool of response variants so repeat requests can
+get a different selection of events without another provider call.
+Variants are stored compactly: the distinct events of a key are kept
+once in a compressed event table and each variant lists their indexes.
+"""
+
+import json
+import sys
+import time
+import random
+import logging
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from ..config import get_settings
+from ..utils.cache_policy import make_policy
+from ..utils.compression import PrecompressedBody
+from ..utils.event_packing import SEPARATOR, EventCodec, EventTable
+from ..utils.http_cache import make_etag
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CachedEvents:
+    provider: str
+    etag: str
+    stored_at: float
+    table: EventTable = field(repr=False)
+    # Indexes of the variant's events in the table (bytes for tables of up
+    # to 256 events), or None if the table holds the whole response (one
+    # that is not a plain list of strings)
+    indexes: Optional[Union[bytes, array]] = field(default=None, repr=False)
+
+    @property
+    def response(self) -> str:
+        """
+        Cleaned JSON array of event strings, rebuilt from the table.
+        """
+        events = self.table.unpack()
+        if self.indexes is None:
+            return events[0]
+        return json.dumps([events[i] for i in self.indexes], ensure_ascii=False)
+
+
+def make_cache_key(template: str, provider: str, month_day: str) -> str:
+    """
+    Build the cache key for a templated date request.
+    """
+    return f"{template}:{provider}:{month_day}"
+
+
+def _parse_events(response: str) -> Optional[List[str]]:
+    """
+    Parse a response that can be rebuilt exactly from its events.
+    """
+    try:
+        events = json.loads(response)
+    except ValueError:
+        return None
+    if not isinstance(events, list) or not all(isinstance(e, str) for e in events):
+        return None
+    if any(SEPARATOR in event for event in events):
+        return None
+    if json.dumps(events, ensure_ascii=False) != response:
+        return None
+    return events
+
+
+class EventCache:
+    """
+    Cache of variant pools with a freshness TTL.
+    Which keys stay cached is up to the eviction policy: LRU, or
+    W-TinyLFU, which also weighs how often each key is looked up.
+    Variants past their TTL are still served for stale_seconds, but only
+    when no fresh variant exists, so they can be refreshed in the background
+    (stale-while-revalidate).
+
+    Serialized and compressed response bodies are kept only for the
+    max_bodies most recently served variants, so memory per cached
+    variant stays small.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        stale_seconds: float = 0,
+        variants_per_key: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        dictionary_size: int = 16384,
+        dictionary_training_events: int = 2000,
+        max_bodies: int = 256,
+        policy: str = "tinylfu",
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.variants_per_key = variants_per_key
+        self.clock = clock
+        self.max_bodies = max_bodies
+        self.codec = EventCodec(dictionary_size, dictionary_training_events)
+        self.policy = make_policy(policy, max_entries, self._key_expired)
+        self._entries: Dict[str, List[CachedEvents]] = {}
+        self._bodies: "OrderedDict[str, PrecompressedBody]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_stale(self, entry: CachedEvents) -> bool:
+        return self.clock() - entry.stored_at > self.ttl_seconds
+
+    def _is_expired(self, entry: CachedEvents) -> bool:
+        return self.clock() - entry.stored_at > self.ttl_seconds + self.stale_seconds
+
+    def _key_expired(self, key: str) -> bool:
+        return all(self._is_expired(v) for v in self._entries[key])
+
+    def get_variants(self, key: str) -> List[CachedEvents]:
+        """
+        Get all servable variants for a key, oldest first,
+        dropping those too old to serve.
+        """
+        variants = self._entries.get(key)
+        if variants is None:
+            return []
+
+        variants[:] = [v for v in variants if not self._is_expired(v)]
+        if not variants:
+            del self._entries[key]
+            self.policy.remove(key)
+            return []
+
+        self.policy.touch(key)
+        return list(variants)
+
+    def lookup(self, key: str) -> List[CachedEvents]:
+        """
+        Get the servable variants for a client request. Unlike
+        get_variants, this counts towards how popular the key is,
+        whether it is cached or not.
+        """
+        self.policy.record(key)
+        return self.get_variants(key)
+
+    def get(self, key: str) -> Optional[CachedEvents]:
+        """
+        Get a random variant, preferring fresh variants over stale ones.
+        """
+        variants = self.get_variants(key)
+        if not variants:
+            return None
+
+        fresh = [v for v in variants if not self.is_stale(v)]
+        return random.choice(fresh or variants)
+
+    def needs_top_up(self, key: str) -> bool:
+        """
+        Check whether a key's pool is short of variants or holds stale ones.
+        """
+        variants = self.get_variants(key)
+        return len(variants) < self.variants_per_key or any(
+            self.is_stale(v) for v in variants
+        )
+
+    def set(self, key: str, response: str, provider: str) -> CachedEvents:
+        """
+        Add a cleaned response variant, dropping the oldest variant if the
+        pool is full and the key the policy evicts if the cache is full.
+        """
+        etag = make_etag(key, response)
+        events = _parse_events(response)
+
+        variants = [v for v in self._entries.get(key, []) if v.etag != etag]
+        del variants[: max(0, len(variants) + 1 - self.variants_per_key)]
+
+        if events is None:
+            table = EventTable.pack([response], self.codec.current)
+            indexes = None
+        else:
+            self.codec.observe(events)
+            table, indexes = self._intern(variants, events)
+
+        entry = CachedEvents(
+            provider=sys.intern(provider),
+            etag=etag,
+            stored_at=self.clock(),
+            table=table,
+            indexes=indexes,
+        )
+        variants.append(entry)
+        cached = key in self._entries
+        self._entries[key] = variants
+        if cached:
+            self.policy.touch(key)
+            return entry
+
+        for evicted in self.policy.insert(key):
+            del self._entries[evicted]
+            logger.debug(f"Evicted cached events for {evicted}")
+
+        return entry
+
+    def _intern(
+        self, variants: List[CachedEvents], events: List[str]
+    ) -> Tuple[EventTable, Union[bytes, array]]:
+        """
+        Build a key's event table from the events of its remaining
+        variants and a new one, so events repeated across variants are
+        stored once and events of dropped variants are not stored at all.
+        The remaining variants are moved to the new table in place, so
+        ones already handed out stay valid.
+
+        Returns:
+            The table and the indexes of the new events in it
+        """
+        unpacked: Dict[int, List[str]] = {}
+        interned = []
+        for variant in variants:
+            if variant.indexes is None:
+                continue
+            table = variant.table
+            if id(table) not in unpacked:
+                unpacked[id(table)] = table.unpack()
+            interned.append(
+                (variant, [unpacked[id(table)][i] for i in variant.indexes])
+            )
+
+        index: Dict[str, int] = {}
+        moved = [
+            (variant, [index.setdefault(e, len(index)) for e in variant_events])
+            for variant, variant_events in interned
+        ]
+        new_indexes = [index.setdefault(e, len(index)) for e in events]
+
+        # Index arrays carry more overhead than the handful of ids in them
+        pack = bytes if len(index) <= 256 else (lambda ids: array("I", ids))
+        table = EventTable.pack(list(index), self.codec.current)
+        for variant, variant_indexes in moved:
+            variant.table = table
+            variant.indexes = pack(variant_indexes)
+        return table, pack(new_indexes)
+
+    def rendered_body(
+        self, entry: CachedEvents, build: Callable[[], PrecompressedBody]
+    ) -> PrecompressedBody:
+        """
+        Get the serialized body of a variant, building it if it is not
+        among the most recently served.
+        """
+        body = self._bodies.get(entry.etag)
+        if body is not None:
+            self._bodies.move_to_end(entry.etag)
+            return body
+
+        body = build()
+        self._bodies[entry.etag] = body
+        while len(self._bodies) > self.max_bodies:
+            self._bodies.popitem(last=False)
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        tables = {
+            id(variant.table): variant.table
+            for variants in self._entries.values()
+            for variant in variants
+        }
+        return {
+            "keys": len(self._entries),
+            "variants": sum(len(variants) for variants in self._entries.values()),
+            "stored_bytes": sum(len(table.blob) for table in tables.values()),
+            "dictionary_bytes": self.codec.dictionary_bytes,
+            "bodies": len(self._bodies),
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bodies.clear()
+        self.policy.clear()
+
+
+@lru_cache()
+def get_event_cache() -> EventCache:
+    settings = get_settings()
+    cache = EventCache(
+        max_entries=settings.events_cache_max_entries,
+        ttl_seconds=settings.events_cache_ttl_seconds,
+        stale_seconds=settings.events_cache_stale_seconds,
+        variants_per_key=settings.events_cache_variants,
+        dictionary_size=settings.events_cache_dictionary_size,
+        dictionary_training_events=settings.events_cache_dictionary_training_events,
+        max_bodies=settings.events_cache_max_bodies,
+        policy=settings.events_cache_policy,
+    )
+    get_metrics().register("events_cache", cache.stats)
+    return cache
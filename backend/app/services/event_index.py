@@ -0,0 +1,157 @@
+"""
+In-memory query index over the event store.
+Answers year-range and keyword queries without an LLM call.
+"""
+
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..utils.event_dedup import STOP_WORDS, normalize_event_text
+from .event_store import EventStore, StoredEvent, get_event_store
+
+logger = logging.getLogger(__name__)
+
+
+def keyword_tokens(text: str) -> Set[str]:
+    """
+    Split text into the tokens used by the keyword index.
+    """
+    return {t for t in normalize_event_text(text).split() if t not in STOP_WORDS}
+
+
+class EventIndex:
+    """
+    Year-sorted event ids per date plus an inverted keyword index
+    (token -> month -> event ids). Built from the store on first query
+    and kept current with add(). Safe to query and add from threads.
+    """
+
+    def __init__(self, store: EventStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._events: List[StoredEvent] = []
+        self._years: Dict[str, List[int]] = defaultdict(list)
+        self._ids: Dict[str, List[int]] = defaultdict(list)
+        self._postings: Dict[str, Dict[int, Set[int]]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                events = self.store.all_events()
+                self._index(events)
+                self._loaded = True
+                logger.info(f"Loaded {len(events)} events into the query index")
+
+    def _index(self, events: Iterable[StoredEvent]) -> None:
+        for event in events:
+            event_id = len(self._events)
+            self._events.append(event)
+
+            # Keep ids of each date ordered by year
+            years = self._years[event.month_day]
+            position = bisect.bisect_right(years, event.year)
+            years.insert(position, event.year)
+            self._ids[event.month_day].insert(position, event_id)
+
+            month = int(event.month_day[:2])
+            for token in keyword_tokens(event.text):
+                self._postings[token][month].add(event_id)
+
+    def add(self, events: List[StoredEvent]) -> None:
+        """
+        Index newly stored events. Skipped until the index is first loaded,
+        since loading reads them from the store anyway.
+        """
+        if not self._loaded:
+            return
+        with self._lock:
+            self._index(events)
+
+    def _date_ids(
+        self, month_day: str, year_from: Optional[int], year_to: Optional[int]
+    ) -> List[int]:
+        years = self._years.get(month_day, [])
+        start = 0 if year_from is None else bisect.bisect_left(years, year_from)
+        end = len(years) if year_to is None else bisect.bisect_right(years, year_to)
+        return self._ids[month_day][start:end] if years else []
+
+    def query(
+        self,
+        month_day: Optional[str] = None,
+        month: Optional[int] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        keywords: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[StoredEvent]:
+        """
+        Find stored events.
+
+        Args:
+            month_day: Restrict to a date in MM-DD format
+            month: Restrict to a month (1-12)
+            year_from: Earliest year, inclusive
+            year_to: Latest year, inclusive
+            keywords: Text every matching event must mention (all words)
+            limit: Maximum number of events to return
+
+        Returns:
+            Matching events ordered by date and year
+        """
+        self._ensure_loaded()
+
+        with self._lock:
+            if month_day is not None:
+                month = int(month_day[:2])
+
+            tokens = keyword_tokens(keywords) if keywords else set()
+            if tokens:
+                ids: Optional[Set[int]] = None
+                for token in tokens:
+                    by_month = self._postings.get(token, {})
+                    if month is not None:
+                        matches = by_month.get(month, set())
+                    else:
+                        matches = set().union(*by_month.values())
+                    ids = matches if ids is None else ids & matches
+                    if not ids:
+                        return []
+
+                results = [
+                    self._events[i]
+                    for i in ids
+                    if (month_day is None or self._events[i].month_day == month_day)
+                    and (year_from is None or self._events[i].year >= year_from)
+                    and (year_to is None or self._events[i].year <= year_to)
+                ]
+                results.sort(key=lambda e: (e.month_day, e.year))
+            else:
+                if month_day is not None:
+                    dates = [month_day]
+                elif month is not None:
+                    prefix = f"{month:02d}-"
+                    dates = sorted(d for d in self._years if d.startswith(prefix))
+                else:
+                    dates = sorted(self._years)
+
+                results = [
+                    self._events[i]
+                    for date in dates
+                    for i in self._date_ids(date, year_from, year_to)
+                ]
+
+            return results[:limit] if limit is not None else results
+
+
+@lru_cache()
+def get_event_index() -> EventIndex:
+    return EventIndex(get_event_store())
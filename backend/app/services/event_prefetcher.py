@@ -0,0 +1,175 @@
+"""
+Speculative prefetch of cached events.
+Generates events for dates a user is likely to ask for next, using only
+spare capacity: one worker, a bounded queue and a rate budget, paused
+while interactive generations are in flight.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Iterator, Optional, Set, Tuple
+
+from ..config import get_settings
+from ..utils.metrics import get_metrics
+from .scheduler import BATCH, lane
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class EventPrefetcher:
+    """
+    Runs prefetch jobs one at a time in the background.
+
+    The newest job runs first, since it is about the dates the user is
+    looking at now, and the queue keeps the newest max_queue jobs: when
+    it is full the oldest job is dropped, since the user has most likely
+    moved on from it. Jobs are started at most budget_per_minute times a
+    minute (token bucket) and only while no interactive generation is
+    running.
+    """
+
+    def __init__(
+        self,
+        max_queue: int,
+        budget_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_queue = max_queue
+        self.budget_per_minute = budget_per_minute
+        self.clock = clock
+        self._tokens = float(budget_per_minute)
+        self._refilled_at = clock()
+        self._jobs: Deque[Tuple[str, Job]] = deque()
+        self._keys: Set[str] = set()
+        self._interactive = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _bind_to_running_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        if self._interactive == 0:
+            self._idle.set()
+        self._task = loop.create_task(self._worker())
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def submit(self, key: str, job: Job) -> bool:
+        """
+        Queue a prefetch job, dropping the oldest one if the queue is full.
+        A key that is already queued moves up to run next instead.
+
+        Returns:
+            True if the job was queued, False if the key is already queued
+        """
+        self._bind_to_running_loop()
+
+        if key in self._keys:
+            for i, queued in enumerate(self._jobs):
+                if queued[0] == key:
+                    del self._jobs[i]
+                    self._jobs.append(queued)
+                    break
+            return False
+
+        if len(self._jobs) >= self.max_queue:
+            dropped, _ = self._jobs.popleft()
+            self._keys.discard(dropped)
+            get_metrics().increment("prefetch.dropped")
+
+        self._jobs.append((key, job))
+        self._keys.add(key)
+        self._wakeup.set()
+        get_metrics().increment("prefetch.queued")
+        return True
+
+    @contextmanager
+    def interactive(self) -> Iterator[None]:
+        """
+        Mark an interactive generation as running; prefetching waits
+        until none are.
+        """
+        self._bind_to_running_loop()
+        self._interactive += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._interactive -= 1
+            if self._interactive == 0:
+                self._idle.set()
+
+    def _take_token(self) -> float:
+        """
+        Take a budget token if one is available.
+
+        Returns:
+            0 if a token was taken, else seconds until the next one
+        """
+        now = self.clock()
+        rate = self.budget_per_minute / 60
+        self._tokens = min(
+            self.budget_per_minute, self._tokens + (now - self._refilled_at) * rate
+        )
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / rate if rate > 0 else 60.0
+
+    async def _worker(self) -> None:
+        while True:
+            if not self._jobs:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            await self._idle.wait()
+            wait = self._take_token()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            # Take the job only now, so jobs queued while waiting go first
+            key, job = self._jobs.pop()
+            self._keys.discard(key)
+            try:
+                # Provider calls of the job, and tasks it starts, run in the batch lane
+                with lane(BATCH):
+                    await job()
+                get_metrics().increment("prefetch.completed")
+            except Exception as e:
+                get_metrics().increment("prefetch.failed")
+                logger.warning(f"Prefetch of {key} failed: {e}")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._loop = None
+        self._jobs.clear()
+        self._keys.clear()
+
+
+@lru_cache()
+def get_event_prefetcher() -> EventPrefetcher:
+    settings = get_settings()
+    return EventPrefetcher(
+        max_queue=settings.prefetch_queue_size,
+        budget_per_minute=settings.prefetch_budget_per_minute,
+    )
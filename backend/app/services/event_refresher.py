@@ -0,0 +1,173 @@
+"""
+Background generation of cached events.
+Deduplicates generations per cache key and bounds background work
+with a small worker pool.
+"""
+
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ..config import get_settings
+from .scheduler import REFRESH, LaneRef, current_lane, lane, promote
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class EventRefresher:
+    """
+    Runs generations for cache keys, at most one per key at a time.
+
+    Blocking callers use run() and join any generation already in flight
+    for the same key. Background refreshes use schedule() and are queued
+    for a fixed number of workers; a key that is already queued or in
+    flight is not scheduled again.
+
+    Every caller and worker waiting on a generation is counted. A waiter
+    that is cancelled (e.g. its client disconnected) leaves the generation
+    running for the others, and the last one to leave cancels it.
+
+    A generation runs in the lane of the caller that started it, raised
+    to the lane of any higher-priority caller that joins it, so a user
+    joining a prefetch does not wait, or get preempted, at batch priority.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[Tuple[str, Job]]"] = None
+        self._tasks: List[asyncio.Task] = []
+        self._queued: Set[str] = set()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self._lanes: Dict[asyncio.Future, LaneRef] = {}
+
+    def _bind_to_running_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        # Workers and futures belong to one loop, start over on a new one
+        self._loop = loop
+        self._queue = asyncio.Queue(self.max_queue)
+        self._queued.clear()
+        self._inflight.clear()
+        self._waiters.clear()
+        self._lanes.clear()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def is_pending(self, key: str) -> bool:
+        return key in self._queued or key in self._inflight
+
+    def schedule(self, key: str, job: Job) -> bool:
+        """
+        Queue a background generation for a key.
+
+        Returns:
+            True if the job was queued, False if it was deduplicated or dropped
+        """
+        self._bind_to_running_loop()
+
+        if self.is_pending(key):
+            return False
+
+        try:
+            self._queue.put_nowait((key, job))
+        except asyncio.QueueFull:
+            logger.warning(f"Refresh queue full, dropping refresh of {key}")
+            return False
+
+        self._queued.add(key)
+        return True
+
+    async def run(self, key: str, job: Job) -> Any:
+        """
+        Run a generation now, or join the one already in flight for the key.
+        """
+        self._bind_to_running_loop()
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._start(key, job)
+        else:
+            promote(self._lanes[future], current_lane())
+
+        return await self._wait(key, future)
+
+    def waiters(self, key: str) -> int:
+        """
+        Count the callers and workers waiting on the key's generation.
+        """
+        future = self._inflight.get(key)
+        return self._waiters.get(future, 0) if future is not None else 0
+
+    async def _wait(self, key: str, future: asyncio.Future) -> Any:
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            # Shielded so one waiter going away does not cancel the shared generation
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self._waiters.get(future) == 1 and not future.done():
+                logger.info(f"Last waiter left, cancelling generation of {key}")
+                future.cancel()
+            raise
+        finally:
+            remaining = self._waiters.get(future, 1) - 1
+            if remaining > 0:
+                self._waiters[future] = remaining
+            else:
+                self._waiters.pop(future, None)
+
+    def _start(self, key: str, job: Job) -> asyncio.Future:
+        # A lane of its own, so promoting the generation leaves the
+        # caller's other work in its lane
+        with lane(current_lane()) as ref:
+            future = asyncio.ensure_future(job())
+        self._inflight[key] = future
+        self._lanes[future] = ref
+
+        def _done(finished: asyncio.Future) -> None:
+            if self._inflight.get(key) is finished:
+                del self._inflight[key]
+            self._lanes.pop(finished, None)
+            if not finished.cancelled() and finished.exception() is not None:
+                logger.debug(f"Generation of {key} failed: {finished.exception()}")
+
+        future.add_done_callback(_done)
+        return future
+
+    async def _worker(self) -> None:
+        while True:
+            key, job = await self._queue.get()
+            self._queued.discard(key)
+            try:
+                if key not in self._inflight:
+                    # Provider calls of the job run in the refresh lane
+                    with lane(REFRESH):
+                        future = self._start(key, job)
+                    await self._wait(key, future)
+                    logger.info(f"Refreshed cached events for {key}")
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+
+@lru_cache()
+def get_event_refresher() -> EventRefresher:
+    settings = get_settings()
+    return EventRefresher(
+        workers=settings.events_refresh_workers,
+        max_queue=settings.events_refresh_queue_size,
+    )
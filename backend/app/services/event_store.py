@@ -0,0 +1,195 @@
+"""
+On-disk, date-indexed store of generated events.
+Fed from cleaned provider responses so dates can later be answered
+without calling a provider.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+from ..config import get_settings
+from ..utils.event_dedup import normalize_event_text, parse_event
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    month_day TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (month_day, year, normalized)
+);
+CREATE INDEX IF NOT EXISTS events_by_date ON events (month_day, year);
+"""
+
+
+@dataclass
+class StoredEvent:
+    month_day: str
+    year: int  # Negative for BC/BCE years
+    text: str
+    provider: str
+    created_at: float
+
+    def format(self) -> str:
+        """
+        Render the event in "[Year]: [Event description]" format.
+        """
+        year = f"{-self.year} BC" if self.year < 0 else str(self.year)
+        return f"{year}: {self.text}"
+
+
+def parse_year(year: str) -> int:
+    """
+    Convert a year label such as "1969" or "44 BC" to an integer.
+
+    Args:
+        year: Year label from parse_event
+
+    Returns:
+        Year as an integer, negative for BC/BCE years
+    """
+    number, _, era = year.partition(" ")
+    return -int(number) if era in ("BC", "BCE") else int(number)
+
+
+class EventStore:
+    """
+    SQLite-backed event store.
+    The database is opened on first use, so startup cost does not
+    depend on the size of the store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            logger.info(f"Opened event store at {self.path}")
+        return self._conn
+
+    def add_events(
+        self, month_day: str, events: List[str], provider: str
+    ) -> List[StoredEvent]:
+        """
+        Store events for a date, skipping events without a year and
+        events already stored for the date.
+
+        Args:
+            month_day: Date in MM-DD format
+            events: Event strings in "[Year]: [Event description]" format
+            provider: Provider that generated the events
+
+        Returns:
+            The newly stored events
+        """
+        now = time.time()
+        parsed = []
+        for event in events:
+            year, text = parse_event(event)
+            if year is not None:
+                parsed.append(
+                    StoredEvent(month_day, parse_year(year), text, provider, now)
+                )
+
+        if not parsed:
+            return []
+
+        stored = []
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for event in parsed:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO events "
+                        "(month_day, year, text, normalized, provider, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            event.month_day,
+                            event.year,
+                            event.text,
+                            normalize_event_text(event.text),
+                            event.provider,
+                            event.created_at,
+                        ),
+                    )
+                    if cursor.rowcount:
+                        stored.append(event)
+        return stored
+
+    def get_events(self, month_day: str) -> List[StoredEvent]:
+        """
+        Get all stored events for a date, ordered by year.
+        """
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT month_day, year, text, provider, created_at FROM events "
+                    "WHERE month_day = ? ORDER BY year",
+                    (month_day,),
+                )
+                .fetchall()
+            )
+        return [StoredEvent(*row) for row in rows]
+
+    def count(self, month_day: str) -> int:
+        """
+        Count stored events for a date.
+        """
+        with self._lock:
+            (count,) = (
+                self._connection()
+                .execute(
+                    "SELECT COUNT(*) FROM events WHERE month_day = ?", (month_day,)
+                )
+                .fetchone()
+            )
+        return count
+
+    def all_events(self) -> List[StoredEvent]:
+        """
+        Get every stored event, ordered by date and year.
+        """
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT month_day, year, text, provider, created_at FROM events "
+                    "ORDER BY month_day, year"
+                )
+                .fetchall()
+            )
+        return [StoredEvent(*row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+@lru_cache()
+def get_event_store() -> EventStore:
+    return EventStore(get_settings().event_store_path)
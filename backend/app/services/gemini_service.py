@@ -1,18 +1,30 @@
 import re
 import json
 import logging
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
+import httpx
 from google import genai
 from google.genai import types
 from .ai_service import AIService
+from ..utils.timing import record_stage
 
 logger = logging.getLogger(__name__)
 
 
 class GeminiService(AIService):
-    def __init__(self, api_key: str):
-        # Create client with the new Google GenAI SDK
-        self.client = genai.Client(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        timeout: Optional[httpx.Timeout] = None,
+    ):
+        # Create client with the new Google GenAI SDK. The SDK passes its own
+        # per-request timeout (in milliseconds) to httpx, so set it here too
+        http_options = types.HttpOptions(
+            httpx_async_client=http_client,
+            timeout=int(timeout.read * 1000) if timeout and timeout.read else None,
+        )
+        self.client = genai.Client(api_key=api_key, http_options=http_options)
 
     def clean_gemini_response(self, response_text: str) -> str:
         """
@@ -51,43 +63,74 @@ class GeminiService(AIService):
             logger.error("Could not clean Gemini response, returning original")
             return response_text
 
+    async def warm_up(self, model: str = "gemini-2.0-flash-001") -> None:
+        """
+        Fetch model metadata to check the API key and open a connection.
+        """
+        await self.client.aio.models.get(model=model)
+
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = "gemini-2.0-flash-001",  # Updated model name for new SDK
         temperature: Optional[float] = 0.7,
         max_tokens: Optional[int] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
     ) -> str:
         """
         Get a chat completion from Gemini with response cleanup using the new GenAI SDK.
         """
         try:
             # Convert OpenAI format to new GenAI SDK format
-            contents = self._convert_messages_to_genai_format(messages)
+            with record_stage("convert"):
+                system_instruction, contents = self._convert_messages_to_genai_format(
+                    messages
+                )
 
             # Configure generation parameters
             config_params = {
                 "temperature": min(temperature, 1.0),  # Gemini max is 1.0
             }
 
+            # A stable system_instruction prefix lets Gemini reuse its implicit
+            # context cache instead of re-reading the prompt as user text
+            if system_instruction:
+                config_params["system_instruction"] = system_instruction
+
             if max_tokens:
                 config_params["max_output_tokens"] = max_tokens
 
+            if response_schema is not None:
+                config_params["response_mime_type"] = "application/json"
+                # additionalProperties is an OpenAI strict-mode requirement
+                # the Gemini schema subset does not take
+                config_params["response_schema"] = {
+                    k: v
+                    for k, v in response_schema.items()
+                    if k != "additionalProperties"
+                }
+
             config = types.GenerateContentConfig(**config_params)
 
             logger.info(f"Sending message to Gemini: {str(contents)[:100]}...")
 
             # Generate content using the new SDK
-            response = await self.client.aio.models.generate_content(
-                model=model, contents=contents, config=config
-            )
+            with record_stage("upstream"):
+                response = await self.client.aio.models.generate_content(
+                    model=model, contents=contents, config=config
+                )
 
             raw_response = response.text
 
             logger.info(f"Raw Gemini response: {raw_response[:200]}...")
 
+            # Structured output is valid JSON already
+            if response_schema is not None:
+                return raw_response
+
             # Clean the response
-            cleaned_response = self.clean_gemini_response(raw_response)
+            with record_stage("gemini_cleanup"):
+                cleaned_response = self.clean_gemini_response(raw_response)
 
             logger.info(f"Cleaned Gemini response: {cleaned_response[:200]}...")
 
@@ -99,22 +142,27 @@ class GeminiService(AIService):
 
     def _convert_messages_to_genai_format(
         self, messages: List[Dict[str, str]]
-    ) -> List[str]:
+    ) -> Tuple[Optional[str], List[types.Content]]:
         """
-        Convert messages to the new GenAI SDK format.
-        The new SDK expects a simpler format - just the content strings.
+        Convert normalized messages to the GenAI SDK format.
+        System messages are joined into a system instruction, all other
+        messages become role-tagged contents ('user' or 'model').
         """
+        system_parts = []
         contents = []
 
         for msg in messages:
-            # For the new SDK, we can just use the content directly
-            # The SDK handles the conversation flow automatically
-            contents.append(msg["content"])
-
-        # For multi-turn conversations, we join the messages
-        # The SDK will handle the conversation context automatically
-        return (
-            "\n".join(contents)
-            if len(contents) > 1
-            else contents[0] if contents else ""
-        )
+            role = msg["role"]
+            if role == "system":
+                system_parts.append(msg["content"])
+                continue
+
+            contents.append(
+                types.Content(
+                    role="model" if role in ["assistant", "model"] else "user",
+                    parts=[types.Part.from_text(text=msg["content"])],
+                )
+            )
+
+        system_instruction = "\n\n".join(system_parts) if system_parts else None
+        return system_instruction, contents
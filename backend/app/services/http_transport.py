@@ -0,0 +1,167 @@
+"""
+HTTP transport for provider SDK clients.
+Both SDKs talk to their APIs through httpx; this module builds their
+clients from settings (HTTP/2, pool limits, keep-alive, timeouts) and
+records connection pool usage for /api/metrics.
+"""
+
+import importlib.util
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import httpx
+
+from ..config import get_settings
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TransportSettings:
+    http2: bool
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float
+    connect_timeout: float
+    read_timeout: float
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+
+def get_transport_settings(provider: str) -> TransportSettings:
+    """
+    Read the transport settings of a provider.
+
+    Args:
+        provider: Provider name, e.g. "openai"
+
+    Returns:
+        Transport settings, falling back to HTTP/1.1 if h2 is not installed
+    """
+    settings = get_settings()
+    http2 = getattr(settings, f"{provider}_http2")
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning(f"h2 is not installed, {provider} client falls back to HTTP/1.1")
+        http2 = False
+
+    return TransportSettings(
+        http2=http2,
+        max_connections=getattr(settings, f"{provider}_max_connections"),
+        max_keepalive_connections=getattr(
+            settings, f"{provider}_max_keepalive_connections"
+        ),
+        keepalive_expiry=settings.upstream_keepalive_expiry_seconds,
+        connect_timeout=settings.upstream_connect_timeout_seconds,
+        read_timeout=settings.upstream_read_timeout_seconds,
+    )
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Connection-pooling transport that counts requests and new connections.
+    The connect timeout is applied here, since SDKs pass a single
+    per-request timeout that would otherwise override it.
+    """
+
+    def __init__(self, provider: str, settings: TransportSettings):
+        self.provider = provider
+        self.settings = settings
+        self._transport = httpx.AsyncHTTPTransport(
+            http2=settings.http2,
+            limits=httpx.Limits(
+                max_connections=settings.max_connections,
+                max_keepalive_connections=settings.max_keepalive_connections,
+                keepalive_expiry=settings.keepalive_expiry,
+            ),
+        )
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections_opened = 0
+        self.http_versions: Dict[str, int] = {}
+
+    async def _trace(self, event: str, info: Dict[str, Any], upstream=None) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        if upstream is not None:
+            await upstream(event, info)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timeout = dict(request.extensions.get("timeout", {}))
+        timeout["connect"] = self.settings.connect_timeout
+        request.extensions["timeout"] = timeout
+
+        upstream_trace = request.extensions.get("trace")
+        request.extensions["trace"] = lambda event, info: self._trace(
+            event, info, upstream_trace
+        )
+
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await self._transport.handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+
+        version = response.extensions.get("http_version", b"").decode() or "unknown"
+        self.http_versions[version] = self.http_versions.get(version, 0) + 1
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report pool usage: open connections split into busy and idle,
+        requests in flight and connections opened so far. Requests per
+        connection well above 1 means connections are being reused.
+        """
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        busy = len(connections) - idle
+        return {
+            "http2": self.settings.http2,
+            "max_connections": self.settings.max_connections,
+            "max_keepalive_connections": self.settings.max_keepalive_connections,
+            "open_connections": len(connections),
+            "busy_connections": busy,
+            "idle_connections": idle,
+            "utilization": round(busy / self.settings.max_connections, 3),
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "requests_per_connection": round(
+                self.requests / max(self.connections_opened, 1), 2
+            ),
+            "http_versions": dict(self.http_versions),
+        }
+
+
+def create_http_client(provider: str) -> httpx.AsyncClient:
+    """
+    Build the long-lived httpx client for a provider SDK and register its
+    pool stats as the "upstream.<provider>" metrics collector.
+
+    Args:
+        provider: Provider name, e.g. "openai"
+
+    Returns:
+        Async httpx client using an InstrumentedTransport
+    """
+    settings = get_transport_settings(provider)
+    transport = InstrumentedTransport(provider, settings)
+    get_metrics().register(f"upstream.{provider}", transport.stats)
+
+    logger.info(
+        f"{provider} client: http2={settings.http2}, "
+        f"max_connections={settings.max_connections}, "
+        f"keepalive={settings.max_keepalive_connections}/{settings.keepalive_expiry}s"
+    )
+    return httpx.AsyncClient(transport=transport, timeout=settings.timeout)
@@ -1,14 +1,35 @@
 import logging
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
+import httpx
 import openai
 from .ai_service import AIService
+from ..utils.timing import record_stage
 
 logger = logging.getLogger(__name__)
 
 
 class OpenAIService(AIService):
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        timeout: Optional[httpx.Timeout] = None,
+    ):
+        # base_url points the client at an OpenAI-compatible server, e.g. a fake LLM
+        # Async client, so waiting on OpenAI does not block the event loop
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url or None,
+            http_client=http_client,
+            timeout=timeout or openai.DEFAULT_TIMEOUT,
+        )
+
+    async def warm_up(self, model: str = "gpt-4o-mini") -> None:
+        """
+        Retrieve model metadata to check the API key and open a connection.
+        """
+        await self.client.models.retrieve(model)
 
     async def chat_completion(
         self,
@@ -16,6 +37,7 @@ class OpenAIService(AIService):
         model: Optional[str] = "gpt-4o-mini",
         temperature: Optional[float] = 0.7,
         max_tokens: Optional[int] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
     ) -> str:
         """
         Get a chat completion from OpenAI.
@@ -30,10 +52,21 @@ class OpenAIService(AIService):
             if max_tokens is not None:
                 request_params["max_tokens"] = max_tokens
 
+            if response_schema is not None:
+                request_params["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": "structured_response",
+                        "strict": True,
+                        "schema": response_schema,
+                    },
+                }
+
             logger.info(f"Sending request to OpenAI with model: {model}")
             logger.debug(f"Request params: {request_params}")
 
-            response = self.client.chat.completions.create(**request_params)
+            with record_stage("upstream"):
+                response = await self.client.chat.completions.create(**request_params)
 
             content = response.choices[0].message.content
 
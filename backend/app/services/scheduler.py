@@ -0,0 +1,333 @@
+"""
+Priority scheduling of provider calls.
+Interactive requests, background refreshes and batch work (prefetch)
+share each provider's concurrency; this module decides who goes next.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional
+
+from ..config import get_settings
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+REFRESH = "refresh"
+BATCH = "batch"
+# Highest priority first
+LANES = [INTERACTIVE, REFRESH, BATCH]
+
+
+class LaneRef:
+    """
+    The lane of a context. Shared by the tasks started from the context,
+    so promote() can raise the priority of work already under way.
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+_current_lane: ContextVar[LaneRef] = ContextVar(
+    "scheduler_lane", default=LaneRef(INTERACTIVE)
+)
+
+# Every scheduler, so promote() can find the calls queued in a lane
+_schedulers: "weakref.WeakSet[PriorityScheduler]" = weakref.WeakSet()
+
+
+@contextmanager
+def lane(name: str) -> Iterator[LaneRef]:
+    """
+    Run provider calls made in this context (and tasks started from it)
+    in a scheduler lane. Calls default to the interactive lane.
+    """
+    if name not in LANES:
+        raise ValueError(f"Unknown scheduler lane: {name}")
+    ref = LaneRef(name)
+    token = _current_lane.set(ref)
+    try:
+        yield ref
+    finally:
+        _current_lane.reset(token)
+
+
+def current_lane() -> str:
+    return _current_lane.get().name
+
+
+def promote(ref: LaneRef, name: str) -> None:
+    """
+    Raise the lane of a context to name if it is lower, moving its calls
+    that are still queued to the new lane; running calls are unaffected.
+    """
+    if LANES.index(name) >= LANES.index(ref.name):
+        return
+    ref.name = name
+    for scheduler in list(_schedulers):
+        scheduler._requeue(ref)
+
+
+class SchedulerFull(Exception):
+    """Raised when a call cannot be queued because the queue is full."""
+
+
+class JobPreempted(Exception):
+    """Raised for a queued call evicted to make room for a higher-priority one."""
+
+
+@dataclass
+class _Waiter:
+    lane: str
+    future: asyncio.Future
+    queued_at: float
+    ref: Optional[LaneRef] = None
+
+
+@dataclass
+class _LaneState:
+    weight: float
+    queue: Deque[_Waiter] = field(default_factory=deque)
+    # Stride scheduling: the lane with the lowest pass goes next and its
+    # pass advances by 1 / weight per dispatched call
+    pass_value: float = 0.0
+    running: int = 0
+    dispatched: int = 0
+    preempted: int = 0
+    rejected: int = 0
+    waits_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=512))
+
+
+class PriorityScheduler:
+    """
+    Admits at most `limit` concurrent calls and queues the rest per lane.
+
+    Free slots go to the queued lanes in proportion to their weights,
+    so background work still progresses under interactive load but gets
+    a small share. When the queue is full, a new call evicts the newest
+    queued call of the lowest lane below its own, which fails with
+    JobPreempted; running calls are never interrupted.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int,
+        weights: Dict[str, float],
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.clock = clock
+        self._lanes = {n: _LaneState(weight=weights[n]) for n in LANES}
+        self._running = 0
+        # Pass of the last dispatched lane; lanes start queueing from here
+        self._virtual_time = 0.0
+        _schedulers.add(self)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return sum(len(state.queue) for state in self._lanes.values())
+
+    def set_limit(self, limit: int) -> None:
+        """
+        Change the concurrency limit, admitting queued calls if it grew.
+        """
+        self.limit = max(1, limit)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane_name: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot for the duration of the block.
+
+        Args:
+            lane_name: Lane to queue in, defaults to the context's lane
+
+        Raises:
+            SchedulerFull: If the queue is full of equal or higher priority calls
+            JobPreempted: If the call was evicted while queued
+        """
+        lane_name = await self.acquire(lane_name)
+        try:
+            yield
+        finally:
+            self.release(lane_name)
+
+    async def acquire(self, lane_name: Optional[str] = None) -> str:
+        """
+        Wait for a concurrency slot.
+
+        Args:
+            lane_name: Lane to queue in, defaults to the context's lane,
+                which promote() can raise while the call is queued
+
+        Returns:
+            The lane the call was admitted in, to pass to release()
+
+        Raises:
+            SchedulerFull: If the queue is full of equal or higher priority calls
+            JobPreempted: If the call was evicted while queued
+        """
+        ref = None
+        if lane_name is None:
+            ref = _current_lane.get()
+            lane_name = ref.name
+        state = self._lanes[lane_name]
+        if self._running < self.limit and self.queued == 0:
+            self._admit(state, 0.0)
+            return lane_name
+
+        if self.queued >= self.max_queue and not self._preempt_below(lane_name):
+            state.rejected += 1
+            raise SchedulerFull(f"{self.name} scheduler queue is full")
+
+        if not state.queue:
+            # A lane returning from idle gets no credit for the idle time
+            state.pass_value = max(state.pass_value, self._virtual_time)
+
+        waiter = _Waiter(
+            lane_name, asyncio.get_running_loop().create_future(), self.clock(), ref
+        )
+        state.queue.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # The waiter may have been promoted to another lane's queue
+            queue = self._lanes[waiter.lane].queue
+            if waiter in queue:
+                queue.remove(waiter)
+            elif (
+                waiter.future.done()
+                and not waiter.future.cancelled()
+                and waiter.future.exception() is None
+            ):
+                # Admitted just as we were cancelled, give the slot back;
+                # a preempted waiter never held one
+                self.release(waiter.lane)
+            raise
+        return waiter.lane
+
+    def release(self, lane_name: str) -> None:
+        self._running -= 1
+        self._lanes[lane_name].running -= 1
+        self._dispatch()
+
+    def _admit(self, state: _LaneState, waited_ms: float) -> None:
+        self._running += 1
+        state.running += 1
+        state.dispatched += 1
+        state.waits_ms.append(waited_ms)
+
+    def _drop_cancelled(self, state: _LaneState) -> None:
+        # A cancelled waiter stays queued until its task resumes; never admit it
+        while state.queue and state.queue[0].future.done():
+            state.queue.popleft()
+
+    def _dispatch(self) -> None:
+        while self._running < self.limit:
+            for state in self._lanes.values():
+                self._drop_cancelled(state)
+            candidates = [s for s in self._lanes.values() if s.queue]
+            if not candidates:
+                return
+
+            # Ties go to the higher-priority lane (LANES order)
+            state = min(candidates, key=lambda s: s.pass_value)
+            self._virtual_time = state.pass_value
+            state.pass_value += 1 / state.weight
+            waiter = state.queue.popleft()
+            self._admit(state, (self.clock() - waiter.queued_at) * 1000)
+            waiter.future.set_result(None)
+
+    def _requeue(self, ref: LaneRef) -> None:
+        target = self._lanes[ref.name]
+        for name, state in self._lanes.items():
+            if name == ref.name:
+                continue
+            for waiter in [w for w in state.queue if w.ref is ref]:
+                state.queue.remove(waiter)
+                if waiter.future.done():
+                    continue  # Cancelled while queued
+                if not target.queue:
+                    target.pass_value = max(target.pass_value, self._virtual_time)
+                waiter.lane = ref.name
+                target.queue.append(waiter)
+                logger.info(f"Promoted a queued {name} call to {self.name}")
+        self._dispatch()
+
+    def _preempt_below(self, lane_name: str) -> bool:
+        for lower in reversed(LANES[LANES.index(lane_name) + 1 :]):
+            state = self._lanes[lower]
+            while state.queue:
+                waiter = state.queue.pop()
+                if waiter.future.done():
+                    continue  # Cancelled while queued
+                state.preempted += 1
+                waiter.future.set_exception(
+                    JobPreempted(f"Preempted by a {lane_name} call to {self.name}")
+                )
+                logger.info(f"Preempted a queued {lower} call to {self.name}")
+                return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report running and queued calls, and queue wait per lane.
+        """
+        lanes = {}
+        for name, state in self._lanes.items():
+            waits = sorted(state.waits_ms)
+            lanes[name] = {
+                "weight": state.weight,
+                "queued": len(state.queue),
+                "running": state.running,
+                "dispatched": state.dispatched,
+                "preempted": state.preempted,
+                "rejected": state.rejected,
+                "wait_ms_avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "wait_ms_p95": (
+                    round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0
+                ),
+                "wait_ms_max": round(waits[-1], 3) if waits else 0.0,
+            }
+        return {
+            "limit": self.limit,
+            "running": self._running,
+            "queued": self.queued,
+            "lanes": lanes,
+        }
+
+
+@lru_cache()
+def get_scheduler(provider: str) -> PriorityScheduler:
+    settings = get_settings()
+    scheduler = PriorityScheduler(
+        provider,
+        limit=settings.scheduler_max_concurrency,
+        max_queue=settings.scheduler_max_queue,
+        weights={
+            INTERACTIVE: settings.scheduler_weight_interactive,
+            REFRESH: settings.scheduler_weight_refresh,
+            BATCH: settings.scheduler_weight_batch,
+        },
+    )
+    get_metrics().register(f"scheduler.{provider}", scheduler.stats)
+    return scheduler
@@ -0,0 +1,419 @@
+"""
+Semantic cache of free-form chat completions.
+Near-identical prompts ("events on july 4", "What happened July 4th?")
+are answered with an earlier completion. Prompts are normalized, turned
+into hashed n-gram vectors in process and compared by cosine similarity,
+so no embedding service is involved.
+"""
+
+import itertools
+import math
+import re
+import time
+import zlib
+import logging
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from ..utils.cache_policy import make_policy
+from ..utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [
+            ("january", "jan"),
+            ("february", "feb"),
+            ("march", "mar"),
+            ("april", "apr"),
+            ("may",),
+            ("june", "jun"),
+            ("july", "jul"),
+            ("august", "aug"),
+            ("september", "sep", "sept"),
+            ("october", "oct"),
+            ("november", "nov"),
+            ("december", "dec"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_MONTH_DAY = re.compile(rf"\b({_MONTH})\.?\s+(\d{{1,2}})(?:st|nd|rd|th)?\b")
+_DAY_MONTH = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTH})\b")
+_NUMERIC_DATE = re.compile(r"\b(\d{1,2})[/-](\d{1,2})\b")
+_ORDINAL = re.compile(r"\b(\d+)(?:st|nd|rd|th)\b")
+_NON_WORD = re.compile(r"[^\w\s-]|(?<!\d)-|-(?!\d)")
+_NEGATED = re.compile(r"n['’]t\b")
+
+# Words that turn a question into its opposite ("events not in Europe"),
+# which must match exactly for two prompts to match
+NEGATION_WORDS = frozenset("""
+    except excluding never no non none nor not outside without
+    """.split())
+
+# Words that do not change what is asked. Beyond English function words
+# this includes the phrasing of history questions, which is all this
+# service is asked about. Words that are also names or numerals once
+# lowercased ("us" for the US, "it", "can", "i" in "World War I") are
+# kept: dropping them makes questions about different things match
+STOP_WORDS = frozenset("""
+    a about an and any are as at be by could did do does for from give
+    happen happened happening happens history historic historical in is
+    its list me of on please show some tell that the there this to was
+    were what which with would you event events occur occurred
+    """.split()) - NEGATION_WORDS
+
+
+def _date_token(month: int, day: int) -> str:
+    return f"{month:02d}-{day:02d}"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt for comparison.
+    Lowercases, writes dates as MM-DD ("July 4th" and "4 jul" become
+    "07-04"), writes "n't" as "not", drops ordinal suffixes, punctuation
+    and stop words.
+
+    Args:
+        prompt: Prompt text
+
+    Returns:
+        Space-separated normalized tokens
+    """
+    text = prompt.casefold()
+    text = _MONTH_DAY.sub(
+        lambda m: _date_token(MONTHS[m.group(1)], int(m.group(2))), text
+    )
+    text = _DAY_MONTH.sub(
+        lambda m: _date_token(MONTHS[m.group(2)], int(m.group(1))), text
+    )
+    text = _NUMERIC_DATE.sub(
+        lambda m: _date_token(int(m.group(1)), int(m.group(2))), text
+    )
+    text = _ORDINAL.sub(r"\1", text)
+    text = _NEGATED.sub(" not", text)
+    text = _NON_WORD.sub(" ", text)
+    return " ".join(word for word in text.split() if word not in STOP_WORDS)
+
+
+def number_tokens(normalized: str) -> Tuple[str, ...]:
+    """
+    Get the tokens of a normalized prompt that contain digits (dates,
+    years, counts), which must match exactly for two prompts to match.
+    """
+    return tuple(
+        sorted({word for word in normalized.split() if any(c.isdigit() for c in word)})
+    )
+
+
+def negation_tokens(normalized: str) -> Tuple[str, ...]:
+    """
+    Get the negation and exclusion words of a normalized prompt, which
+    must match exactly for two prompts to match.
+    """
+    return tuple(sorted(set(normalized.split()) & NEGATION_WORDS))
+
+
+class HashingVectorizer:
+    """
+    Maps text to a fixed-size vector of hashed features: whole words and
+    the character n-grams of each word, so inflections and typos still
+    overlap. Counts are log-scaled and the vector is L2-normalized, so a
+    dot product is the cosine similarity. Each feature's sign comes from
+    its hash, which keeps bucket collisions from adding up.
+    """
+
+    def __init__(self, dimensions: int, ngram: int = 3):
+        if dimensions & (dimensions - 1):
+            raise ValueError(f"dimensions must be a power of two, got {dimensions}")
+        self.dimensions = dimensions
+        self.ngram = ngram
+
+    def features(self, text: str) -> Counter:
+        features: Counter = Counter()
+        for word in text.split():
+            features[word] += 1
+            padded = f" {word} "
+            for i in range(len(padded) - self.ngram + 1):
+                features["#" + padded[i : i + self.ngram]] += 1
+        return features
+
+    def transform(self, text: str) -> np.ndarray:
+        """
+        Vectorize normalized text.
+
+        Returns:
+            Unit float32 vector, or all zeros if the text has no features
+        """
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        mask = self.dimensions - 1
+        for feature, count in self.features(text).items():
+            h = zlib.crc32(feature.encode())
+            weight = 1.0 + math.log(count)
+            vector[h & mask] += weight if h & 0x80000000 else -weight
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+@dataclass
+class SemanticEntry:
+    id: int
+    prompt: str  # Normalized
+    response: str
+    stored_at: float
+    partition: Hashable
+    row: int = -1  # Row of the vector in its partition's matrix
+
+    @property
+    def key(self) -> Hashable:
+        """
+        Key of the entry in the eviction policy, the same as the key its
+        prompt is counted under before it is cached.
+        """
+        return self.partition, self.prompt
+
+
+@dataclass
+class SemanticMatch:
+    entry: SemanticEntry
+    similarity: float
+
+
+class _Partition:
+    """
+    The entries of one scope, set of numbers and set of negations, with
+    their vectors in
+    the first rows of a contiguous matrix so a lookup is one matrix-vector
+    product. Removal moves the last row into the gap.
+    """
+
+    def __init__(self, dimensions: int):
+        self.vectors = np.empty((1, dimensions), dtype=np.float32)
+        self.entries: List[SemanticEntry] = []
+        self.recent: "OrderedDict[int, SemanticEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, entry: SemanticEntry, vector: np.ndarray) -> None:
+        row = len(self.entries)
+        if row == len(self.vectors):
+            # Grow by half, trading a few copies for less unused memory
+            grown = np.empty((row + row // 2 + 1, self.vectors.shape[1]), np.float32)
+            grown[:row] = self.vectors
+            self.vectors = grown
+        self.vectors[row] = vector
+        entry.row = row
+        self.entries.append(entry)
+        self.recent[entry.id] = entry
+
+    def touch(self, entry: SemanticEntry) -> None:
+        self.recent.move_to_end(entry.id)
+
+    def oldest(self) -> SemanticEntry:
+        return next(iter(self.recent.values()))
+
+    def remove(self, entry: SemanticEntry) -> None:
+        del self.recent[entry.id]
+        last = self.entries.pop()
+        if last is not entry:
+            self.vectors[entry.row] = self.vectors[last.row]
+            self.entries[entry.row] = last
+            last.row = entry.row
+
+    def nearest(self, vector: np.ndarray) -> Tuple[SemanticEntry, float]:
+        similarities = self.vectors[: len(self.entries)] @ vector
+        row = int(np.argmax(similarities))
+        return self.entries[row], float(similarities[row])
+
+
+class SemanticCache:
+    """
+    Cache of completions looked up by prompt similarity.
+
+    Entries are partitioned by scope (provider, model, parameters and the
+    conversation before the prompt) and by the numbers and negation words
+    in the prompt, so "July 4" never matches "July 5", nor "not in Europe"
+    "in Europe", however similar the wording. A lookup
+    compares the prompt with the entries of its partition only, and hits
+    at or above the similarity threshold. Partitions are capped at
+    max_partition_entries, which bounds the cost of a lookup however
+    many entries the cache holds. Beyond that, the eviction policy decides
+    which entries stay: with W-TinyLFU, a stream of one-off prompts does
+    not evict completions that keep being hit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        threshold: float,
+        ttl_seconds: float,
+        dimensions: int = 512,
+        max_partition_entries: int = 2048,
+        clock: Callable[[], float] = time.monotonic,
+        policy: str = "tinylfu",
+    ):
+        self.max_entries = max_entries
+        self.max_partition_entries = max_partition_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.vectorizer = HashingVectorizer(dimensions)
+        self._partitions: Dict[Hashable, _Partition] = {}
+        self.policy = make_policy(policy, max_entries, self._is_expired)
+        self._entries: Dict[Hashable, SemanticEntry] = {}
+        self._ids = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _prepare(
+        self, prompt: str, scope: Hashable
+    ) -> Optional[Tuple[str, Hashable, np.ndarray]]:
+        normalized = normalize_prompt(prompt)
+        if not normalized:
+            return None
+        partition = (scope, number_tokens(normalized), negation_tokens(normalized))
+        return normalized, partition, self.vectorizer.transform(normalized)
+
+    def _nearest(
+        self, partition: Hashable, vector: np.ndarray
+    ) -> Optional[SemanticMatch]:
+        entries = self._partitions.get(partition)
+        if not entries:
+            return None
+        entry, similarity = entries.nearest(vector)
+        if similarity < self.threshold:
+            return None
+        return SemanticMatch(entry, similarity)
+
+    def _is_expired(self, key: Hashable) -> bool:
+        return self.clock() - self._entries[key].stored_at > self.ttl_seconds
+
+    def _touch(self, entry: SemanticEntry) -> None:
+        self.policy.touch(entry.key)
+        self._partitions[entry.partition].touch(entry)
+
+    def _remove(self, entry: SemanticEntry) -> None:
+        del self._entries[entry.key]
+        self.policy.remove(entry.key)
+        partition = self._partitions[entry.partition]
+        partition.remove(entry)
+        if not partition:
+            del self._partitions[entry.partition]
+
+    def lookup(self, prompt: str, scope: Hashable) -> Optional[SemanticMatch]:
+        """
+        Find the cached completion of the most similar prompt in a scope.
+
+        Args:
+            prompt: Prompt text
+            scope: Hashable description of everything else the completion
+                depends on
+
+        Returns:
+            The match, or None if no fresh entry is similar enough
+        """
+        prepared = self._prepare(prompt, scope)
+        if prepared is None:
+            return None
+        normalized, partition, vector = prepared
+
+        match = self._nearest(partition, vector)
+        if match is not None and self._is_expired(match.entry.key):
+            self._remove(match.entry)
+            match = None
+
+        if match is None:
+            # Counted under the key its entry will have, so a prompt that
+            # keeps missing wins admission once stored
+            self.policy.record((partition, normalized))
+            get_metrics().increment("semantic_cache.misses")
+            return None
+        self.policy.record(match.entry.key)
+        self._touch(match.entry)
+        get_metrics().increment("semantic_cache.hits")
+        return match
+
+    def store(self, prompt: str, scope: Hashable, response: str) -> None:
+        """
+        Cache a completion. It replaces the completion of a prompt similar
+        enough to be a hit. If the prompt's partition is full its least
+        recently used entry is evicted, and if the cache is full the entry
+        the policy picks. Prompts with nothing left after normalization are
+        not cached.
+        """
+        prepared = self._prepare(prompt, scope)
+        if prepared is None:
+            return
+        normalized, partition, vector = prepared
+
+        existing = self._entries.get((partition, normalized))
+        if existing is None:
+            match = self._nearest(partition, vector)
+            existing = match and match.entry
+        if existing is not None:
+            existing.response = response
+            existing.stored_at = self.clock()
+            self._touch(existing)
+            return
+
+        entry = SemanticEntry(
+            id=next(self._ids),
+            prompt=normalized,
+            response=response,
+            stored_at=self.clock(),
+            partition=partition,
+        )
+        entries = self._partitions.get(partition)
+        if entries is not None and len(entries) >= self.max_partition_entries:
+            self._remove(entries.oldest())
+        if partition not in self._partitions:
+            self._partitions[partition] = _Partition(self.vectorizer.dimensions)
+        self._partitions[partition].add(entry, vector)
+        self._entries[entry.key] = entry
+
+        for evicted_key in self.policy.insert(entry.key):
+            evicted = self._entries[evicted_key]
+            self._remove(evicted)
+            logger.debug(f"Evicted semantic cache entry {evicted.prompt!r}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "partitions": len(self._partitions),
+            "largest_partition": max(map(len, self._partitions.values()), default=0),
+        }
+
+    def clear(self) -> None:
+        self._partitions.clear()
+        self._entries.clear()
+        self.policy.clear()
+
+
+@lru_cache()
+def get_semantic_cache() -> SemanticCache:
+    settings = get_settings()
+    cache = SemanticCache(
+        max_entries=settings.semantic_cache_max_entries,
+        threshold=settings.semantic_cache_threshold,
+        ttl_seconds=settings.semantic_cache_ttl_seconds,
+        dimensions=settings.semantic_cache_dimensions,
+        max_partition_entries=settings.semantic_cache_max_partition_entries,
+        policy=settings.semantic_cache_policy,
+    )
+    get_metrics().register("semantic_cache", cache.stats)
+    return cache
@@ -0,0 +1,97 @@
+"""
+Startup warm-up of provider clients and the readiness state derived from it.
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from . import get_ai_service, get_configured_providers, get_provider_api_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProviderWarmup:
+    status: str = "pending"  # pending, warm or failed
+    error: Optional[str] = None
+    duration_ms: Optional[float] = None
+
+
+class StartupState:
+    """
+    Outcome of the last warm-up. The instance is ready once warm-up has
+    finished and at least one configured provider answered.
+    """
+
+    def __init__(self):
+        self.providers: Dict[str, ProviderWarmup] = {}
+        self.finished = False
+        self.last_attempt: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.finished and any(
+            p.status == "warm" for p in self.providers.values()
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "finished": self.finished,
+            "providers": {name: asdict(p) for name, p in self.providers.items()},
+        }
+
+
+async def _warm_up_provider(provider: str, timeout: float) -> ProviderWarmup:
+    start = time.perf_counter()
+    try:
+        service = get_ai_service(provider, get_provider_api_key(provider))
+        await asyncio.wait_for(service.warm_up(), timeout)
+        status = ProviderWarmup(status="warm")
+    except Exception as e:
+        logger.warning(f"Warm-up of {provider} failed: {e}")
+        status = ProviderWarmup(status="failed", error=str(e) or type(e).__name__)
+
+    status.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+    return status
+
+
+async def warm_up_providers(state: StartupState, timeout: float) -> StartupState:
+    """
+    Create the client of every configured provider and make one cheap
+    authenticated call with each, concurrently. Providers that are
+    already warm are skipped.
+
+    Args:
+        state: Startup state to update
+        timeout: Seconds to wait for each provider
+
+    Returns:
+        The updated startup state
+    """
+    async with state._lock:
+        state.last_attempt = time.monotonic()
+        providers = [
+            p
+            for p in get_configured_providers()
+            if state.providers.get(p, ProviderWarmup()).status != "warm"
+        ]
+
+        results = await asyncio.gather(
+            *(_warm_up_provider(p, timeout) for p in providers)
+        )
+        state.providers.update(zip(providers, results))
+        state.finished = True
+
+        logger.info(f"Provider warm-up finished: {state.as_dict()}")
+        return state
+
+
+@lru_cache()
+def get_startup_state() -> StartupState:
+    return StartupState()
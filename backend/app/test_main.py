@@ -1,3 +1,4 @@
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from .main import app
 
@@ -8,3 +9,9 @@ def test_read_root():
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "AI Chat API"}
+
+
+def test_lifespan_warms_up_providers():
+    with patch("app.main.warm_up_providers") as mock_warm_up:
+        with TestClient(app):
+            mock_warm_up.assert_awaited_once()
@@ -0,0 +1,44 @@
+import pytest
+
+from app.config import get_settings
+from app.services import _create_service
+from app.services.event_cache import get_event_cache
+from app.services.event_prefetcher import get_event_prefetcher
+from app.services.event_refresher import get_event_refresher
+from app.services.event_index import get_event_index
+from app.services.event_store import get_event_store
+from app.services.batch_jobs import get_job_runner
+from app.services.concurrency_limit import get_concurrency_limiter
+from app.services.scheduler import get_scheduler
+from app.services.semantic_cache import get_semantic_cache
+from app.services.warmup import get_startup_state
+from app.utils.metrics import get_metrics
+
+SHARED_STATE = [
+    get_settings,
+    get_event_cache,
+    get_event_refresher,
+    get_event_prefetcher,
+    get_event_store,
+    get_event_index,
+    get_startup_state,
+    get_scheduler,
+    get_concurrency_limiter,
+    get_job_runner,
+    get_semantic_cache,
+    _create_service,
+    get_metrics,
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_state(tmp_path, monkeypatch):
+    """Give every test fresh process-wide caches and a temporary event store."""
+    monkeypatch.setenv("EVENT_STORE_PATH", str(tmp_path / "events.db"))
+    for getter in SHARED_STATE:
+        getter.cache_clear()
+    yield
+    get_event_store().close()
+    get_job_runner().store.close()
+    for getter in SHARED_STATE:
+        getter.cache_clear()
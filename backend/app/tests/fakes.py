@@ -0,0 +1,19 @@
+"""
+Test doubles shared across the test suite.
+"""
+
+from app.services.ai_service import AIService
+
+
+class FakeService(AIService):
+    """AI service that records calls and returns a canned response."""
+
+    def __init__(self, response='["1969: Apollo 11 lands on the Moon."]'):
+        self.response = response
+        self.calls = []
+        self.call_kwargs = []
+
+    async def chat_completion(self, messages, model=None, temperature=0.7, **kwargs):
+        self.calls.append(messages)
+        self.call_kwargs.append(kwargs)
+        return self.response
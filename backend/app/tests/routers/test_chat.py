@@ -0,0 +1,195 @@
+"""
+Tests for app/routers/chat.py
+Tests the chat endpoint with a fake AI service.
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import get_service
+from app.services.warmup import ProviderWarmup, get_startup_state
+from app.config import Settings
+from app.tests.fakes import FakeService
+
+
+@pytest.fixture
+def fake_service():
+    service = FakeService()
+    app.dependency_overrides[get_service] = lambda: service
+    yield service
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def chat_payload():
+    return {"messages": [{"role": "user", "content": "What happened on July 20?"}]}
+
+
+def test_chat_returns_cleaned_response(client, fake_service):
+    response = client.post("/api/chat", json=chat_payload())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["provider"] == "fake"
+    assert json.loads(body["response"]) == ["1969: Apollo 11 lands on the Moon."]
+    assert body["timings"] is None
+    assert len(fake_service.calls) == 1
+
+
+def test_chat_sets_server_timing_header(client, fake_service):
+    response = client.post("/api/chat", json=chat_payload())
+
+    server_timing = response.headers["Server-Timing"]
+    stages = [part.split(";")[0] for part in server_timing.split(", ")]
+    for stage in ["normalize", "cleanup", "serialize", "total"]:
+        assert stage in stages
+
+
+def test_chat_includes_timings_when_enabled(client, fake_service):
+    settings = Settings(response_timings_enabled=True)
+    with patch("app.routers.chat.get_settings", return_value=settings):
+        response = client.post("/api/chat", json=chat_payload())
+
+    timings = response.json()["timings"]
+    assert set(timings) >= {"normalize", "cleanup"}
+    assert all(value >= 0 for value in timings.values())
+
+
+def test_ready_returns_503_until_warm(client):
+    with patch("app.routers.chat.warm_up_providers", AsyncMock()) as mock_warm_up:
+        response = client.get("/api/ready")
+
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+    mock_warm_up.assert_awaited_once()
+
+
+def test_ready_returns_200_when_warm(client):
+    state = get_startup_state()
+    state.finished = True
+    state.providers["openai"] = ProviderWarmup(status="warm")
+
+    response = client.get("/api/ready")
+
+    assert response.status_code == 200
+    assert response.json()["providers"]["openai"]["status"] == "warm"
+
+
+def test_metrics_endpoint(client):
+    from app.utils.metrics import get_metrics
+
+    get_metrics().increment("chat.requests")
+    get_metrics().register("upstream.openai", lambda: {"open_connections": 3})
+
+    response = client.get("/api/metrics")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "counters": {"chat.requests": 1},
+        "upstream.openai": {"open_connections": 3},
+    }
+
+
+def test_chat_compresses_large_responses(client, fake_service):
+    fake_service.response = json.dumps([f"{1900 + i}: Event {i}" for i in range(200)])
+
+    response = client.post(
+        "/api/chat",
+        json={"messages": [{"role": "user", "content": "Hello"}]},
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert int(response.headers["Content-Length"]) < len(response.content)
+    assert json.loads(response.json()["response"])[0] == "1900: Event 0"
+
+
+def test_compression_keeps_cors_vary_header(client, fake_service):
+    fake_service.response = json.dumps([f"{1900 + i}: Event {i}" for i in range(200)])
+
+    response = client.post(
+        "/api/chat",
+        json={"messages": [{"role": "user", "content": "Hello"}]},
+        headers={"Accept-Encoding": "gzip", "Origin": "http://localhost:5173"},
+    )
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:5173"
+    vary = {value.strip() for value in response.headers["Vary"].split(",")}
+    assert vary == {"Origin", "Accept-Encoding"}
+
+
+def test_chat_leaves_small_responses_uncompressed(client, fake_service):
+    response = client.post(
+        "/api/chat",
+        json={"messages": [{"role": "user", "content": "Hello"}]},
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_chat_returns_503_when_scheduler_is_full(client, fake_service):
+    from app.services.scheduler import SchedulerFull
+
+    with patch(
+        "app.services.scheduler.PriorityScheduler.acquire",
+        AsyncMock(side_effect=SchedulerFull("fake scheduler queue is full")),
+    ):
+        response = client.post("/api/chat", json=chat_payload())
+
+    assert response.status_code == 503
+    assert fake_service.calls == []
+
+
+def test_chat_reports_scheduler_metrics(client, fake_service):
+    client.post("/api/chat", json=chat_payload())
+
+    scheduler = client.get("/api/metrics").json()["scheduler.fake"]
+    assert scheduler["running"] == 0
+    assert scheduler["lanes"]["interactive"]["dispatched"] == 1
+
+
+def test_chat_feeds_the_adaptive_limit(client, fake_service):
+    client.post("/api/chat", json=chat_payload())
+
+    limiter = client.get("/api/metrics").json()["limiter.fake"]
+    assert limiter["algorithm"] == "gradient"
+    assert limiter["samples"] == 1
+
+
+def test_chat_answers_rephrased_prompt_from_semantic_cache(client, fake_service):
+    first = client.post(
+        "/api/chat",
+        json={"messages": [{"role": "user", "content": "events on july 4"}]},
+    )
+    second = client.post(
+        "/api/chat",
+        json={"messages": [{"role": "user", "content": "What happened July 4th?"}]},
+    )
+    other_date = client.post(
+        "/api/chat",
+        json={"messages": [{"role": "user", "content": "What happened July 5th?"}]},
+    )
+
+    assert second.json()["response"] == first.json()["response"]
+    assert other_date.status_code == 200
+    assert len(fake_service.calls) == 2
+    assert "semantic_cache" in second.headers["Server-Timing"]
+
+
+def test_chat_skips_semantic_cache_when_disabled(client, fake_service):
+    settings = Settings(semantic_cache_enabled=False)
+    with patch("app.routers.chat.get_settings", return_value=settings):
+        client.post("/api/chat", json=chat_payload())
+        client.post("/api/chat", json=chat_payload())
+
+    assert len(fake_service.calls) == 2
@@ -0,0 +1,418 @@
+"""
+Tests for app/routers/events.py
+Tests the templated date events endpoint with a fake AI service.
+"""
+
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.services.event_cache import EventCache
+from app.services.event_store import get_event_store
+from app.tests.fakes import FakeService
+from app.utils import compression
+
+
+@pytest.fixture
+def fake_service():
+    service = FakeService()
+    with patch(
+        "app.routers.events.get_service", AsyncMock(return_value=service)
+    ) as mock_get_service:
+        service.get_service = mock_get_service
+        yield service
+
+
+@pytest.fixture(autouse=True)
+def cache():
+    cache = EventCache(
+        max_entries=100, ttl_seconds=3600, stale_seconds=3600, variants_per_key=1
+    )
+    with patch("app.routers.events.get_event_cache", return_value=cache):
+        yield cache
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_get_events_builds_messages_from_template(client, fake_service):
+    response = client.get("/api/events/07-20", params={"provider": "openai"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["date"] == "07-20"
+    assert body["template"] == "historian"
+    assert json.loads(body["response"]) == ["1969: Apollo 11 lands on the Moon."]
+
+    sent = fake_service.calls[0]
+    assert sent[-1]["content"] == "List top historic events that occurred on 07-20"
+
+    chat_request = fake_service.get_service.call_args.args[0]
+    assert chat_request.provider == "openai"
+
+
+def test_get_events_invalid_date(client, fake_service):
+    response = client.get("/api/events/02-30")
+    assert response.status_code == 400
+    assert fake_service.calls == []
+
+
+def test_get_events_unknown_template(client, fake_service):
+    response = client.get("/api/events/07-20", params={"template": "poet"})
+    assert response.status_code == 404
+
+
+def test_get_events_provider_error(client, fake_service):
+    fake_service.chat_completion = AsyncMock(side_effect=Exception("boom"))
+    response = client.get("/api/events/07-20")
+    assert response.status_code == 500
+    assert "boom" in response.json()["detail"]
+
+
+def test_get_events_sets_caching_headers(client, fake_service):
+    response = client.get("/api/events/07-20")
+
+    assert response.headers["ETag"].startswith('"')
+    cache_control = response.headers["Cache-Control"]
+    assert "max-age=" in cache_control
+    assert "stale-while-revalidate=" in cache_control
+
+
+def test_get_events_served_from_cache(client, fake_service):
+    first = client.get("/api/events/07-20")
+    second = client.get("/api/events/07-20")
+
+    assert second.status_code == 200
+    assert second.json()["response"] == first.json()["response"]
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(fake_service.calls) == 1
+
+
+def test_get_events_conditional_request_returns_304(client, fake_service):
+    etag = client.get("/api/events/07-20").headers["ETag"]
+
+    response = client.get("/api/events/07-20", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(fake_service.calls) == 1
+
+
+def test_get_events_stale_etag_returns_200(client, fake_service):
+    response = client.get("/api/events/07-20", headers={"If-None-Match": '"old"'})
+    assert response.status_code == 200
+
+
+def wait_for_calls(service, count):
+    for _ in range(100):
+        if len(service.calls) >= count:
+            break
+        time.sleep(0.01)
+    assert len(service.calls) == count
+
+
+def test_get_events_serves_stale_entry_and_refreshes(fake_service, cache):
+    with TestClient(app) as client:
+        first = client.get("/api/events/07-20")
+
+        # Age the entry past its TTL but within the stale window
+        entry = cache.get("historian:fake:07-20")
+        entry.stored_at -= cache.ttl_seconds + 1
+        fake_service.response = '["1215: Magna Carta is sealed."]'
+
+        stale = client.get("/api/events/07-20")
+        assert stale.json()["response"] == first.json()["response"]
+
+        wait_for_calls(fake_service, 2)
+
+        refreshed = client.get("/api/events/07-20")
+        assert json.loads(refreshed.json()["response"]) == [
+            "1215: Magna Carta is sealed."
+        ]
+        assert refreshed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_get_events_tops_up_variant_pool(fake_service, cache):
+    cache.variants_per_key = 2
+    with TestClient(app) as client:
+        client.get("/api/events/07-20")
+        fake_service.response = '["1215: Magna Carta is sealed."]'
+
+        # Served from the pool of one, which schedules a second variant
+        client.get("/api/events/07-20")
+        wait_for_calls(fake_service, 2)
+
+        assert len(cache.get_variants("historian:fake:07-20")) == 2
+        seen = {client.get("/api/events/07-20").json()["response"] for _ in range(30)}
+        assert len(seen) == 2
+        assert len(fake_service.calls) == 2
+
+
+def test_get_events_merge_combines_variants(fake_service, cache):
+    cache.variants_per_key = 2
+    cache.set(
+        "historian:fake:07-20", '["1969: Moon landing", "1215: Magna Carta"]', "fake"
+    )
+    cache.set(
+        "historian:fake:07-20",
+        '["1969: moon landing!", "1976: Viking 1 lands"]',
+        "fake",
+    )
+
+    client = TestClient(app)
+    response = client.get("/api/events/07-20", params={"merge": "true"})
+
+    assert json.loads(response.json()["response"]) == [
+        "1969: Moon landing",
+        "1215: Magna Carta",
+        "1976: Viking 1 lands",
+    ]
+    assert fake_service.calls == []
+
+    etag = response.headers["ETag"]
+    conditional = client.get(
+        "/api/events/07-20", params={"merge": "true"}, headers={"If-None-Match": etag}
+    )
+    assert conditional.status_code == 304
+
+
+def test_get_events_feeds_event_store(client, fake_service):
+    client.get("/api/events/07-20")
+
+    events = get_event_store().get_events("07-20")
+    assert [e.format() for e in events] == ["1969: Apollo 11 lands on the Moon."]
+    assert events[0].provider == "fake"
+
+
+def test_get_events_from_index_when_enough_events(client, fake_service):
+    settings = get_settings()
+    get_event_store().add_events(
+        "07-20",
+        [f"{1900 + i}: Event {i}" for i in range(settings.event_store_min_events)],
+        "openai",
+    )
+
+    response = client.get("/api/events/07-20", params={"source": "index"})
+
+    body = response.json()
+    assert body["provider"] == "index"
+    events = json.loads(body["response"])
+    assert len(events) == min(
+        settings.event_store_sample_size, settings.event_store_min_events
+    )
+    assert events == sorted(events)
+    assert fake_service.calls == []
+
+
+def test_get_events_from_index_revalidates_until_the_store_changes(
+    client, fake_service
+):
+    store = get_event_store()
+    store.add_events("07-20", [f"{1900 + i}: Event {i}" for i in range(30)], "openai")
+
+    first = client.get("/api/events/07-20", params={"source": "index"})
+    etag = first.headers["ETag"]
+    again = client.get("/api/events/07-20", params={"source": "index"})
+    assert again.headers["ETag"] == etag
+    assert again.json()["response"] == first.json()["response"]
+
+    conditional = client.get(
+        "/api/events/07-20", params={"source": "index"}, headers={"If-None-Match": etag}
+    )
+    assert conditional.status_code == 304
+
+    store.add_events("07-20", ["2001: A new event"], "openai")
+    changed = client.get(
+        "/api/events/07-20", params={"source": "index"}, headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert fake_service.calls == []
+
+
+def test_get_events_from_index_reads_the_store_off_the_event_loop(client, fake_service):
+    store = get_event_store()
+    store.add_events("07-20", [f"{1900 + i}: Event {i}" for i in range(30)], "openai")
+    get_events = store.get_events
+    loops = []
+
+    def tracking_get_events(month_day):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return get_events(month_day)
+
+    with patch.object(store, "get_events", side_effect=tracking_get_events):
+        response = client.get("/api/events/07-20", params={"source": "index"})
+
+    assert response.json()["provider"] == "index"
+    assert loops == [None]
+
+
+def test_get_events_from_index_falls_back_when_thin(client, fake_service):
+    get_event_store().add_events("07-20", ["1969: Apollo 11 lands."], "openai")
+
+    response = client.get("/api/events/07-20", params={"source": "index"})
+
+    assert response.json()["provider"] == "fake"
+    assert len(fake_service.calls) == 1
+
+
+def test_get_events_invalid_source(client, fake_service):
+    response = client.get("/api/events/07-20", params={"source": "cdn"})
+    assert response.status_code == 400
+
+
+def test_search_events(client):
+    get_event_store().add_events(
+        "03-03",
+        ["1918: Treaty of Brest-Litovsk is signed.", "1931: Anthem adopted."],
+        "gemini",
+    )
+
+    response = client.get("/api/events/search", params={"month": 3, "q": "treaty"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 1
+    assert body["events"][0] == {
+        "date": "03-03",
+        "year": 1918,
+        "text": "Treaty of Brest-Litovsk is signed.",
+        "provider": "gemini",
+    }
+
+
+def test_search_events_includes_new_generations(client, fake_service):
+    client.get("/api/events/search", params={"date": "07-20"})
+    client.get("/api/events/07-20")
+
+    response = client.get(
+        "/api/events/search",
+        params={"date": "07-20", "year_from": 1900, "year_to": 2000},
+    )
+    assert [e["year"] for e in response.json()["events"]] == [1969]
+
+
+def test_search_events_requires_a_filter(client):
+    assert client.get("/api/events/search").status_code == 400
+    assert client.get("/api/events/search", params={"date": "13-40"}).status_code == 400
+
+
+def large_events_response():
+    return json.dumps(
+        [f"{1900 + i}: Event number {i} happened somewhere." for i in range(60)]
+    )
+
+
+def test_get_events_serves_precompressed_body(client, fake_service):
+    fake_service.response = large_events_response()
+
+    with patch(
+        "app.utils.compression.compress", wraps=compression.compress
+    ) as mock_compress:
+        first = client.get("/api/events/07-20", headers={"Accept-Encoding": "gzip"})
+        second = client.get("/api/events/07-20", headers={"Accept-Encoding": "gzip"})
+
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.headers["Vary"] == "Accept-Encoding"
+    assert first.headers["ETag"].startswith('W/"')
+    assert first.json() == second.json()
+    assert (
+        json.loads(first.json()["response"])[0]
+        == "1900: Event number 0 happened somewhere."
+    )
+    mock_compress.assert_called_once()
+
+    revalidated = client.get(
+        "/api/events/07-20", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_get_events_uncompressed_without_accept_encoding(client, fake_service):
+    fake_service.response = large_events_response()
+
+    response = client.get("/api/events/07-20", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"].startswith('"')
+
+
+def test_get_events_requests_structured_output(client, fake_service):
+    fake_service.response = '{"events": ["1969: Apollo 11 lands on the Moon."]}'
+
+    response = client.get("/api/events/07-20")
+
+    schema = fake_service.call_kwargs[0]["response_schema"]
+    assert schema["required"] == ["events"]
+    assert json.loads(response.json()["response"]) == [
+        "1969: Apollo 11 lands on the Moon."
+    ]
+
+
+def test_get_events_structured_output_disabled(client, fake_service, monkeypatch):
+    monkeypatch.setenv("STRUCTURED_OUTPUT_ENABLED", "false")
+    get_settings.cache_clear()
+
+    client.get("/api/events/07-20")
+
+    assert "response_schema" not in fake_service.call_kwargs[0]
+
+
+def test_get_events_prefetches_adjacent_dates(fake_service, cache, monkeypatch):
+    monkeypatch.setenv("PREFETCH_ENABLED", "true")
+    get_settings.cache_clear()
+
+    with TestClient(app) as client:
+        client.get("/api/events/07-20")
+        wait_for_calls(fake_service, 3)
+
+    prompts = [calls[-1]["content"] for calls in fake_service.calls]
+    assert prompts[0].endswith("07-20")
+    assert sorted(p[-5:] for p in prompts[1:]) == ["07-19", "07-21"]
+    assert cache.get_variants("historian:fake:07-21")
+
+
+def test_get_events_prefetches_nearest_dates_first(fake_service, cache, monkeypatch):
+    monkeypatch.setenv("PREFETCH_ENABLED", "true")
+    monkeypatch.setenv("PREFETCH_RADIUS", "2")
+    get_settings.cache_clear()
+
+    with TestClient(app) as client:
+        client.get("/api/events/07-20")
+        wait_for_calls(fake_service, 5)
+
+    prompts = [calls[-1]["content"][-5:] for calls in fake_service.calls]
+    assert prompts == ["07-20", "07-21", "07-19", "07-22", "07-18"]
+
+
+def test_get_events_does_not_prefetch_by_default(fake_service):
+    with TestClient(app) as client:
+        client.get("/api/events/07-20")
+        time.sleep(0.05)
+
+    assert len(fake_service.calls) == 1
+
+
+def test_get_events_varies_on_origin_and_encoding(client, fake_service):
+    fake_service.response = large_events_response()
+
+    response = client.get(
+        "/api/events/07-20",
+        headers={"Accept-Encoding": "gzip", "Origin": "http://localhost:5173"},
+    )
+
+    assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:5173"
+    vary = {value.strip() for value in response.headers["Vary"].split(",")}
+    assert vary == {"Origin", "Accept-Encoding"}
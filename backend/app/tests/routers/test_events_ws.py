@@ -0,0 +1,172 @@
+"""
+Tests for app/routers/events_ws.py
+Tests multiplexed date queries over a WebSocket with a fake AI service.
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.main import app
+from app.routers.events_ws import EventsSocket
+from app.services.event_cache import EventCache
+from app.services.event_refresher import get_event_refresher
+from app.tests.fakes import FakeService
+
+
+class SlowService(FakeService):
+    """Fake service whose calls hang until cancelled."""
+
+    def __init__(self):
+        super().__init__()
+        self.cancelled = 0
+
+    async def chat_completion(self, messages, model=None, temperature=0.7, **kwargs):
+        self.calls.append(messages)
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.response
+
+
+@pytest.fixture(autouse=True)
+def cache():
+    cache = EventCache(
+        max_entries=100, ttl_seconds=3600, stale_seconds=3600, variants_per_key=1
+    )
+    with patch("app.routers.events.get_event_cache", return_value=cache):
+        yield cache
+
+
+def use_service(service):
+    return patch("app.routers.events.get_service", AsyncMock(return_value=service))
+
+
+def test_replies_are_tagged_by_request_id():
+    service = FakeService()
+    with use_service(service), TestClient(app).websocket_connect(
+        "/api/ws/events"
+    ) as ws:
+        ws.send_json({"type": "get", "id": "a", "date": "07-20"})
+        ws.send_json({"type": "get", "id": "b", "date": "02-30"})
+        ws.send_json({"type": "get", "id": "c", "date": "07-20", "template": "poet"})
+        replies = {
+            reply["id"]: reply for reply in [ws.receive_json() for _ in range(3)]
+        }
+
+    assert replies["a"]["type"] == "events"
+    assert replies["a"]["date"] == "07-20"
+    assert replies["a"]["response"] == '["1969: Apollo 11 lands on the Moon."]'
+    assert replies["a"]["etag"]
+    assert (replies["b"]["type"], replies["b"]["status"]) == ("error", 400)
+    assert (replies["c"]["type"], replies["c"]["status"]) == ("error", 404)
+
+
+def test_serves_cached_dates_without_provider_call(cache):
+    service = FakeService()
+    cache.set("historian:fake:07-20", '["1215: Magna Carta is sealed."]', "fake")
+
+    with use_service(service), TestClient(app).websocket_connect(
+        "/api/ws/events"
+    ) as ws:
+        ws.send_json({"type": "get", "id": 1, "date": "07-20"})
+        reply = ws.receive_json()
+
+    assert reply["id"] == "1"
+    assert reply["response"] == '["1215: Magna Carta is sealed."]'
+    assert service.calls == []
+
+
+def test_cancel_stops_the_generation():
+    service = SlowService()
+    with use_service(service), TestClient(app).websocket_connect(
+        "/api/ws/events"
+    ) as ws:
+        ws.send_json({"type": "get", "id": "a", "date": "07-20"})
+        ws.send_json({"type": "cancel", "id": "a"})
+        assert ws.receive_json() == {"type": "cancelled", "id": "a"}
+
+        ws.send_json({"type": "cancel", "id": "a"})
+        assert ws.receive_json()["status"] == 404
+
+    assert service.cancelled == 1
+
+
+def test_refuses_queries_beyond_pending_limit(monkeypatch):
+    monkeypatch.setenv("WS_MAX_PENDING", "1")
+    service = SlowService()
+    with use_service(service), TestClient(app).websocket_connect(
+        "/api/ws/events"
+    ) as ws:
+        ws.send_json({"type": "get", "id": "a", "date": "07-20"})
+        ws.send_json({"type": "get", "id": "b", "date": "07-21"})
+        reply = ws.receive_json()
+
+    assert (reply["id"], reply["status"]) == ("b", 429)
+    # Closing the connection cancels the query still running
+    assert service.cancelled == 1
+
+
+def test_rejects_invalid_messages():
+    with TestClient(app).websocket_connect("/api/ws/events") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json()["status"] == 400
+        ws.send_json({"type": "subscribe", "id": "a"})
+        assert ws.receive_json() == {
+            "type": "error",
+            "id": "a",
+            "status": 400,
+            "detail": "Unknown message type subscribe",
+        }
+
+
+def test_rejects_disallowed_origin():
+    client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect(
+            "/api/ws/events", headers={"origin": "https://evil.example"}
+        ) as ws:
+            ws.receive_json()
+
+    assert exc_info.value.code == 1008
+
+
+class BrokenSocket:
+    """WebSocket whose sends fail, as on a connection reset mid-send."""
+
+    def __init__(self, messages):
+        self.incoming = asyncio.Queue()
+        for message in messages:
+            self.incoming.put_nowait(json.dumps(message))
+
+    async def receive_text(self):
+        return await self.incoming.get()
+
+    async def send_json(self, message):
+        raise RuntimeError("Connection reset")
+
+
+@pytest.mark.asyncio
+async def test_failed_send_closes_the_connection():
+    service = SlowService()
+    socket = BrokenSocket(
+        [{"type": "get", "id": "a", "date": "07-20"}]
+        + [{"type": "subscribe", "id": str(i)} for i in range(4)]
+    )
+
+    with use_service(service):
+        # Without the sender, the receiver would wait on a full outbox forever
+        await asyncio.wait_for(
+            EventsSocket(
+                socket, max_inflight=4, max_pending=4, send_queue_size=1
+            ).run(),
+            timeout=1,
+        )
+
+    assert service.cancelled == 1
+    await get_event_refresher().close()
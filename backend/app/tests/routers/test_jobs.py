@@ -0,0 +1,121 @@
+"""
+Tests for app/routers/jobs.py
+Tests batch generation jobs with a fake AI service.
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.event_cache import EventCache
+from app.tests.fakes import FakeService
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setenv("JOBS_POLL_INTERVAL_SECONDS", "0.01")
+
+
+@pytest.fixture
+def fake_service():
+    service = FakeService()
+    with patch("app.routers.jobs.get_service", AsyncMock(return_value=service)):
+        yield service
+
+
+@pytest.fixture(autouse=True)
+def cache():
+    cache = EventCache(
+        max_entries=100, ttl_seconds=3600, stale_seconds=3600, variants_per_key=1
+    )
+    with patch("app.routers.events.get_event_cache", return_value=cache), patch(
+        "app.routers.jobs.get_event_cache", return_value=cache
+    ):
+        yield cache
+
+
+def read_results(client, job_id):
+    response = client.get(f"/api/jobs/{job_id}/results")
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_job_generates_every_date(fake_service, cache):
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/jobs", json={"start": "12-31", "end": "01-01", "dates": ["07-20"]}
+        )
+        assert response.status_code == 202
+        job = response.json()
+        assert response.headers["Location"] == f"/api/jobs/{job['id']}"
+        assert job["total"] == 3
+
+        # Follows the job until it completes
+        results = read_results(client, job["id"])
+
+        status = client.get(f"/api/jobs/{job['id']}").json()
+
+    assert sorted(r["date"] for r in results) == ["01-01", "07-20", "12-31"]
+    assert all(r["status"] == "done" for r in results)
+    assert results[0]["events"] == ["1969: Apollo 11 lands on the Moon."]
+    assert status["status"] == "completed" and status["progress"] == 1.0
+    assert cache.get("historian:fake:12-31") is not None
+    assert len(fake_service.calls) == 3
+
+
+def test_job_reuses_cached_dates(fake_service, cache):
+    cache.set("historian:fake:07-20", '["1215: Magna Carta is sealed."]', "fake")
+
+    with TestClient(app) as client:
+        job = client.post("/api/jobs", json={"dates": ["07-20"]}).json()
+        results = read_results(client, job["id"])
+
+    assert results[0]["events"] == ["1215: Magna Carta is sealed."]
+    assert fake_service.calls == []
+
+
+def test_job_reports_failed_items(fake_service, monkeypatch):
+    monkeypatch.setenv("JOBS_MAX_ATTEMPTS", "1")
+    fake_service.chat_completion = AsyncMock(side_effect=Exception("boom"))
+
+    with TestClient(app) as client:
+        job = client.post("/api/jobs", json={"dates": ["07-20"]}).json()
+        results = read_results(client, job["id"])
+        status = client.get(f"/api/jobs/{job['id']}").json()
+
+    assert results[0]["status"] == "failed"
+    assert "boom" in results[0]["error"]
+    assert status["failed"] == 1
+
+
+@pytest.mark.parametrize(
+    "body,status_code",
+    [
+        ({}, 400),
+        ({"dates": ["02-30"]}, 400),
+        ({"start": "07-20"}, 400),
+        ({"dates": ["07-20"], "templates": ["poet"]}, 404),
+    ],
+)
+def test_create_job_validates_spec(fake_service, body, status_code):
+    client = TestClient(app)
+    response = client.post("/api/jobs", json=body)
+    assert response.status_code == status_code
+
+
+def test_create_job_limits_items(fake_service, monkeypatch):
+    monkeypatch.setenv("JOBS_MAX_ITEMS", "10")
+    client = TestClient(app)
+
+    response = client.post("/api/jobs", json={"start": "01-01", "end": "12-31"})
+
+    assert response.status_code == 400
+    assert "366 items" in response.json()["detail"]
+
+
+def test_unknown_job_is_404():
+    client = TestClient(app)
+    assert client.get("/api/jobs/missing").status_code == 404
+    assert client.get("/api/jobs/missing/results").status_code == 404
@@ -0,0 +1,271 @@
+import asyncio
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from app.services.batch_jobs import (
+    DONE,
+    FAILED,
+    PENDING,
+    JobRunner,
+    JobStore,
+)
+from app.services.scheduler import BATCH, JobPreempted, SchedulerFull, current_lane
+
+ITEMS = [
+    {"month_day": "07-20", "template": "historian"},
+    {"month_day": "07-21", "template": "historian"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+def make_runner(store, max_attempts=3, retry_backoff=0, lease_seconds=60):
+    return JobRunner(
+        store,
+        workers=2,
+        max_attempts=max_attempts,
+        lease_seconds=lease_seconds,
+        poll_interval=0.01,
+        retry_backoff=retry_backoff,
+    )
+
+
+async def wait_until_finished(store, job_id):
+    for _ in range(200):
+        if store.status(job_id).finished:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_create_and_claim_in_order(store):
+    job = store.create("openai", ITEMS)
+
+    assert job.state == "queued"
+    assert job.total == 2 and job.pending == 2
+
+    first = store.claim(lease_seconds=60)
+    second = store.claim(lease_seconds=60)
+    assert (first.month_day, second.month_day) == ("07-20", "07-21")
+    assert first.provider == "openai" and first.attempts == 1
+    assert store.claim(lease_seconds=60) is None
+    assert store.status(job.id).state == "running"
+
+
+def test_finish_records_results(store):
+    job = store.create(None, ITEMS)
+    first = store.claim(lease_seconds=60)
+    second = store.claim(lease_seconds=60)
+
+    store.finish(second, FAILED, error="boom")
+    store.finish(first, DONE, result='["1969: Apollo 11"]')
+
+    status = store.status(job.id)
+    assert status.finished and status.state == "completed"
+    assert (status.done, status.failed) == (1, 1)
+    results = store.results(job.id)
+    assert [(r.seq, r.status) for r in results] == [(0, DONE), (1, FAILED)]
+    assert results[0].result == '["1969: Apollo 11"]'
+    assert results[1].error == "boom"
+
+
+def test_expired_lease_is_claimed_again(store):
+    store.create(None, ITEMS[:1])
+    store.claim(lease_seconds=-1)
+
+    reclaimed = store.claim(lease_seconds=60)
+
+    assert reclaimed.month_day == "07-20"
+    assert reclaimed.attempts == 2
+
+
+def test_release_does_not_count_the_attempt(store):
+    store.create(None, ITEMS[:1])
+    item = store.claim(lease_seconds=60)
+
+    store.release(item)
+
+    assert store.claim(lease_seconds=60).attempts == 1
+
+
+def test_items_backing_off_are_not_claimed(store):
+    store.create(None, ITEMS)
+    first = store.claim(lease_seconds=60)
+    second = store.claim(lease_seconds=60)
+
+    store.finish(first, PENDING, error="boom", retry_in=60)
+    store.release(second, retry_in=60)
+    assert store.claim(lease_seconds=60) is None
+
+    store.release(second)
+    assert store.claim(lease_seconds=60).month_day == "07-21"
+
+
+def test_missing_job_has_no_status(store):
+    assert store.status("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_runner_runs_items_in_batch_lane(store):
+    runner = make_runner(store)
+    lanes = []
+
+    async def executor(item):
+        lanes.append(current_lane())
+        return f'["{item.month_day}"]'
+
+    runner.start(executor)
+    job = await runner.submit(None, ITEMS)
+    await wait_until_finished(store, job.id)
+
+    assert [r.result for r in store.results(job.id)] == ['["07-20"]', '["07-21"]']
+    assert lanes == [BATCH, BATCH]
+    await runner.close()
+
+
+@pytest.mark.asyncio
+async def test_runner_retries_then_fails(store):
+    runner = make_runner(store, max_attempts=2)
+    attempts = []
+
+    async def executor(item):
+        attempts.append(item.attempts)
+        raise Exception("provider down")
+
+    runner.start(executor)
+    job = await runner.submit(None, ITEMS[:1])
+    await wait_until_finished(store, job.id)
+
+    assert attempts == [1, 2]
+    (result,) = store.results(job.id)
+    assert result.status == FAILED and result.error == "provider down"
+    await runner.close()
+
+
+@pytest.mark.asyncio
+async def test_runner_backs_off_before_retrying(store):
+    runner = make_runner(store, max_attempts=2, retry_backoff=60)
+    failed = asyncio.Event()
+
+    async def executor(item):
+        failed.set()
+        raise Exception("provider down")
+
+    runner.start(executor)
+    job = await runner.submit(None, ITEMS[:1])
+    await failed.wait()
+    await asyncio.sleep(0.05)
+
+    status = store.status(job.id)
+    assert (status.pending, status.failed) == (1, 0)
+    assert store.claim(lease_seconds=60) is None
+    await runner.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [SchedulerFull("full"), JobPreempted("preempted")])
+async def test_runner_does_not_count_unadmitted_calls(store, error):
+    runner = make_runner(store, max_attempts=1)
+    attempts = []
+
+    async def executor(item):
+        attempts.append(item.attempts)
+        if len(attempts) < 3:
+            raise error
+        return '["1969: Apollo 11"]'
+
+    runner.start(executor)
+    job = await runner.submit(None, ITEMS[:1])
+    await wait_until_finished(store, job.id)
+
+    assert attempts == [1, 1, 1]
+    (result,) = store.results(job.id)
+    assert result.status == DONE
+    await runner.close()
+
+
+@pytest.mark.asyncio
+async def test_runner_survives_a_locked_store(store):
+    runner = make_runner(store)
+    claim = store.claim
+
+    def locked_once(lease_seconds):
+        # Every worker finds the database locked on its first poll
+        if locked:
+            locked.pop()
+            raise sqlite3.OperationalError("database is locked")
+        return claim(lease_seconds)
+
+    async def executor(item):
+        return '["1969: Apollo 11"]'
+
+    locked = [True, True]
+    with patch.object(store, "claim", side_effect=locked_once):
+        runner.start(executor)
+        job = await runner.submit(None, ITEMS)
+        await wait_until_finished(store, job.id)
+
+    assert [result.status for result in store.results(job.id)] == [DONE, DONE]
+    await runner.close()
+
+
+@pytest.mark.asyncio
+async def test_runner_retries_an_item_whose_outcome_was_not_recorded(store):
+    runner = make_runner(store, lease_seconds=0.05)
+    finish = store.finish
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def finish_or_fail(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return finish(*args, **kwargs)
+
+    async def executor(item):
+        return '["1969: Apollo 11"]'
+
+    with patch.object(store, "finish", side_effect=finish_or_fail):
+        runner.start(executor)
+        job = await runner.submit(None, ITEMS[:1])
+        await wait_until_finished(store, job.id)
+
+    (result,) = store.results(job.id)
+    assert result.status == DONE
+    await runner.close()
+
+
+@pytest.mark.asyncio
+async def test_new_runner_resumes_unfinished_jobs(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    blocked = asyncio.Event()
+
+    async def hang(item):
+        blocked.set()
+        await asyncio.sleep(60)
+
+    first = make_runner(JobStore(path))
+    first.start(hang)
+    job = await first.submit(None, ITEMS[:1])
+    await blocked.wait()
+    # Shutting down mid-item puts it back in the queue
+    await first.close()
+
+    store = JobStore(path)
+    assert store.status(job.id).pending == 1
+
+    async def executor(item):
+        return '["1969: Apollo 11"]'
+
+    second = make_runner(store)
+    second.start(executor)
+    await wait_until_finished(store, job.id)
+
+    (result,) = store.results(job.id)
+    assert result.status == DONE
+    await second.close()
@@ -0,0 +1,167 @@
+import random
+import asyncio
+import httpx
+import pytest
+
+from app.services.concurrency_limit import (
+    AIMDLimit,
+    ConcurrencyLimiter,
+    FixedLimit,
+    GradientLimit,
+    create_limit,
+    is_overload_error,
+)
+from app.services.scheduler import BATCH, INTERACTIVE, REFRESH, PriorityScheduler
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def make_scheduler(limit=10):
+    return PriorityScheduler(
+        "test",
+        limit=limit,
+        max_queue=16,
+        weights={INTERACTIVE: 8, REFRESH: 2, BATCH: 1},
+    )
+
+
+def test_overload_errors_are_recognised_through_wrapping():
+    def wrapped(error):
+        try:
+            raise error
+        except Exception as e:
+            try:
+                raise Exception(f"OpenAI API error: {e}")
+            except Exception as outer:
+                return outer
+
+    assert is_overload_error(StatusError(429))
+    assert is_overload_error(wrapped(StatusError(503)))
+    assert is_overload_error(wrapped(httpx.ReadTimeout("timed out")))
+    assert not is_overload_error(wrapped(StatusError(400)))
+    assert not is_overload_error(ValueError("bad json"))
+
+
+def test_aimd_grows_additively_and_backs_off_multiplicatively():
+    limit = AIMDLimit(initial=10, min_limit=2, max_limit=100)
+
+    for _ in range(10):
+        limit.update(rtt=0.1, in_flight=10, dropped=False)
+    assert 10.9 < limit.limit < 11.1
+
+    limit.update(rtt=0.1, in_flight=10, dropped=True)
+    assert 9.8 < limit.limit < 10.0
+
+
+def test_aimd_does_not_grow_when_traffic_is_below_the_limit():
+    limit = AIMDLimit(initial=10, min_limit=2, max_limit=100)
+
+    limit.update(rtt=0.1, in_flight=2, dropped=False)
+
+    assert limit.limit == 10
+
+
+def test_limits_stay_within_bounds():
+    limit = AIMDLimit(initial=3, min_limit=2, max_limit=4)
+
+    for _ in range(10):
+        limit.update(rtt=0.1, in_flight=3, dropped=True)
+    assert limit.limit == 2
+    for _ in range(100):
+        limit.update(rtt=0.1, in_flight=4, dropped=False)
+    assert limit.limit == 4
+
+
+def test_gradient_grows_while_latency_holds():
+    limit = GradientLimit(initial=10, min_limit=2, max_limit=100)
+
+    for _ in range(20):
+        limit.update(rtt=0.5, in_flight=int(limit.limit), dropped=False)
+
+    assert limit.limit > 20
+
+
+def test_gradient_shrinks_when_latency_rises():
+    limit = GradientLimit(initial=40, min_limit=2, max_limit=100)
+    for _ in range(20):
+        limit.update(rtt=0.5, in_flight=40, dropped=False)
+    grown = limit.limit
+
+    # Calls queue at the provider: latency doubles
+    for _ in range(30):
+        limit.update(rtt=1.0, in_flight=int(limit.limit), dropped=False)
+
+    assert limit.limit < grown * 0.75
+    # Queueing latency barely moves the baseline
+    assert limit.stats()["rtt_ms_baseline"] < 510
+
+
+def test_gradient_holds_under_load_independent_latency_variance():
+    # LLM calls take anywhere from 1.5 to 6 s however loaded the provider is
+    rng = random.Random(7)
+    limit = GradientLimit(initial=16, min_limit=2, max_limit=128)
+
+    limits = []
+    for _ in range(2000):
+        limit.update(rng.uniform(1.5, 6.0), in_flight=int(limit.limit), dropped=False)
+        limits.append(limit.limit)
+
+    assert min(limits[100:]) >= 16
+
+
+def test_gradient_baseline_follows_a_provider_wide_slowdown():
+    limit = GradientLimit(initial=16, min_limit=2, max_limit=128)
+    for _ in range(100):
+        limit.update(rtt=1.0, in_flight=int(limit.limit), dropped=False)
+
+    # Every call gets slower, not because of our load: the limit drops at
+    # first, then recovers as the baseline catches up
+    lowest = limit.limit
+    for _ in range(4000):
+        limit.update(rtt=2.0, in_flight=int(limit.limit), dropped=False)
+        lowest = min(lowest, limit.limit)
+
+    assert lowest < 32
+    assert limit.limit == 128
+
+
+def test_create_limit_rejects_unknown_algorithm():
+    assert isinstance(create_limit("fixed", 8, 2, 16), FixedLimit)
+    with pytest.raises(ValueError):
+        create_limit("vegas", 8, 2, 16)
+
+
+@pytest.mark.asyncio
+async def test_limiter_applies_limit_to_scheduler():
+    scheduler = make_scheduler(limit=10)
+    limiter = ConcurrencyLimiter(scheduler, AIMDLimit(8, min_limit=2, max_limit=100))
+    assert scheduler.limit == 8
+
+    await scheduler.acquire(INTERACTIVE)
+    with pytest.raises(Exception):
+        async with limiter.measure():
+            raise Exception("OpenAI rate limit exceeded") from StatusError(429)
+    scheduler.release(INTERACTIVE)
+
+    assert scheduler.limit == 7
+    assert limiter.stats()["drops"] == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_ignores_cancellation_and_client_errors():
+    scheduler = make_scheduler()
+    limiter = ConcurrencyLimiter(scheduler, AIMDLimit(8, min_limit=2, max_limit=100))
+
+    with pytest.raises(asyncio.CancelledError):
+        async with limiter.measure():
+            raise asyncio.CancelledError()
+    with pytest.raises(ValueError):
+        async with limiter.measure():
+            raise ValueError("bad request")
+
+    assert limiter.stats()["samples"] == 0
+    assert scheduler.limit == 8
@@ -0,0 +1,179 @@
+from app.services.event_cache import EventCache, make_cache_key
+from app.utils.compression import PrecompressedBody
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_cache_key():
+    assert make_cache_key("historian", "openai", "07-20") == "historian:openai:07-20"
+
+
+def test_set_and_get():
+    cache = EventCache(max_entries=10, ttl_seconds=60)
+    entry = cache.set("k", '["a"]', "openai")
+    assert cache.get("k") is entry
+    assert entry.etag.startswith('"')
+
+
+def test_get_expired_entry():
+    clock = FakeClock()
+    cache = EventCache(max_entries=10, ttl_seconds=60, clock=clock)
+    cache.set("k", '["a"]', "openai")
+
+    clock.now += 61
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = EventCache(max_entries=2, ttl_seconds=60, policy="lru")
+    cache.set("a", "[]", "openai")
+    cache.set("b", "[]", "openai")
+    cache.get("a")
+    cache.set("c", "[]", "openai")
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_variant_pool_keeps_newest_variants():
+    cache = EventCache(max_entries=10, ttl_seconds=60, variants_per_key=2)
+    cache.set("k", '["a"]', "openai")
+    cache.set("k", '["b"]', "openai")
+    cache.set("k", '["c"]', "openai")
+
+    assert [v.response for v in cache.get_variants("k")] == ['["b"]', '["c"]']
+    assert cache.get("k").response in ('["b"]', '["c"]')
+
+
+def test_variant_pool_ignores_duplicate_responses():
+    cache = EventCache(max_entries=10, ttl_seconds=60, variants_per_key=3)
+    cache.set("k", '["a"]', "openai")
+    cache.set("k", '["a"]', "openai")
+    assert len(cache.get_variants("k")) == 1
+
+
+def test_needs_top_up_when_low_or_stale():
+    clock = FakeClock()
+    cache = EventCache(
+        max_entries=10,
+        ttl_seconds=60,
+        stale_seconds=60,
+        variants_per_key=2,
+        clock=clock,
+    )
+    assert cache.needs_top_up("k")
+
+    cache.set("k", '["a"]', "openai")
+    assert cache.needs_top_up("k")
+
+    cache.set("k", '["b"]', "openai")
+    assert not cache.needs_top_up("k")
+
+    clock.now += 61
+    assert cache.needs_top_up("k")
+
+
+def test_get_prefers_fresh_variants():
+    clock = FakeClock()
+    cache = EventCache(
+        max_entries=10,
+        ttl_seconds=60,
+        stale_seconds=600,
+        variants_per_key=2,
+        clock=clock,
+    )
+    cache.set("k", '["old"]', "openai")
+    clock.now += 61
+    cache.set("k", '["new"]', "openai")
+
+    assert all(cache.get("k").response == '["new"]' for _ in range(20))
+
+
+def test_variants_store_shared_events_once():
+    cache = EventCache(max_entries=10, ttl_seconds=60, variants_per_key=3)
+    first = cache.set("k", '["1969: Apollo 11", "1215: Magna Carta"]', "openai")
+    second = cache.set(
+        "k", '["1969: Apollo 11", "1989: Berlin Wall falls ü"]', "openai"
+    )
+
+    assert first.table is second.table
+    assert first.table.unpack() == [
+        "1969: Apollo 11",
+        "1215: Magna Carta",
+        "1989: Berlin Wall falls ü",
+    ]
+    assert first.response == '["1969: Apollo 11", "1215: Magna Carta"]'
+    assert second.response == '["1969: Apollo 11", "1989: Berlin Wall falls ü"]'
+
+
+def test_dropped_variants_leave_the_table_but_stay_readable():
+    cache = EventCache(max_entries=10, ttl_seconds=60, variants_per_key=2)
+    dropped = cache.set("k", '["a", "b"]', "openai")
+    cache.set("k", '["b", "c"]', "openai")
+    kept = cache.set("k", '["c", "d"]', "openai")
+
+    assert kept.table.unpack() == ["b", "c", "d"]
+    assert dropped.response == '["a", "b"]'
+
+
+def test_responses_that_are_not_event_lists_are_stored_whole():
+    cache = EventCache(max_entries=10, ttl_seconds=60, variants_per_key=3)
+    cache.set("k", '["a"]', "openai")
+    odd = cache.set("k", '[ "spaced" ]', "openai")
+    nested = cache.set("k", '[["nested"]]', "openai")
+
+    assert odd.indexes is None and odd.response == '[ "spaced" ]'
+    assert nested.response == '[["nested"]]'
+    assert cache.get_variants("k")[0].response == '["a"]'
+
+
+def test_rendered_bodies_are_kept_for_recent_variants_only():
+    cache = EventCache(max_entries=10, ttl_seconds=60, max_bodies=1)
+    first = cache.set("a", '["a"]', "openai")
+    second = cache.set("b", '["b"]', "openai")
+    builds = []
+
+    def build():
+        builds.append(1)
+        return PrecompressedBody(b"{}", min_size=1024)
+
+    body = cache.rendered_body(first, build)
+    assert cache.rendered_body(first, build) is body
+    cache.rendered_body(second, build)
+    cache.rendered_body(first, build)
+
+    assert len(builds) == 3
+    assert cache.stats()["bodies"] == 1
+
+
+def test_stats_report_stored_bytes():
+    cache = EventCache(max_entries=10, ttl_seconds=60, variants_per_key=2)
+    cache.set("k", '["a", "b"]', "openai")
+    cache.set("k", '["b", "c"]', "openai")
+
+    stats = cache.stats()
+
+    assert (stats["keys"], stats["variants"]) == (1, 2)
+    assert stats["stored_bytes"] > 0
+
+
+def test_tinylfu_keeps_looked_up_keys_through_one_off_keys():
+    cache = EventCache(max_entries=10, ttl_seconds=60)
+    for _ in range(3):
+        if not cache.lookup("popular"):
+            cache.set("popular", "[]", "openai")
+
+    # e.g. a batch job generating dates nobody asked for
+    for i in range(30):
+        cache.set(f"batch-{i}", "[]", "openai")
+
+    assert cache.get("popular") is not None
+    assert len(cache) == 10
@@ -0,0 +1,102 @@
+import time
+import pytest
+
+from app.services.event_index import EventIndex, keyword_tokens
+from app.services.event_store import EventStore, StoredEvent
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"))
+    store.add_events(
+        "07-20",
+        [
+            "1969: Apollo 11 lands on the Moon.",
+            "1944: Plot against Hitler fails.",
+            "1810: Colombia declares independence.",
+            "2021: Jeff Bezos flies to space.",
+        ],
+        "openai",
+    )
+    store.add_events(
+        "03-03",
+        [
+            "1918: Treaty of Brest-Litovsk is signed.",
+            "1878: Treaty of San Stefano ends the Russo-Turkish War.",
+        ],
+        "gemini",
+    )
+    store.add_events("07-14", ["1789: Storming of the Bastille."], "openai")
+    yield store
+    store.close()
+
+
+def test_keyword_tokens():
+    assert keyword_tokens("The Treaty of Paris!") == {"treaty", "paris"}
+
+
+def test_index_loads_lazily(store):
+    index = EventIndex(store)
+    assert not index._loaded
+    index.query(month_day="07-20")
+    assert index._loaded
+
+
+def test_query_year_range(store):
+    index = EventIndex(store)
+    events = index.query(month_day="07-20", year_from=1900, year_to=2000)
+    assert [e.year for e in events] == [1944, 1969]
+
+
+def test_query_keyword_in_month(store):
+    index = EventIndex(store)
+    events = index.query(month=3, keywords="treaty")
+    assert [e.year for e in events] == [1878, 1918]
+    assert index.query(month=7, keywords="treaty") == []
+
+
+def test_query_multiple_keywords_match_all(store):
+    index = EventIndex(store)
+    events = index.query(keywords="treaty war")
+    assert [e.year for e in events] == [1878]
+
+
+def test_query_month_without_keywords(store):
+    index = EventIndex(store)
+    events = index.query(month=7, limit=2)
+    assert [(e.month_day, e.year) for e in events] == [("07-14", 1789), ("07-20", 1810)]
+
+
+def test_add_after_load(store):
+    index = EventIndex(store)
+    index.query(month_day="07-20")
+
+    new_events = store.add_events("07-20", ["1976: Viking 1 lands on Mars."], "openai")
+    index.add(new_events)
+
+    assert [e.year for e in index.query(month_day="07-20", keywords="mars")] == [1976]
+
+
+def test_query_speed_over_large_index(tmp_path):
+    store = EventStore(str(tmp_path / "large.db"))
+    index = EventIndex(store)
+    index._loaded = True
+    words = ["treaty", "battle", "king", "empire", "river", "bridge", "strike"]
+    index._index(
+        StoredEvent(
+            f"{1 + i % 12:02d}-{1 + i % 28:02d}",
+            1000 + i % 1000,
+            f"{words[i % 7]} {words[(i // 7) % 7]} event {i}",
+            "openai",
+            0.0,
+        )
+        for i in range(100_000)
+    )
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index.query(month_day="07-20", year_from=1900, year_to=2000)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / 100
+
+    assert elapsed_ms < 1
+    store.close()
@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+
+from app.services.event_prefetcher import EventPrefetcher
+from app.utils.metrics import get_metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def recording_job(done, key):
+    async def job():
+        done.append(key)
+
+    return job
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_runs_newest_job_first():
+    prefetcher = EventPrefetcher(max_queue=4, budget_per_minute=60)
+    done = []
+
+    prefetcher.submit("a", recording_job(done, "a"))
+    prefetcher.submit("b", recording_job(done, "b"))
+    await settle()
+
+    assert done == ["b", "a"]
+    assert get_metrics().counter("prefetch.completed") == 2
+    await prefetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_oldest_job():
+    prefetcher = EventPrefetcher(max_queue=2, budget_per_minute=60)
+    done = []
+
+    with prefetcher.interactive():
+        for key in ["a", "b", "c"]:
+            prefetcher.submit(key, recording_job(done, key))
+        assert not prefetcher.submit("c", recording_job(done, "c"))
+        assert len(prefetcher) == 2
+    await settle()
+
+    assert done == ["c", "b"]
+    assert get_metrics().counter("prefetch.dropped") == 1
+    await prefetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_resubmitted_key_moves_up():
+    prefetcher = EventPrefetcher(max_queue=4, budget_per_minute=60)
+    done = []
+
+    with prefetcher.interactive():
+        for key in ["a", "b", "c"]:
+            prefetcher.submit(key, recording_job(done, key))
+        assert not prefetcher.submit("a", recording_job(done, "a"))
+        # Queued while "a" is the newest job runs after it
+        prefetcher.submit("d", recording_job(done, "d"))
+    await settle()
+
+    assert done == ["d", "a", "c", "b"]
+    await prefetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_waits_while_interactive_generation_runs():
+    prefetcher = EventPrefetcher(max_queue=4, budget_per_minute=60)
+    done = []
+
+    with prefetcher.interactive():
+        prefetcher.submit("a", recording_job(done, "a"))
+        await settle()
+        assert done == []
+    await settle()
+
+    assert done == ["a"]
+    await prefetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_budget_limits_job_starts():
+    clock = FakeClock()
+    prefetcher = EventPrefetcher(max_queue=8, budget_per_minute=2, clock=clock)
+    done = []
+
+    for key in ["a", "b", "c"]:
+        prefetcher.submit(key, recording_job(done, key))
+    await settle()
+
+    assert done == ["c", "b"]
+    assert len(prefetcher) == 1
+    await prefetcher.close()
+
+
+def test_budget_refills_over_time():
+    clock = FakeClock()
+    prefetcher = EventPrefetcher(max_queue=8, budget_per_minute=2, clock=clock)
+
+    assert prefetcher._take_token() == 0
+    assert prefetcher._take_token() == 0
+    assert prefetcher._take_token() == pytest.approx(30.0)
+
+    # Half a minute refills one token at 2 per minute
+    clock.now = 30.0
+    assert prefetcher._take_token() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_job_does_not_stop_worker():
+    prefetcher = EventPrefetcher(max_queue=4, budget_per_minute=60)
+    done = []
+
+    async def failing():
+        raise RuntimeError("provider down")
+
+    prefetcher.submit("a", failing)
+    prefetcher.submit("b", recording_job(done, "b"))
+    await settle()
+
+    assert done == ["b"]
+    assert get_metrics().counter("prefetch.failed") == 1
+    await prefetcher.close()
@@ -0,0 +1,231 @@
+import asyncio
+import pytest
+
+from app.services.event_refresher import EventRefresher
+from app.services.scheduler import (
+    BATCH,
+    INTERACTIVE,
+    REFRESH,
+    PriorityScheduler,
+    SchedulerFull,
+    current_lane,
+    lane,
+)
+
+
+@pytest.mark.asyncio
+async def test_run_coalesces_concurrent_calls():
+    refresher = EventRefresher(workers=1, max_queue=4)
+    calls = 0
+    release = asyncio.Event()
+
+    async def job():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "events"
+
+    first = asyncio.create_task(refresher.run("k", job))
+    second = asyncio.create_task(refresher.run("k", job))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(first, second) == ["events", "events"]
+    assert calls == 1
+    assert not refresher.is_pending("k")
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_schedule_deduplicates_pending_keys():
+    refresher = EventRefresher(workers=1, max_queue=4)
+    done = asyncio.Event()
+    calls = 0
+
+    async def job():
+        nonlocal calls
+        calls += 1
+        done.set()
+
+    assert refresher.schedule("k", job)
+    assert not refresher.schedule("k", job)
+
+    await asyncio.wait_for(done.wait(), 1)
+    await refresher._queue.join()
+    assert calls == 1
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_schedule_drops_when_queue_full():
+    refresher = EventRefresher(workers=1, max_queue=1)
+    blocker = asyncio.Event()
+
+    async def job():
+        await blocker.wait()
+
+    assert refresher.schedule("a", job)
+    await asyncio.sleep(0)  # Worker picks up "a" and blocks
+    assert refresher.schedule("b", job)
+    assert not refresher.schedule("c", job)
+
+    blocker.set()
+    await refresher._queue.join()
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_failed_refresh():
+    refresher = EventRefresher(workers=1, max_queue=4)
+    done = asyncio.Event()
+
+    async def failing():
+        raise RuntimeError("provider down")
+
+    async def succeeding():
+        done.set()
+
+    refresher.schedule("a", failing)
+    refresher.schedule("b", succeeding)
+
+    await asyncio.wait_for(done.wait(), 1)
+    await refresher.close()
+
+
+async def blocking_job(started: asyncio.Event, cancelled: asyncio.Event):
+    started.set()
+    try:
+        await asyncio.sleep(10)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+    return "events"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_shared_generation_running():
+    refresher = EventRefresher(workers=1, max_queue=4)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def job():
+        started.set()
+        await release.wait()
+        return "events"
+
+    first = asyncio.create_task(refresher.run("k", job))
+    second = asyncio.create_task(refresher.run("k", job))
+    await started.wait()
+    assert refresher.waiters("k") == 2
+
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    assert refresher.waiters("k") == 1
+
+    release.set()
+    assert await second == "events"
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_last_waiter_leaving_cancels_generation():
+    refresher = EventRefresher(workers=1, max_queue=4)
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    waiters = [
+        asyncio.create_task(
+            refresher.run("k", lambda: blocking_job(started, cancelled))
+        )
+        for _ in range(2)
+    ]
+    await started.wait()
+
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert cancelled.is_set()
+    assert not refresher.is_pending("k")
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_survives_joining_caller_leaving():
+    refresher = EventRefresher(workers=1, max_queue=4)
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    refresher.schedule("k", lambda: blocking_job(started, cancelled))
+    await started.wait()
+
+    caller = asyncio.create_task(refresher.run("k", lambda: None))
+    await asyncio.sleep(0)
+    assert refresher.waiters("k") == 2
+
+    caller.cancel()
+    await asyncio.gather(caller, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert not cancelled.is_set()
+    assert refresher.waiters("k") == 1
+    await refresher.close()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_interactive_caller_promotes_a_batch_generation():
+    refresher = EventRefresher(workers=1, max_queue=4)
+    scheduler = PriorityScheduler(
+        "test", limit=1, max_queue=1, weights={INTERACTIVE: 8, REFRESH: 2, BATCH: 1}
+    )
+    await scheduler.acquire(INTERACTIVE)
+    lanes = []
+
+    async def job():
+        async with scheduler.slot():
+            lanes.append(current_lane())
+            return "events"
+
+    # A prefetch starts the generation, which queues in the batch lane
+    with lane(BATCH):
+        prefetch = asyncio.create_task(refresher.run("k", job))
+        await settle()
+        assert scheduler.stats()["lanes"][BATCH]["queued"] == 1
+
+    user = asyncio.create_task(refresher.run("k", job))
+    await settle()
+    assert scheduler.stats()["lanes"][INTERACTIVE]["queued"] == 1
+
+    # A full queue now rejects new calls rather than preempting the user's
+    with pytest.raises(SchedulerFull):
+        await scheduler.acquire(INTERACTIVE)
+
+    scheduler.release(INTERACTIVE)
+    assert await asyncio.wait_for(asyncio.gather(prefetch, user), 1) == [
+        "events",
+        "events",
+    ]
+    assert lanes == [INTERACTIVE]
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_promotion_stays_within_the_generation():
+    refresher = EventRefresher(workers=1, max_queue=4)
+    release = asyncio.Event()
+
+    async def job():
+        await release.wait()
+
+    with lane(BATCH):
+        prefetch = asyncio.create_task(refresher.run("k", job))
+        await settle()
+        user = asyncio.create_task(refresher.run("k", job))
+        await settle()
+        release.set()
+        await asyncio.gather(prefetch, user)
+        assert current_lane() == BATCH
+    await refresher.close()
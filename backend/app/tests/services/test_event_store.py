@@ -0,0 +1,76 @@
+import os
+import pytest
+
+from app.services.event_store import EventStore, StoredEvent, parse_year
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "nested" / "events.db"))
+    yield store
+    store.close()
+
+
+def test_store_is_opened_lazily(tmp_path):
+    path = tmp_path / "events.db"
+    store = EventStore(str(path))
+    assert not os.path.exists(path)
+    assert store.count("07-20") == 0
+    assert os.path.exists(path)
+    store.close()
+
+
+def test_parse_year():
+    assert parse_year("1969") == 1969
+    assert parse_year("44 BC") == -44
+    assert parse_year("300 BCE") == -300
+
+
+def test_stored_event_format():
+    event = StoredEvent("03-15", -44, "Caesar is killed.", "openai", 0.0)
+    assert event.format() == "44 BC: Caesar is killed."
+
+
+def test_add_and_get_events(store):
+    added = store.add_events(
+        "07-20",
+        ["1969: Apollo 11 lands on the Moon.", "1944: Plot against Hitler fails."],
+        "openai",
+    )
+
+    assert [e.year for e in added] == [1969, 1944]
+    events = store.get_events("07-20")
+    assert [e.year for e in events] == [1944, 1969]
+    assert events[1].text == "Apollo 11 lands on the Moon."
+    assert events[1].provider == "openai"
+    assert events[1].created_at > 0
+
+
+def test_add_events_skips_duplicates_and_unparseable(store):
+    store.add_events("07-20", ["1969: Apollo 11 lands on the Moon."], "openai")
+    added = store.add_events(
+        "07-20", ["1969: apollo 11 lands on the moon", "No year here"], "gemini"
+    )
+
+    assert added == []
+    assert store.count("07-20") == 1
+
+
+def test_events_are_separated_by_date(store):
+    store.add_events("07-20", ["1969: Apollo 11 lands on the Moon."], "openai")
+    store.add_events("07-21", ["1969: Armstrong walks on the Moon."], "openai")
+
+    assert store.count("07-20") == 1
+    assert store.count("07-21") == 1
+    assert store.get_events("01-01") == []
+
+
+def test_all_events(store):
+    store.add_events("07-21", ["1969: Armstrong walks on the Moon."], "openai")
+    store.add_events("07-20", ["1969: Apollo 11 lands.", "1944: Plot fails."], "openai")
+
+    assert [(e.month_day, e.year) for e in store.all_events()] == [
+        ("07-20", 1944),
+        ("07-20", 1969),
+        ("07-21", 1969),
+    ]
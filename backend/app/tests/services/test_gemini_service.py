@@ -1,3 +1,5 @@
+import asyncio
+import httpx
 import pytest
 import json
 from unittest.mock import MagicMock, patch, AsyncMock
@@ -43,17 +45,38 @@ def test_clean_gemini_response_empty_string(gemini_service):
 
 def test_convert_messages_to_genai_format_single(gemini_service):
     messages = [{"role": "user", "content": "Hello"}]
-    result = gemini_service._convert_messages_to_genai_format(messages)
-    assert result == "Hello"
+    system_instruction, contents = gemini_service._convert_messages_to_genai_format(
+        messages
+    )
+    assert system_instruction is None
+    assert len(contents) == 1
+    assert contents[0].role == "user"
+    assert contents[0].parts[0].text == "Hello"
 
 
 def test_convert_messages_to_genai_format_multiple(gemini_service):
     messages = [
         {"role": "user", "content": "Hello"},
-        {"role": "assistant", "content": "Hi there!"},
+        {"role": "model", "content": "Hi there!"},
+        {"role": "user", "content": "Tell me more"},
+    ]
+    _, contents = gemini_service._convert_messages_to_genai_format(messages)
+    assert [c.role for c in contents] == ["user", "model", "user"]
+    assert [c.parts[0].text for c in contents] == ["Hello", "Hi there!", "Tell me more"]
+
+
+def test_convert_messages_to_genai_format_system_instruction(gemini_service):
+    messages = [
+        {"role": "system", "content": "You are a historian."},
+        {"role": "system", "content": "Be brief."},
+        {"role": "user", "content": "July 20"},
     ]
-    result = gemini_service._convert_messages_to_genai_format(messages)
-    assert result == "Hello\nHi there!"
+    system_instruction, contents = gemini_service._convert_messages_to_genai_format(
+        messages
+    )
+    assert system_instruction == "You are a historian.\n\nBe brief."
+    assert len(contents) == 1
+    assert contents[0].parts[0].text == "July 20"
 
 
 @pytest.mark.asyncio
@@ -70,6 +93,49 @@ async def test_chat_completion_success(gemini_service):
     assert json.loads(result) == [{"event": "test3"}]
 
 
+@pytest.mark.asyncio
+async def test_chat_completion_sends_system_instruction(gemini_service):
+    mock_response = MagicMock()
+    mock_response.text = '["1969: Moon landing"]'
+    generate = AsyncMock(return_value=mock_response)
+    gemini_service.client.aio.models.generate_content = generate
+
+    messages = [
+        {"role": "system", "content": "You are a historian."},
+        {"role": "user", "content": "July 20"},
+    ]
+    await gemini_service.chat_completion(messages)
+
+    kwargs = generate.call_args.kwargs
+    assert kwargs["config"].system_instruction == "You are a historian."
+    assert [c.role for c in kwargs["contents"]] == ["user"]
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_structured_output(gemini_service):
+    mock_response = MagicMock()
+    mock_response.text = '{"events": ["1969: Moon landing"]}'
+    generate = AsyncMock(return_value=mock_response)
+    gemini_service.client.aio.models.generate_content = generate
+
+    schema = {
+        "type": "object",
+        "properties": {"events": {"type": "array", "items": {"type": "string"}}},
+        "required": ["events"],
+        "additionalProperties": False,
+    }
+    messages = [{"role": "user", "content": "July 20"}]
+    with patch.object(gemini_service, "clean_gemini_response") as mock_clean:
+        result = await gemini_service.chat_completion(messages, response_schema=schema)
+
+    config = generate.call_args.kwargs["config"]
+    assert config.response_mime_type == "application/json"
+    assert "additionalProperties" not in config.response_schema
+    assert config.response_schema["required"] == ["events"]
+    assert result == '{"events": ["1969: Moon landing"]}'
+    mock_clean.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_chat_completion_exception(gemini_service):
     gemini_service.client.aio.models.generate_content = AsyncMock(
@@ -79,3 +145,43 @@ async def test_chat_completion_exception(gemini_service):
     with pytest.raises(Exception) as excinfo:
         await gemini_service.chat_completion(messages)
     assert "Gemini API error" in str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_requests_go_through_the_shared_http_client():
+    # A real SDK client: HttpOptions.httpx_async_client needs google-genai 1.46
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={
+                "candidates": [
+                    {
+                        "content": {
+                            "role": "model",
+                            "parts": [{"text": '["1969: Moon landing"]'}],
+                        }
+                    }
+                ]
+            },
+        )
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        service = GeminiService(
+            api_key="fake-api-key", http_client=client, timeout=httpx.Timeout(30)
+        )
+        result = await service.chat_completion([{"role": "user", "content": "July 20"}])
+        # Closing the SDK client leaves the shared client open for others
+        await service.client.aio.aclose()
+        assert not client.is_closed
+        # The SDK schedules another close when collected; let it run
+        del service
+        await asyncio.sleep(0)
+
+    assert result == '["1969: Moon landing"]'
+    (request,) = requests
+    assert request.url.host == "generativelanguage.googleapis.com"
+    assert request.url.path.endswith("gemini-2.0-flash-001:generateContent")
+    assert request.headers["x-goog-api-key"] == "fake-api-key"
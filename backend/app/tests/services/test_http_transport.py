@@ -0,0 +1,102 @@
+import httpx
+import pytest
+
+from app.services import get_ai_service
+from app.services.http_transport import (
+    InstrumentedTransport,
+    TransportSettings,
+    create_http_client,
+    get_transport_settings,
+)
+from app.utils.metrics import get_metrics
+
+
+def make_settings(**overrides) -> TransportSettings:
+    values = dict(
+        http2=False,
+        max_connections=10,
+        max_keepalive_connections=5,
+        keepalive_expiry=60.0,
+        connect_timeout=2.0,
+        read_timeout=30.0,
+    )
+    values.update(overrides)
+    return TransportSettings(**values)
+
+
+def test_transport_settings_are_per_provider(monkeypatch):
+    monkeypatch.setenv("OPENAI_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("GEMINI_HTTP2", "false")
+    monkeypatch.setenv("UPSTREAM_CONNECT_TIMEOUT_SECONDS", "1.5")
+
+    openai_settings = get_transport_settings("openai")
+    gemini_settings = get_transport_settings("gemini")
+
+    assert openai_settings.max_connections == 7
+    assert openai_settings.http2 is True
+    assert gemini_settings.http2 is False
+    assert gemini_settings.max_connections == 100
+    assert openai_settings.timeout.connect == 1.5
+
+
+@pytest.mark.asyncio
+async def test_transport_applies_connect_timeout_and_counts_requests():
+    seen = []
+
+    def handler(request):
+        seen.append(request.extensions["timeout"])
+        return httpx.Response(200, json={"ok": True})
+
+    transport = InstrumentedTransport("openai", make_settings())
+    transport._transport = httpx.MockTransport(handler)
+
+    async with httpx.AsyncClient(transport=transport, timeout=60) as client:
+        await client.get("https://api.example.com/a")
+        await client.get("https://api.example.com/b")
+
+    assert seen[0]["connect"] == 2.0
+    assert seen[0]["read"] == 60
+    stats = transport.stats()
+    assert stats["requests"] == 2
+    assert stats["peak_in_flight"] == 1
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_trace_counts_new_connections_and_forwards_events():
+    forwarded = []
+
+    async def upstream(event, info):
+        forwarded.append(event)
+
+    transport = InstrumentedTransport("openai", make_settings())
+    await transport._trace("connection.connect_tcp.complete", {}, upstream)
+    await transport._trace("http11.send_request_headers.started", {}, upstream)
+
+    assert transport.connections_opened == 1
+    assert forwarded == [
+        "connection.connect_tcp.complete",
+        "http11.send_request_headers.started",
+    ]
+
+
+def test_create_http_client_registers_pool_metrics():
+    client = create_http_client("openai")
+
+    assert isinstance(client._transport, InstrumentedTransport)
+    snapshot = get_metrics().snapshot()["upstream.openai"]
+    assert snapshot["open_connections"] == 0
+    assert snapshot["utilization"] == 0.0
+
+
+def test_services_use_instrumented_clients():
+    openai_service = get_ai_service("openai", "test-key")
+    gemini_service = get_ai_service("gemini", "test-key")
+
+    assert isinstance(openai_service.client._client._transport, InstrumentedTransport)
+    gemini_api_client = gemini_service.client._api_client
+    assert isinstance(
+        gemini_api_client._async_httpx_client._transport, InstrumentedTransport
+    )
+    assert gemini_api_client._http_options.timeout == 60000
+    assert set(get_metrics().snapshot()) >= {"upstream.openai", "upstream.gemini"}
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 import openai
 from app.services.openai_service import OpenAIService
 
@@ -13,6 +13,11 @@ class TestOpenAIService:
         service = OpenAIService(api_key)
         assert service.client is not None
 
+    def test_init_with_base_url(self):
+        """Test pointing the client at an OpenAI-compatible server."""
+        service = OpenAIService("test-key", base_url="http://127.0.0.1:9100/v1")
+        assert str(service.client.base_url) == "http://127.0.0.1:9100/v1/"
+
     @pytest.mark.asyncio
     async def test_chat_completion_success(self):
         """Test successful chat completion."""
@@ -26,7 +31,10 @@ class TestOpenAIService:
         mock_response.choices[0].message.content = "Hello there!"
 
         with patch.object(
-            service.client.chat.completions, "create", return_value=mock_response
+            service.client.chat.completions,
+            "create",
+            new_callable=AsyncMock,
+            return_value=mock_response,
         ):
             result = await service.chat_completion(messages)
 
@@ -43,7 +51,10 @@ class TestOpenAIService:
         mock_response.choices[0].message.content = "Response"
 
         with patch.object(
-            service.client.chat.completions, "create", return_value=mock_response
+            service.client.chat.completions,
+            "create",
+            new_callable=AsyncMock,
+            return_value=mock_response,
         ) as mock_create:
             await service.chat_completion(
                 messages=messages, model="gpt-4", temperature=0.5, max_tokens=100
@@ -53,6 +64,30 @@ class TestOpenAIService:
                 model="gpt-4", messages=messages, temperature=0.5, max_tokens=100
             )
 
+    @pytest.mark.asyncio
+    async def test_chat_completion_structured_output(self):
+        """Test that a response schema is sent as a strict json_schema format."""
+        service = OpenAIService("test-key")
+        messages = [{"role": "user", "content": "Hello"}]
+        schema = {"type": "object", "properties": {}, "additionalProperties": False}
+
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = '{"events": []}'
+
+        with patch.object(
+            service.client.chat.completions,
+            "create",
+            new_callable=AsyncMock,
+            return_value=mock_response,
+        ) as mock_create:
+            await service.chat_completion(messages, response_schema=schema)
+
+        response_format = mock_create.call_args.kwargs["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["strict"] is True
+        assert response_format["json_schema"]["schema"] == schema
+
     @pytest.mark.asyncio
     async def test_chat_completion_empty_content(self):
         """Test handling of empty content response."""
@@ -64,7 +99,10 @@ class TestOpenAIService:
         mock_response.choices[0].message.content = None
 
         with patch.object(
-            service.client.chat.completions, "create", return_value=mock_response
+            service.client.chat.completions,
+            "create",
+            new_callable=AsyncMock,
+            return_value=mock_response,
         ):
             result = await service.chat_completion(messages)
 
@@ -0,0 +1,306 @@
+import asyncio
+import pytest
+
+from app.services.scheduler import (
+    BATCH,
+    INTERACTIVE,
+    REFRESH,
+    JobPreempted,
+    PriorityScheduler,
+    SchedulerFull,
+    current_lane,
+    lane,
+    promote,
+)
+
+WEIGHTS = {INTERACTIVE: 8, REFRESH: 2, BATCH: 1}
+
+
+def make_scheduler(limit=1, max_queue=16, weights=WEIGHTS):
+    return PriorityScheduler("test", limit=limit, max_queue=max_queue, weights=weights)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def queue_call(scheduler, lane_name, order):
+    async def call():
+        async with scheduler.slot(lane_name):
+            order.append(lane_name)
+
+    return asyncio.ensure_future(call())
+
+
+@pytest.mark.asyncio
+async def test_admits_immediately_under_limit():
+    scheduler = make_scheduler(limit=2)
+
+    await scheduler.acquire(INTERACTIVE)
+    await scheduler.acquire(BATCH)
+
+    assert scheduler.running == 2
+    assert scheduler.queued == 0
+    scheduler.release(INTERACTIVE)
+    scheduler.release(BATCH)
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_shares_slots_by_weight():
+    scheduler = make_scheduler(weights={INTERACTIVE: 3, REFRESH: 1, BATCH: 1})
+    await scheduler.acquire(INTERACTIVE)
+    order = []
+    tasks = [queue_call(scheduler, BATCH, order) for _ in range(2)]
+    tasks += [queue_call(scheduler, INTERACTIVE, order) for _ in range(6)]
+    await settle()
+
+    scheduler.release(INTERACTIVE)
+    await asyncio.gather(*tasks)
+
+    # Interactive gets three slots for each batch slot, but batch is not starved
+    assert order[:4].count(BATCH) == 1
+    assert order[4:8].count(BATCH) == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_lane_gets_no_credit():
+    scheduler = make_scheduler(weights={INTERACTIVE: 1, REFRESH: 1, BATCH: 1})
+    await scheduler.acquire(INTERACTIVE)
+    order = []
+
+    async def hold(lane_name):
+        await scheduler.acquire(lane_name)
+        order.append(lane_name)
+
+    tasks = [asyncio.ensure_future(hold(INTERACTIVE)) for _ in range(6)]
+    await settle()
+    for _ in range(3):
+        scheduler.release(INTERACTIVE)
+        await settle()
+
+    # Batch arrives after interactive ran alone for a while: it alternates
+    # from now on instead of taking every slot to catch up
+    tasks += [asyncio.ensure_future(hold(BATCH)) for _ in range(2)]
+    await settle()
+    for _ in range(4):
+        scheduler.release(order[-1])
+        await settle()
+
+    assert order == [INTERACTIVE] * 3 + [BATCH, INTERACTIVE, BATCH, INTERACTIVE]
+    for _ in range(2):
+        scheduler.release(order[-1])
+        await settle()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_preempts_newest_lowest_queued_call_when_full():
+    scheduler = make_scheduler(max_queue=2)
+    await scheduler.acquire(INTERACTIVE)
+    order = []
+    refresh = queue_call(scheduler, REFRESH, order)
+    first_batch = queue_call(scheduler, BATCH, order)
+    await settle()
+
+    interactive = queue_call(scheduler, INTERACTIVE, order)
+    await settle()
+    scheduler.release(INTERACTIVE)
+    await asyncio.gather(refresh, interactive)
+
+    with pytest.raises(JobPreempted):
+        await first_batch
+    assert order == [INTERACTIVE, REFRESH]
+    assert scheduler.stats()["lanes"][BATCH]["preempted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_full_of_equal_or_higher_priority():
+    scheduler = make_scheduler(max_queue=1)
+    await scheduler.acquire(INTERACTIVE)
+    waiting = queue_call(scheduler, INTERACTIVE, [])
+    await settle()
+
+    with pytest.raises(SchedulerFull):
+        await scheduler.acquire(BATCH)
+
+    assert scheduler.stats()["lanes"][BATCH]["rejected"] == 1
+    scheduler.release(INTERACTIVE)
+    await waiting
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    scheduler = make_scheduler()
+    await scheduler.acquire(INTERACTIVE)
+    waiting = queue_call(scheduler, REFRESH, [])
+    await settle()
+
+    waiting.cancel()
+    await settle()
+
+    assert scheduler.queued == 0
+    scheduler.release(INTERACTIVE)
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_release_skips_waiter_cancelled_before_it_resumed():
+    scheduler = make_scheduler()
+    await scheduler.acquire(INTERACTIVE)
+    waiting = queue_call(scheduler, REFRESH, [])
+    await settle()
+
+    # Released before the cancelled task got to leave the queue
+    waiting.cancel()
+    scheduler.release(INTERACTIVE)
+    await settle()
+
+    assert waiting.cancelled()
+    assert scheduler.running == 0
+    assert scheduler.queued == 0
+    await asyncio.wait_for(scheduler.acquire(INTERACTIVE), timeout=1)
+    scheduler.release(INTERACTIVE)
+
+
+@pytest.mark.asyncio
+async def test_preemption_skips_cancelled_waiters():
+    scheduler = make_scheduler(max_queue=2)
+    await scheduler.acquire(INTERACTIVE)
+    order = []
+    batch = queue_call(scheduler, BATCH, order)
+    cancelled = queue_call(scheduler, BATCH, order)
+    await settle()
+
+    # The interactive call arrives before the cancelled task leaves the queue
+    interactive = queue_call(scheduler, INTERACTIVE, order)
+    cancelled.cancel()
+    await settle()
+
+    with pytest.raises(JobPreempted):
+        await asyncio.wait_for(batch, timeout=1)
+    scheduler.release(INTERACTIVE)
+    await asyncio.wait_for(interactive, timeout=1)
+    assert order == [INTERACTIVE]
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_a_preempted_call_does_not_release_a_slot():
+    scheduler = make_scheduler(max_queue=1)
+    await scheduler.acquire(INTERACTIVE)
+    order = []
+    batch = queue_call(scheduler, BATCH, order)
+    await settle()
+
+    # Preempted, then cancelled before its task resumes
+    interactive = queue_call(scheduler, INTERACTIVE, order)
+    await asyncio.sleep(0)
+    batch.cancel()
+    await asyncio.gather(batch, return_exceptions=True)
+    await settle()
+
+    assert order == []
+    assert scheduler.running == 1
+    assert scheduler.stats()["lanes"][BATCH]["running"] == 0
+
+    scheduler.release(INTERACTIVE)
+    await asyncio.wait_for(interactive, timeout=1)
+    assert order == [INTERACTIVE]
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_promote_moves_queued_calls_to_the_higher_lane():
+    scheduler = make_scheduler(max_queue=2)
+    await scheduler.acquire(INTERACTIVE)
+    order = []
+    with lane(BATCH) as ref:
+        promoted = asyncio.ensure_future(_slot_in_context_lane(scheduler, order))
+    batch = queue_call(scheduler, BATCH, order)
+    await settle()
+
+    promote(ref, INTERACTIVE)
+    assert scheduler.stats()["lanes"][INTERACTIVE]["queued"] == 1
+
+    # The promoted call is no longer a batch call a new call can preempt
+    interactive = queue_call(scheduler, INTERACTIVE, order)
+    with pytest.raises(JobPreempted):
+        await asyncio.wait_for(batch, timeout=1)
+    scheduler.release(INTERACTIVE)
+    await asyncio.wait_for(asyncio.gather(promoted, interactive), timeout=1)
+
+    assert order == [INTERACTIVE, INTERACTIVE]
+    assert scheduler.running == 0
+    assert scheduler.stats()["lanes"][INTERACTIVE]["running"] == 0
+
+
+async def _slot_in_context_lane(scheduler, order):
+    async with scheduler.slot():
+        order.append(current_lane())
+
+
+def test_promote_never_lowers_a_lane():
+    with lane(REFRESH) as ref:
+        promote(ref, BATCH)
+        assert current_lane() == REFRESH
+        promote(ref, INTERACTIVE)
+        assert current_lane() == INTERACTIVE
+    assert current_lane() == INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_set_limit_admits_queued_calls():
+    scheduler = make_scheduler()
+    await scheduler.acquire(INTERACTIVE)
+    order = []
+    tasks = [queue_call(scheduler, BATCH, order) for _ in range(2)]
+    await settle()
+
+    scheduler.set_limit(3)
+    await asyncio.gather(*tasks)
+
+    assert order == [BATCH, BATCH]
+    assert scheduler.limit == 3
+
+
+@pytest.mark.asyncio
+async def test_stats_report_queue_waits():
+    now = [0.0]
+    scheduler = PriorityScheduler(
+        "test", limit=1, max_queue=4, weights=WEIGHTS, clock=lambda: now[0]
+    )
+    await scheduler.acquire(INTERACTIVE)
+    waiting = queue_call(scheduler, REFRESH, [])
+    await settle()
+
+    now[0] = 0.25
+    scheduler.release(INTERACTIVE)
+    await waiting
+
+    stats = scheduler.stats()
+    assert stats["lanes"][REFRESH]["wait_ms_max"] == 250.0
+    assert stats["lanes"][INTERACTIVE]["wait_ms_max"] == 0.0
+    assert stats["lanes"][REFRESH]["dispatched"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lane_context_is_inherited_by_tasks():
+    assert current_lane() == INTERACTIVE
+
+    with lane(BATCH):
+        inner = asyncio.ensure_future(_read_lane())
+
+    assert await inner == BATCH
+    assert current_lane() == INTERACTIVE
+
+
+async def _read_lane():
+    return current_lane()
+
+
+def test_unknown_lane_is_rejected():
+    with pytest.raises(ValueError):
+        with lane("urgent"):
+            pass
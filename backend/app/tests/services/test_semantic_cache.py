@@ -0,0 +1,269 @@
+import pytest
+
+from app.services.semantic_cache import (
+    HashingVectorizer,
+    SemanticCache,
+    negation_tokens,
+    normalize_prompt,
+    number_tokens,
+)
+
+SCOPE = ("openai", None, 0.7, None, ())
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(max_entries=100, threshold=0.85, clock=None, policy="tinylfu"):
+    return SemanticCache(
+        max_entries=max_entries,
+        threshold=threshold,
+        ttl_seconds=60,
+        dimensions=256,
+        clock=clock or FakeClock(),
+        policy=policy,
+    )
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "events on july 4",
+        "What happened July 4th?",
+        "What happened on the 4th of July?",
+        "Tell me the events of 07/04",
+    ],
+)
+def test_normalize_prompt_writes_dates_as_month_day(prompt):
+    assert normalize_prompt(prompt) == "07-04"
+
+
+def test_normalize_prompt_keeps_meaningful_words():
+    normalized = normalize_prompt("Tell me about the French Revolution in 1789!")
+
+    assert normalized == "french revolution 1789"
+    assert number_tokens(normalized) == ("1789",)
+
+
+def test_vectors_are_unit_length_and_similar_for_close_text():
+    vectorizer = HashingVectorizer(256)
+    a = vectorizer.transform("french revolution")
+    b = vectorizer.transform("french revolutions")
+    c = vectorizer.transform("moon landing")
+
+    assert a @ a == pytest.approx(1.0)
+    assert a @ b > 0.85
+    assert a @ c < 0.3
+    assert not vectorizer.transform("").any()
+
+
+def test_vectorizer_requires_power_of_two():
+    with pytest.raises(ValueError):
+        HashingVectorizer(300)
+
+
+def test_rephrased_prompt_hits():
+    cache = make_cache()
+    cache.store("events on july 4", SCOPE, '["1776: Independence"]')
+
+    match = cache.lookup("What happened July 4th?", SCOPE)
+
+    assert match.entry.response == '["1776: Independence"]'
+    assert match.similarity == pytest.approx(1.0)
+
+
+def test_different_numbers_or_scope_never_hit():
+    cache = make_cache(threshold=0.0)
+    cache.store("events on july 4", SCOPE, '["1776: Independence"]')
+
+    assert cache.lookup("events on july 5", SCOPE) is None
+    assert cache.lookup("events on july 4", ("gemini",) + SCOPE[1:]) is None
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("What happened on July 4?", "What happened in the US on July 4?"),
+        ("What happened in 1969?", "What happened in IT in 1969?"),
+        ("Tell me about World War I", "Tell me about World War II"),
+    ],
+)
+def test_prompts_differing_in_a_name_like_word_miss(stored, asked):
+    cache = make_cache()
+    cache.store(stored, SCOPE, "a")
+
+    assert cache.lookup(asked, SCOPE) is None
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("What happened in the US on July 4?", "What happened in the US on July 14?"),
+        ("What happened in France on July 14?", "What happened in Spain on July 14?"),
+        ("Who won the battle of Hastings?", "Who won the battle of Waterloo?"),
+    ],
+)
+def test_same_phrasing_about_another_date_or_entity_misses(stored, asked):
+    cache = make_cache()
+    cache.store(stored, SCOPE, "a")
+
+    assert cache.lookup(asked, SCOPE) is None
+
+
+@pytest.mark.parametrize(
+    "asked",
+    [
+        "events not in Europe on July 4",
+        "What happened on July 4 outside Europe?",
+        "Events on July 4 except in Europe",
+        "What didn't happen in Europe on July 4?",
+    ],
+)
+def test_negated_prompt_misses_the_plain_prompt(asked):
+    cache = make_cache()
+    cache.store("events in Europe on July 4", SCOPE, "a")
+
+    assert cache.lookup(asked, SCOPE) is None
+
+
+def test_negation_words_are_kept():
+    normalized = normalize_prompt("Wars that weren't fought in non-European countries")
+
+    assert negation_tokens(normalized) == ("non", "not")
+
+
+def test_dissimilar_prompt_misses():
+    cache = make_cache()
+    cache.store("tell me about the french revolution", SCOPE, "a")
+
+    assert cache.lookup("tell me about the french revolutions", SCOPE) is not None
+    assert cache.lookup("tell me about the russian revolution", SCOPE) is None
+
+
+def test_prompt_of_only_stop_words_is_not_cached():
+    cache = make_cache()
+    cache.store("What happened?", SCOPE, "a")
+
+    assert len(cache) == 0
+    assert cache.lookup("What happened?", SCOPE) is None
+
+
+def test_similar_prompt_replaces_entry():
+    cache = make_cache()
+    cache.store("events on july 4", SCOPE, "old")
+    cache.store("july 4th events", SCOPE, "new")
+
+    assert len(cache) == 1
+    assert cache.lookup("events on july 4", SCOPE).entry.response == "new"
+
+
+def test_expired_entries_miss():
+    clock = FakeClock()
+    cache = make_cache(clock=clock)
+    cache.store("events on july 4", SCOPE, "a")
+
+    clock.now = 61
+
+    assert cache.lookup("events on july 4", SCOPE) is None
+    assert len(cache) == 0
+
+
+def test_evicts_least_recently_used():
+    cache = make_cache(max_entries=3, policy="lru")
+    for day in range(1, 4):
+        cache.store(f"events on july {day}", SCOPE, str(day))
+    cache.lookup("events on july 1", SCOPE)
+
+    cache.store("events on july 9", SCOPE, "9")
+
+    assert cache.lookup("events on july 2", SCOPE) is None
+    assert cache.lookup("events on july 1", SCOPE).entry.response == "1"
+    assert cache.stats()["entries"] == 3
+
+
+def test_removal_keeps_partition_rows_consistent():
+    cache = make_cache(max_entries=20, policy="lru")
+    topics = [
+        f"battle of {place}" for place in "hastings waterloo verdun somme".split()
+    ]
+    for topic in topics:
+        cache.store(topic, SCOPE, topic)
+
+    # Evict the first topic so the last one moves into its row
+    for day in range(1, 18):
+        cache.store(f"events on july {day}", SCOPE, str(day))
+
+    assert cache.lookup("battle of hastings", SCOPE) is None
+    for topic in topics[1:]:
+        assert cache.lookup(topic, SCOPE).entry.response == topic
+
+
+def test_full_partition_evicts_its_least_recently_used_entry():
+    cache = SemanticCache(
+        max_entries=100,
+        threshold=0.85,
+        ttl_seconds=60,
+        dimensions=256,
+        max_partition_entries=2,
+    )
+    cache.store("battle of hastings", SCOPE, "hastings")
+    cache.store("battle of waterloo", SCOPE, "waterloo")
+    cache.store("events on july 4", SCOPE, "july 4")
+    cache.lookup("battle of hastings", SCOPE)
+
+    cache.store("battle of verdun", SCOPE, "verdun")
+
+    assert cache.lookup("battle of waterloo", SCOPE) is None
+    assert cache.lookup("battle of hastings", SCOPE) is not None
+    assert cache.lookup("events on july 4", SCOPE) is not None
+    assert cache.stats() == {"entries": 3, "partitions": 2, "largest_partition": 2}
+
+
+def test_tinylfu_keeps_hit_entries_through_one_off_prompts():
+    cache = make_cache(max_entries=10)
+    cache.store("events on july 4", SCOPE, "july 4")
+    for _ in range(3):
+        assert cache.lookup("What happened July 4th?", SCOPE) is not None
+
+    for i in range(30):
+        cache.store(f"battle number {i}", SCOPE, str(i))
+
+    assert cache.lookup("events on july 4", SCOPE).entry.response == "july 4"
+    assert len(cache) == 10
+
+
+def test_tinylfu_admits_a_prompt_that_keeps_missing():
+    cache = make_cache(max_entries=10)
+    for i in range(10):
+        assert cache.lookup(f"battle number {i}", SCOPE) is None
+        cache.store(f"battle number {i}", SCOPE, str(i))
+
+    for i in range(10, 13):
+        if cache.lookup("events on july 4", SCOPE) is None:
+            cache.store("events on july 4", SCOPE, "july 4")
+        # A one-off prompt pushes it out of the window, into admission
+        cache.store(f"battle number {i}", SCOPE, str(i))
+
+    assert cache.lookup("events on july 4", SCOPE).entry.response == "july 4"
+
+
+def test_tinylfu_evicts_expired_entries_first():
+    clock = FakeClock()
+    cache = make_cache(max_entries=10, clock=clock)
+    for i in range(10):
+        cache.store(f"battle number {i}", SCOPE, str(i))
+        for _ in range(3):
+            cache.lookup(f"battle number {i}", SCOPE)
+
+    clock.now = 61
+    for i in range(10, 15):
+        cache.store(f"battle number {i}", SCOPE, str(i))
+
+    for i in range(10, 14):
+        assert cache.lookup(f"battle number {i}", SCOPE).entry.response == str(i)
+    assert len(cache) == 5
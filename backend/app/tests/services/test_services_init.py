@@ -7,7 +7,7 @@ import pytest
 from unittest.mock import patch, Mock
 from fastapi import HTTPException
 
-from app.services import get_ai_service, get_service
+from app.services import get_ai_service, get_configured_providers, get_service
 from app.services.ai_service import AIService
 from app.models.chat import ChatRequest, ChatMessage
 
@@ -43,6 +43,15 @@ class TestGetAIService:
         with pytest.raises(ValueError, match="Unknown AI provider: invalid"):
             get_ai_service("invalid", "test-key")
 
+    def test_get_ai_service_reuses_instances(self):
+        """Test that services (and their HTTP clients) are long-lived."""
+        assert get_ai_service("openai", "test-key") is get_ai_service(
+            "OpenAI", "test-key"
+        )
+        assert get_ai_service("openai", "test-key") is not get_ai_service(
+            "openai", "other-key"
+        )
+
 
 class TestGetService:
     """Test the request-based service factory function."""
@@ -240,3 +249,12 @@ class TestGetService:
                         "openai", "test-openai-key"
                     )
                     assert result == mock_service
+
+
+class TestGetConfiguredProviders:
+    """Test detection of configured providers."""
+
+    def test_only_providers_with_keys(self):
+        settings = Mock(openai_api_key="", gemini_api_key="key")
+        with patch("app.services.get_settings", return_value=settings):
+            assert get_configured_providers() == ["gemini"]
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.services.warmup import StartupState, warm_up_providers
+
+
+def make_service(warm_up):
+    service = Mock()
+    service.warm_up = warm_up
+    return service
+
+
+@pytest.mark.asyncio
+async def test_warm_up_marks_providers_warm_and_failed():
+    services = {
+        "openai": make_service(AsyncMock()),
+        "gemini": make_service(AsyncMock(side_effect=Exception("bad key"))),
+    }
+
+    with patch(
+        "app.services.warmup.get_configured_providers",
+        return_value=["openai", "gemini"],
+    ):
+        with patch(
+            "app.services.warmup.get_ai_service",
+            side_effect=lambda provider, api_key: services[provider],
+        ):
+            state = await warm_up_providers(StartupState(), timeout=1)
+
+    assert state.ready
+    assert state.providers["openai"].status == "warm"
+    assert state.providers["gemini"].status == "failed"
+    assert state.providers["gemini"].error == "bad key"
+    assert state.providers["openai"].duration_ms >= 0
+
+
+@pytest.mark.asyncio
+async def test_warm_up_times_out():
+    async def hang():
+        await asyncio.sleep(10)
+
+    with patch("app.services.warmup.get_configured_providers", return_value=["openai"]):
+        with patch(
+            "app.services.warmup.get_ai_service", return_value=make_service(hang)
+        ):
+            state = await warm_up_providers(StartupState(), timeout=0.01)
+
+    assert not state.ready
+    assert state.providers["openai"].status == "failed"
+
+
+@pytest.mark.asyncio
+async def test_warm_up_skips_warm_providers():
+    state = StartupState()
+    warm_up = AsyncMock()
+
+    with patch("app.services.warmup.get_configured_providers", return_value=["openai"]):
+        with patch(
+            "app.services.warmup.get_ai_service", return_value=make_service(warm_up)
+        ):
+            await warm_up_providers(state, timeout=1)
+            await warm_up_providers(state, timeout=1)
+
+    warm_up.assert_awaited_once()
+
+
+def test_not_ready_without_providers():
+    state = StartupState()
+    state.finished = True
+    assert not state.ready
@@ -0,0 +1,76 @@
+"""
+Import-time benchmark for the application module.
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter
+and checks that provider SDKs stay out of the startup path.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+SDK_MODULES = ["openai", "google.genai"]
+
+
+def measure_import_time(module: str):
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        Dictionary of imported module name -> cumulative import time in microseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+@pytest.fixture(scope="module")
+def app_import_timings():
+    return measure_import_time("app.main")
+
+
+def test_app_import_does_not_load_provider_sdks(app_import_timings):
+    for sdk in SDK_MODULES:
+        assert sdk not in app_import_timings, f"{sdk} is imported at startup"
+
+
+def test_app_import_time_report(app_import_timings):
+    total_ms = app_import_timings["app.main"] / 1000
+    slowest = sorted(app_import_timings.items(), key=lambda item: -item[1])[:5]
+    print(f"\napp.main import: {total_ms:.1f} ms")
+    for name, microseconds in slowest:
+        print(f"  {name}: {microseconds / 1000:.1f} ms")
+    assert total_ms > 0
+
+
+def test_provider_sdk_loaded_on_first_use():
+    timings = measure_import_time("app.services")
+    assert "openai" not in timings
+
+    code = (
+        "import sys; from app.services import get_ai_service; "
+        "get_ai_service('openai', 'test-key'); "
+        "assert 'openai' in sys.modules; assert 'google.genai' not in sys.modules"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+        check=True,
+    )
@@ -0,0 +1,135 @@
+import pytest
+
+from app.utils.cache_policy import (
+    FrequencySketch,
+    LRUPolicy,
+    WTinyLFUPolicy,
+    make_policy,
+)
+
+
+def fill(policy, keys, requests=1):
+    evicted = []
+    for key in keys:
+        for _ in range(requests):
+            policy.record(key)
+        evicted += policy.insert(key)
+    return evicted
+
+
+def test_lru_evicts_least_recently_used():
+    policy = LRUPolicy(2)
+    assert fill(policy, ["a", "b"]) == []
+    policy.touch("a")
+
+    assert policy.insert("c") == ["b"]
+    assert len(policy) == 2
+
+
+def test_sketch_estimates_and_ages_frequencies():
+    sketch = FrequencySketch(16)
+    for _ in range(5):
+        sketch.increment("popular")
+    sketch.increment("rare")
+
+    assert sketch.frequency("popular") == 5
+    assert sketch.frequency("rare") == 1
+    assert sketch.frequency("never") == 0
+
+    # Reaching 10 × capacity counts halves every counter
+    sketch.additions = sketch.sample_size - 1
+    sketch.increment("rare")
+    assert sketch.frequency("popular") == 2
+    assert sketch.frequency("rare") == 1
+    assert sketch.additions == sketch.sample_size // 2
+
+
+def test_sketch_counters_saturate():
+    sketch = FrequencySketch(16)
+    for _ in range(40):
+        sketch.increment("key")
+    assert sketch.frequency("key") == 15
+
+
+def replay(policy, trace):
+    cached = set()
+    for key in trace:
+        policy.record(key)
+        if key in cached:
+            policy.touch(key)
+        else:
+            cached.add(key)
+            cached -= set(policy.insert(key))
+    return cached
+
+
+def test_tinylfu_keeps_popular_keys_through_one_off_keys():
+    popular = [f"date-{i}" for i in range(50)]
+    trace = popular * 3 + [f"prompt-{i}" for i in range(500)]
+
+    lru = replay(LRUPolicy(100), trace)
+    tinylfu = replay(WTinyLFUPolicy(100), trace)
+
+    assert not lru & set(popular)
+    # A one-off key colliding with popular ones in every row of the sketch
+    # can still win admission, rarely
+    assert len(tinylfu & set(popular)) >= 45
+    assert len(tinylfu) == 100
+
+
+def test_tinylfu_admits_keys_more_frequent_than_the_victim():
+    policy = WTinyLFUPolicy(3)  # Window of 1, main of 2
+    assert fill(policy, ["a", "b", "c"]) == []
+
+    # "d" pushes "c" out of the window; it is no more frequent than "a"
+    assert fill(policy, ["d"]) == ["c"]
+
+    # "e" pushes "d" out of the window, and "d" was requested more than "a"
+    for _ in range(3):
+        policy.record("d")
+    assert fill(policy, ["e"]) == ["a"]
+    assert len(policy) == 3
+
+
+def test_tinylfu_evicts_expired_keys_before_comparing():
+    expired = set()
+    policy = WTinyLFUPolicy(3, is_expired=expired.__contains__)
+    fill(policy, ["a", "b", "c"])
+    for _ in range(3):
+        policy.record("a")
+        policy.record("b")
+
+    # "a" is far more frequent than "c", but no longer worth keeping
+    expired.add("a")
+    assert fill(policy, ["d"]) == ["a"]
+    assert len(policy) == 3
+
+
+def test_tinylfu_remove_and_clear():
+    policy = WTinyLFUPolicy(10)
+    fill(policy, ["a", "b", "c"])
+    policy.touch("a")
+
+    policy.remove("a")
+    policy.remove("missing")
+    assert len(policy) == 2
+
+    policy.clear()
+    assert len(policy) == 0
+    assert policy.sketch.frequency("b") == 0
+
+
+def test_tinylfu_with_capacity_one():
+    policy = WTinyLFUPolicy(1)
+    assert fill(policy, ["a"]) == []
+    assert fill(policy, ["b"]) == ["a"]
+    assert len(policy) == 1
+
+
+def test_make_policy():
+    assert isinstance(make_policy("LRU", 4), LRUPolicy)
+    assert isinstance(make_policy("tinylfu", 4), WTinyLFUPolicy)
+    with pytest.raises(ValueError):
+        make_policy("fifo", 4)
+    with pytest.raises(ValueError):
+        make_policy("lru", 0)
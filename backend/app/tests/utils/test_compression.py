@@ -0,0 +1,115 @@
+import asyncio
+import gzip
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import compression
+from app.utils.compression import (
+    PrecompressedBody,
+    available_encodings,
+    compress,
+    is_compressible,
+    negotiate_encoding,
+)
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "br":
+        return compression.brotli.decompress(body)
+    return compression.zstandard.ZstdDecompressor().decompress(body)
+
+
+def test_gzip_is_always_available():
+    assert "gzip" in available_encodings()
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("GZIP, deflate", "gzip"),
+        ("gzip;q=0", None),
+        ("gzip;q=0.5, *;q=0.1", "gzip"),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_negotiate_prefers_server_order_on_ties():
+    assert negotiate_encoding("gzip, br, zstd") == available_encodings()[0]
+
+
+def test_negotiate_honours_client_quality():
+    assert negotiate_encoding("zstd;q=0.1, br;q=0.2, gzip;q=0.9") == "gzip"
+
+
+def test_negotiate_wildcard():
+    assert negotiate_encoding("*") == available_encodings()[0]
+
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_compress_round_trip(encoding):
+    body = b'["1969: Apollo 11 lands on the Moon."]' * 50
+    for static in (False, True):
+        compressed = compress(body, encoding, static=static)
+        assert len(compressed) < len(body)
+        assert decompress(compressed, encoding) == body
+
+
+def test_compress_unknown_encoding():
+    with pytest.raises(ValueError, match="Unsupported"):
+        compress(b"body", "deflate")
+
+
+def test_is_compressible():
+    assert is_compressible("application/json")
+    assert is_compressible("text/plain; charset=utf-8")
+    assert not is_compressible("image/png")
+    assert not is_compressible(None)
+
+
+@pytest.mark.asyncio
+async def test_precompressed_body_compresses_once_per_encoding():
+    body = PrecompressedBody(b"x" * 2048, min_size=1024)
+
+    with patch.object(compression, "compress", wraps=compress) as mock_compress:
+        first = await body.get("gzip")
+        second = await body.get("gzip")
+
+    assert first == second
+    assert first[0] == "gzip"
+    assert gzip.decompress(first[1]) == b"x" * 2048
+    mock_compress.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_precompressed_body_compresses_off_the_event_loop():
+    body = PrecompressedBody(b"x" * 2048, min_size=1024)
+    threads = []
+
+    def tracking_compress(*args):
+        threads.append(threading.current_thread())
+        return compress(*args)
+
+    with patch.object(compression, "compress", side_effect=tracking_compress):
+        results = await asyncio.gather(*(body.get("gzip") for _ in range(5)))
+
+    assert len(set(results)) == 1
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
+
+
+@pytest.mark.asyncio
+async def test_precompressed_body_skips_small_bodies():
+    body = PrecompressedBody(b"small", min_size=1024)
+
+    assert await body.get("gzip") == (None, b"small")
+    assert await body.get(None) == (None, b"small")
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.utils.disconnect import ClientDisconnected, cancel_on_disconnect
+from app.utils.metrics import get_metrics
+
+
+def make_request(disconnect: asyncio.Event) -> Request:
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "method": "GET", "path": "/api/chat", "headers": []}
+    return Request(scope, receive)
+
+
+@pytest.mark.asyncio
+async def test_returns_result_when_client_stays():
+    request = make_request(asyncio.Event())
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "events"
+
+    assert await cancel_on_disconnect(request, work()) == "events"
+
+
+@pytest.mark.asyncio
+async def test_cancels_work_when_client_disconnects():
+    disconnect = asyncio.Event()
+    request = make_request(disconnect)
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    asyncio.get_running_loop().call_later(0.01, disconnect.set)
+    with pytest.raises(ClientDisconnected):
+        await cancel_on_disconnect(request, work())
+
+    assert cancelled.is_set()
+    assert get_metrics().counter("requests.disconnected") == 1
+
+
+@pytest.mark.asyncio
+async def test_work_errors_propagate():
+    request = make_request(asyncio.Event())
+
+    async def work():
+        raise ValueError("provider failed")
+
+    with pytest.raises(ValueError, match="provider failed"):
+        await cancel_on_disconnect(request, work())
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_caller_cancels_the_work():
+    request = make_request(asyncio.Event())
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(cancel_on_disconnect(request, work()))
+    await asyncio.sleep(0.01)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    await asyncio.sleep(0)
+
+    assert cancelled.is_set()
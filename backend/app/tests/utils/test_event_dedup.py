@@ -0,0 +1,98 @@
+from app.utils import event_dedup
+
+
+def test_normalize_event_text():
+    assert (
+        event_dedup.normalize_event_text("  1969: Apollo 11   lands!  ")
+        == "1969 apollo 11 lands"
+    )
+
+
+def test_merge_event_lists_drops_repeats_and_keeps_order():
+    merged = event_dedup.merge_event_lists(
+        [
+            ["1969: Moon landing", "1215: Magna Carta"],
+            ["1969: moon landing.", "1976: Viking 1 lands"],
+        ]
+    )
+    assert merged == ["1969: Moon landing", "1215: Magna Carta", "1976: Viking 1 lands"]
+
+
+def test_merge_event_lists_skips_empty_events():
+    assert event_dedup.merge_event_lists([["", "!!"], ["1914: War"]]) == ["1914: War"]
+
+
+def test_parse_event():
+    assert event_dedup.parse_event("1969: Apollo 11 lands") == (
+        "1969",
+        "Apollo 11 lands",
+    )
+    assert event_dedup.parse_event("44 bc: Caesar is killed") == (
+        "44 BC",
+        "Caesar is killed",
+    )
+    assert event_dedup.parse_event("Not an event") == (None, "Not an event")
+
+
+def test_event_shingles_strip_stop_words_and_suffixes():
+    assert event_dedup.event_shingles("The landing on the Moon") == frozenset(
+        {"land", "moon"}
+    )
+
+
+def test_minhash_signature_estimates_similarity():
+    first = event_dedup.event_shingles("Apollo 11 lands the first humans on the Moon")
+    second = event_dedup.event_shingles("Apollo 11 lands humans on the Moon")
+    sig_a = event_dedup.minhash_signature(first)
+    sig_b = event_dedup.minhash_signature(second)
+    assert sig_a == event_dedup.minhash_signature(first)
+    agreement = sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+    assert agreement > 0.4
+
+
+def test_dedupe_events_groups_by_year():
+    events = [
+        "1969: Apollo 11 lands the first humans on the Moon.",
+        "1215: Magna Carta is sealed.",
+        "1969: First Moon landing by Apollo 11",
+        "1970: First Moon landing anniversary",
+        "1969: Woodstock festival begins",
+    ]
+    assert event_dedup.dedupe_events(events) == [
+        "1969: Apollo 11 lands the first humans on the Moon.",
+        "1215: Magna Carta is sealed.",
+        "1970: First Moon landing anniversary",
+        "1969: Woodstock festival begins",
+    ]
+
+
+def test_dedupe_events_leaves_free_text_alone():
+    events = ["Hello there", "Hello there friend", "hello there!"]
+    assert event_dedup.dedupe_events(events) == ["Hello there", "Hello there friend"]
+
+
+def test_dedupe_events_scales_to_large_lists():
+    events = [
+        f"{1000 + i % 900}: Treaty {i} signed in city{i} by ruler{i}"
+        for i in range(5000)
+    ]
+    assert event_dedup.dedupe_events(events + events[:100]) == events
+
+
+def test_dedupe_response_returns_same_string_without_duplicates():
+    response = '["1969: Moon landing", "1215: Magna Carta"]'
+    assert event_dedup.dedupe_response(response) is response
+
+
+def test_merge_event_lists_with_threshold():
+    merged = event_dedup.merge_event_lists(
+        [
+            ["1969: Apollo 11 lands on the Moon"],
+            ["1969: Apollo 11 Moon landing", "1976: Viking 1 lands on Mars"],
+        ],
+        threshold=0.5,
+    )
+    assert merged == [
+        "1969: Apollo 11 lands on the Moon",
+        "1976: Viking 1 lands on Mars",
+    ]
@@ -0,0 +1,57 @@
+import pytest
+
+from app.utils.event_packing import SEPARATOR, Codec, EventCodec, EventTable
+
+PLACES = ["Paris", "Kyoto", "Lima", "Cairo", "Delhi", "Vienna", "Accra", "Quebec"]
+
+
+def sample_events(count):
+    return [
+        f"{1800 + i}: Treaty of {PLACES[i % len(PLACES)]} is signed, "
+        f"ending the war number {i}."
+        for i in range(count)
+    ]
+
+
+def test_table_round_trip():
+    codec = Codec()
+    events = ["1969: Apollo 11 lands on the Moon.", "1976: Viking 1 lands on Mars ü"]
+
+    assert EventTable.pack(events, codec).unpack() == events
+    assert EventTable.pack(["only one"], codec).unpack() == ["only one"]
+    assert EventTable.pack([], codec).unpack() == []
+
+
+def test_table_rejects_separator_in_events():
+    with pytest.raises(ValueError):
+        EventTable.pack(["a", f"b{SEPARATOR}c"], Codec())
+
+    # A single item is stored whole
+    single = f"b{SEPARATOR}c"
+    assert EventTable.pack([single], Codec()).unpack() == [single]
+
+
+def test_codec_trains_dictionary_after_enough_events():
+    codec = EventCodec(dictionary_size=4096, training_events=500)
+    before = codec.current
+    table = EventTable.pack(sample_events(20), before)
+
+    codec.observe(sample_events(400))
+    assert codec.current is before
+    codec.observe(sample_events(200))
+
+    assert codec.current is not before
+    assert 0 < codec.dictionary_bytes <= 4096
+    # Tables packed before training stay readable
+    assert table.unpack() == sample_events(20)
+    trained = EventTable.pack(sample_events(20), codec.current)
+    assert trained.unpack() == sample_events(20)
+    assert len(trained.blob) < len(table.blob)
+
+
+def test_codec_without_dictionary_never_trains():
+    codec = EventCodec(dictionary_size=0, training_events=10)
+
+    codec.observe(sample_events(100))
+
+    assert codec.dictionary_bytes == 0
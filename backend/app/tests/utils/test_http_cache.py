@@ -0,0 +1,26 @@
+from app.utils import http_cache
+
+
+def test_make_etag_is_quoted_and_stable():
+    etag = http_cache.make_etag("openai", '["1969: Moon landing"]')
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == http_cache.make_etag("openai", '["1969: Moon landing"]')
+    assert etag != http_cache.make_etag("gemini", '["1969: Moon landing"]')
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert http_cache.etag_matches('"abc"', etag)
+    assert http_cache.etag_matches('"x", "abc"', etag)
+    assert http_cache.etag_matches('W/"abc"', etag)
+    assert http_cache.etag_matches("*", etag)
+    assert not http_cache.etag_matches('"abd"', etag)
+    assert not http_cache.etag_matches(None, etag)
+
+
+def test_cache_control_header():
+    assert (
+        http_cache.cache_control_header(300, 86400)
+        == "public, max-age=300, stale-while-revalidate=86400"
+    )
+    assert http_cache.cache_control_header(60, 0) == "public, max-age=60"
@@ -0,0 +1,28 @@
+from app.utils.metrics import Metrics
+
+
+def test_counters_accumulate():
+    metrics = Metrics()
+    metrics.increment("requests")
+    metrics.increment("requests", 2)
+
+    assert metrics.counter("requests") == 3
+    assert metrics.counter("missing") == 0
+    assert metrics.snapshot()["counters"] == {"requests": 3}
+
+
+def test_collectors_are_read_on_snapshot():
+    metrics = Metrics()
+    state = {"open": 1}
+    metrics.register("pool", lambda: dict(state))
+
+    state["open"] = 2
+    assert metrics.snapshot()["pool"] == {"open": 2}
+
+
+def test_register_replaces_collector():
+    metrics = Metrics()
+    metrics.register("pool", lambda: {"version": 1})
+    metrics.register("pool", lambda: {"version": 2})
+
+    assert metrics.snapshot()["pool"] == {"version": 2}
@@ -0,0 +1,53 @@
+import os
+import time
+from app.utils import profiling
+
+
+def _busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampling_profiler_collects_collapsed_stacks():
+    profiler = profiling.SamplingProfiler(interval=0.001)
+    profiler.start()
+    _busy_wait(0.05)
+    profiler.stop()
+
+    collapsed = profiler.collapsed()
+    assert collapsed
+    first_line = collapsed.splitlines()[0]
+    stack, count = first_line.rsplit(" ", 1)
+    assert int(count) > 0
+    assert "_busy_wait" in collapsed
+    assert ";" in stack
+
+
+def test_should_profile_disabled():
+    assert not profiling.should_profile({"X-Profile": "1"}, False, "X-Profile", 1.0)
+
+
+def test_should_profile_header():
+    assert profiling.should_profile({"X-Profile": "true"}, True, "X-Profile", 0.0)
+
+
+def test_should_profile_sample_rate():
+    assert profiling.should_profile({}, True, "X-Profile", 1.0)
+    assert not profiling.should_profile({}, True, "X-Profile", 0.0)
+
+
+def test_save_profile_prunes_oldest(tmp_path):
+    directory = str(tmp_path)
+    names = [
+        profiling.save_profile(directory, "chat", f"main {i}\n", max_files=2)
+        for i in range(4)
+    ]
+
+    profiles = profiling.list_profiles(directory)
+    assert [p["name"] for p in profiles] == [names[3], names[2]]
+    assert not os.path.exists(os.path.join(directory, names[0]))
+
+
+def test_list_profiles_missing_directory(tmp_path):
+    assert profiling.list_profiles(str(tmp_path / "missing")) == []
@@ -0,0 +1,75 @@
+import pytest
+from app.utils import prompt_templates
+
+
+def test_get_template_valid():
+    template = prompt_templates.get_template("historian")
+    assert "system" in template
+    assert "{date}" in template["user"]
+
+
+def test_get_template_invalid():
+    with pytest.raises(ValueError):
+        prompt_templates.get_template("unknown")
+
+
+def test_get_supported_templates():
+    assert "historian" in prompt_templates.get_supported_templates()
+
+
+@pytest.mark.parametrize("month_day,expected", [("07-20", (7, 20)), ("02-29", (2, 29))])
+def test_parse_month_day_valid(month_day, expected):
+    assert prompt_templates.parse_month_day(month_day) == expected
+
+
+@pytest.mark.parametrize("month_day", ["7-20", "07/20", "13-01", "02-30", "ab-cd", ""])
+def test_parse_month_day_invalid(month_day):
+    with pytest.raises(ValueError):
+        prompt_templates.parse_month_day(month_day)
+
+
+def test_build_messages():
+    messages = prompt_templates.build_messages("historian", "07-20")
+    assert [m["role"] for m in messages] == ["system", "user"]
+    assert messages[0]["content"] == prompt_templates.HISTORIAN_SYSTEM_PROMPT
+    assert messages[1]["content"] == "List top historic events that occurred on 07-20"
+
+
+@pytest.mark.parametrize(
+    "month_day,radius,expected",
+    [
+        ("07-20", 1, ["07-21", "07-19"]),
+        ("07-20", 2, ["07-21", "07-19", "07-22", "07-18"]),
+        ("12-31", 1, ["01-01", "12-30"]),
+        ("01-01", 1, ["01-02", "12-31"]),
+        ("02-28", 1, ["02-29", "02-27"]),
+        ("03-01", 1, ["03-02", "02-29"]),
+    ],
+)
+def test_adjacent_dates(month_day, radius, expected):
+    assert prompt_templates.adjacent_dates(month_day, radius) == expected
+
+
+def test_adjacent_dates_invalid():
+    with pytest.raises(ValueError):
+        prompt_templates.adjacent_dates("13-01")
+
+
+@pytest.mark.parametrize(
+    "start,end,expected",
+    [
+        ("07-20", "07-20", ["07-20"]),
+        ("02-28", "03-01", ["02-28", "02-29", "03-01"]),
+        ("12-31", "01-02", ["12-31", "01-01", "01-02"]),
+    ],
+)
+def test_date_range(start, end, expected):
+    assert prompt_templates.date_range(start, end) == expected
+
+
+def test_date_range_covers_the_whole_year():
+    assert len(prompt_templates.date_range("01-01", "12-31")) == 366
+
+    # Wrapping all the way round keeps 02-29
+    wrapped = prompt_templates.date_range("02-28", "02-27")
+    assert len(wrapped) == 366 and wrapped[1] == "02-29"
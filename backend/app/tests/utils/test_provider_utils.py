@@ -64,14 +64,25 @@ def test_normalize_messages_for_provider_gemini():
         {"role": "tool", "content": "Tool message"},
     ]
     norm = provider_utils.normalize_messages_for_provider(messages, "gemini")
-    assert norm[0]["role"] == "user"
-    assert "System: System info" in norm[0]["content"]
+    assert norm[0] == {"role": "system", "content": "System info"}
     assert norm[1]["role"] == "user"
     assert norm[2]["role"] == "model"
     assert norm[3]["role"] == "user"
     assert "[Tool]:" in norm[3]["content"]
 
 
+def test_normalize_messages_for_gemini_developer_role_is_system():
+    messages = [
+        {"role": "developer", "content": "You are a historian"},
+        {"role": "user", "content": "Hello"},
+    ]
+    norm = provider_utils.normalize_messages_for_provider(messages, "gemini")
+    assert norm == [
+        {"role": "system", "content": "You are a historian"},
+        {"role": "user", "content": "Hello"},
+    ]
+
+
 def test_normalize_messages_for_provider_unknown(caplog):
     messages = [{"role": "user", "content": "Hello"}]
     norm = provider_utils.normalize_messages_for_provider(messages, "unknown")
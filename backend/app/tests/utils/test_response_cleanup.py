@@ -1,6 +1,7 @@
 import pytest
 import json
 from app.utils import response_cleanup
+from app.utils.metrics import get_metrics
 
 
 @pytest.mark.parametrize(
@@ -140,3 +141,29 @@ def test_validate_response_format_invalid():
     assert not response_cleanup.validate_response_format(invalid)
     invalid2 = "not a json"
     assert not response_cleanup.validate_response_format(invalid2)
+
+
+def test_clean_ai_response_unwraps_structured_output():
+    result = response_cleanup.clean_ai_response(
+        '{"events": ["1969: Moon landing", " 1989: Berlin Wall falls "]}', "openai"
+    )
+    assert json.loads(result) == ["1969: Moon landing", "1989: Berlin Wall falls"]
+    assert get_metrics().counter("cleanup.fast_path") == 1
+    assert get_metrics().counter("cleanup.fallback") == 0
+
+
+def test_parse_json_events_rejects_other_json():
+    assert response_cleanup.parse_json_events('{"items": ["a"]}') is None
+    assert response_cleanup.parse_json_events('"just text"') is None
+    assert response_cleanup.parse_json_events("not json") is None
+
+
+def test_clean_ai_response_counts_fallbacks():
+    response_cleanup.clean_ai_response("Here are the events: 1. First event\n2. Second")
+    response_cleanup.clean_ai_response('```json\n["Event 1"]\n```')
+
+    metrics = get_metrics()
+    assert metrics.counter("cleanup.fallback") == 2
+    assert metrics.counter("cleanup.fallback.text_list") == 1
+    assert metrics.counter("cleanup.fallback.extract") == 1
+    assert metrics.counter("cleanup.fast_path") == 0
@@ -0,0 +1,33 @@
+import asyncio
+from app.utils import timing
+
+
+def test_stage_timer_accumulates_repeated_stages():
+    timer = timing.StageTimer()
+    timer.add("upstream", 1.5)
+    timer.add("cleanup", 0.25)
+    timer.add("upstream", 2.0)
+
+    assert timer.as_dict() == {"upstream": 3.5, "cleanup": 0.25}
+    assert timer.server_timing_header() == "upstream;dur=3.500, cleanup;dur=0.250"
+
+
+def test_record_stage_without_timer_is_noop():
+    async def run():
+        with timing.record_stage("cleanup"):
+            pass
+        return timing.get_request_timer()
+
+    assert asyncio.run(run()) is None
+
+
+def test_record_stage_uses_current_timer():
+    async def run():
+        timer = timing.start_request_timer()
+        with timing.record_stage("normalize"):
+            pass
+        return timer
+
+    timer = asyncio.run(run())
+    assert "normalize" in timer.durations
+    assert timer.durations["normalize"] >= 0
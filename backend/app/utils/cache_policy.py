@@ -0,0 +1,277 @@
+"""
+Cache admission and eviction policies.
+A cache keeps its values in a dict and lets a policy decide which keys
+stay. LRU keeps the most recently used keys. W-TinyLFU also weighs how
+often keys are requested, so a burst of keys requested once (free-form
+prompts, a batch of rarely asked dates) does not flush popular ones.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional
+
+# Odd 64-bit constants, one per row of the frequency sketch
+_SEEDS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+    0xD6E8FEB86659FD93,
+)
+_MASK64 = (1 << 64) - 1
+
+# Counters saturate here, as the 4-bit counters of the TinyLFU paper do
+_MAX_COUNT = 15
+
+
+class CachePolicy(ABC):
+    """
+    Decides which keys a cache of at most capacity keys holds.
+    The cache reports requests, hits and insertions, and drops the keys
+    insert() returns. If it gives is_expired, keys it would drop as
+    expired anyway may be evicted first.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        is_expired: Optional[Callable[[Hashable], bool]] = None,
+    ):
+        if capacity < 1:
+            raise ValueError(f"Cache capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.is_expired = is_expired or (lambda key: False)
+
+    def record(self, key: Hashable) -> None:
+        """
+        Count a client request for a key, whether it is cached or not.
+        """
+
+    @abstractmethod
+    def touch(self, key: Hashable) -> None:
+        """
+        Mark a cached key as used.
+        """
+
+    @abstractmethod
+    def insert(self, key: Hashable) -> List[Hashable]:
+        """
+        Add a key that is not cached.
+
+        Returns:
+            Keys the cache must drop to stay within capacity
+        """
+
+    @abstractmethod
+    def remove(self, key: Hashable) -> None:
+        """
+        Forget a key the cache dropped on its own, e.g. once expired.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class LRUPolicy(CachePolicy):
+    """
+    Evicts the least recently used key.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        is_expired: Optional[Callable[[Hashable], bool]] = None,
+    ):
+        super().__init__(capacity, is_expired)
+        self._keys: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def touch(self, key: Hashable) -> None:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+
+    def insert(self, key: Hashable) -> List[Hashable]:
+        self._keys[key] = None
+        evicted = []
+        while len(self._keys) > self.capacity:
+            evicted.append(self._keys.popitem(last=False)[0])
+        return evicted
+
+    def remove(self, key: Hashable) -> None:
+        self._keys.pop(key, None)
+
+    def clear(self) -> None:
+        self._keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class FrequencySketch:
+    """
+    Count-min sketch estimating how often keys were recorded, in
+    4 rows of saturating one-byte counters. Once 10 × capacity counts were
+    recorded all counters are halved, so the estimate favours recent
+    popularity and keys popular long ago age out.
+    """
+
+    def __init__(self, capacity: int):
+        # 4 counters per row and cached key, like Caffeine's sketch, keep
+        # collisions rare among the keys that compete for admission
+        bits = max(4, (4 * capacity - 1).bit_length())
+        self.width = 1 << bits
+        self._shift = 64 - bits
+        self.sample_size = 10 * capacity
+        self.additions = 0
+        self._rows = [bytearray(self.width) for _ in _SEEDS]
+
+    def _indexes(self, key: Hashable) -> List[int]:
+        h = hash(key) & _MASK64
+        shift = self._shift
+        return [((h * seed) & _MASK64) >> shift for seed in _SEEDS]
+
+    def frequency(self, key: Hashable) -> int:
+        return min(map(bytearray.__getitem__, self._rows, self._indexes(key)))
+
+    def increment(self, key: Hashable) -> None:
+        indexes = self._indexes(key)
+        # Conservative update: only the smallest counters grow, which keeps
+        # collisions from inflating other keys' estimates
+        current = min(map(bytearray.__getitem__, self._rows, indexes))
+        if current >= _MAX_COUNT:
+            return
+        for row, i in zip(self._rows, indexes):
+            if row[i] == current:
+                row[i] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self._age()
+
+    def _age(self) -> None:
+        self._rows = [bytearray(count >> 1 for count in row) for row in self._rows]
+        self.additions //= 2
+
+    def clear(self) -> None:
+        self.additions = 0
+        self._rows = [bytearray(self.width) for _ in _SEEDS]
+
+
+class WTinyLFUPolicy(CachePolicy):
+    """
+    W-TinyLFU (Einziger, Friedman and Manes, "TinyLFU: A Highly Efficient
+    Cache Admission Policy").
+
+    New keys enter a small LRU window. A key leaving the window is
+    admitted to the main cache only if the frequency sketch estimates it
+    was requested more often than the main cache's eviction victim;
+    otherwise it is dropped instead. The main cache is a segmented LRU: keys
+    enter on probation and move to the protected segment when used again,
+    so keys used once are evicted before keys used repeatedly. Expired keys
+    at the eviction end of either segment are evicted before any
+    comparison, however popular they were.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        is_expired: Optional[Callable[[Hashable], bool]] = None,
+        window_fraction: float = 0.01,
+        protected_fraction: float = 0.8,
+    ):
+        super().__init__(capacity, is_expired)
+        self.window_capacity = max(1, int(capacity * window_fraction))
+        self.main_capacity = capacity - self.window_capacity
+        self.protected_capacity = int(self.main_capacity * protected_fraction)
+        self.sketch = FrequencySketch(capacity)
+        self._window: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._probation: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._protected: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def record(self, key: Hashable) -> None:
+        self.sketch.increment(key)
+
+    def touch(self, key: Hashable) -> None:
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            while len(self._protected) > self.protected_capacity:
+                demoted, _ = self._protected.popitem(last=False)
+                self._probation[demoted] = None
+
+    def insert(self, key: Hashable) -> List[Hashable]:
+        self._window[key] = None
+        evicted = []
+        while len(self._window) > self.window_capacity:
+            candidate, _ = self._window.popitem(last=False)
+            evicted.extend(self._admit(candidate))
+        return evicted
+
+    def _admit(self, candidate: Hashable) -> List[Hashable]:
+        evicted = []
+        for segment in (self._probation, self._protected):
+            while segment and self.is_expired(next(iter(segment))):
+                evicted.append(segment.popitem(last=False)[0])
+        if len(self._probation) + len(self._protected) < self.main_capacity:
+            self._probation[candidate] = None
+            return evicted
+
+        segment = self._probation or self._protected
+        if not segment:
+            return evicted + [candidate]
+        victim = next(iter(segment))
+        if self.sketch.frequency(candidate) <= self.sketch.frequency(victim):
+            return evicted + [candidate]
+        del segment[victim]
+        self._probation[candidate] = None
+        return evicted + [victim]
+
+    def remove(self, key: Hashable) -> None:
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment:
+                del segment[key]
+                return
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._probation.clear()
+        self._protected.clear()
+        self.sketch.clear()
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+
+POLICIES = {"lru": LRUPolicy, "tinylfu": WTinyLFUPolicy}
+
+
+def make_policy(
+    name: str,
+    capacity: int,
+    is_expired: Optional[Callable[[Hashable], bool]] = None,
+) -> CachePolicy:
+    """
+    Create a cache policy by name.
+
+    Args:
+        name: "lru" or "tinylfu"
+        capacity: Maximum number of keys
+        is_expired: Tells whether the cache would drop a key as expired
+
+    Raises:
+        ValueError: For an unknown policy name or a capacity below 1
+    """
+    try:
+        policy = POLICIES[name.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown cache policy {name}, expected one of {', '.join(POLICIES)}"
+        )
+    return policy(capacity, is_expired)
@@ -0,0 +1,164 @@
+"""
+HTTP response compression.
+Negotiates a content coding from Accept-Encoding and compresses bodies
+with gzip, or brotli and zstd when their optional packages are installed.
+"""
+
+import asyncio
+import gzip
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Levels for bodies compressed per request: fast, most of the gain
+DYNAMIC_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+# Levels for cached bodies compressed once and served many times
+STATIC_LEVELS = {"zstd": 19, "br": 11, "gzip": 9}
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def _compress_zstd(body: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+def _compress_br(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level)
+
+
+def _compress_gzip(body: bytes, level: int) -> bytes:
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+_COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {"gzip": _compress_gzip}
+if brotli is not None:
+    _COMPRESSORS["br"] = _compress_br
+if zstandard is not None:
+    _COMPRESSORS["zstd"] = _compress_zstd
+
+# Server preference when the client accepts several codings equally
+PREFERENCE = ["zstd", "br", "gzip"]
+
+
+def available_encodings() -> List[str]:
+    """
+    Get the content codings this process can produce, most preferred first.
+    """
+    return [e for e in PREFERENCE if e in _COMPRESSORS]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a content coding for a request.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+
+    Returns:
+        The coding with the highest client q-value, ties broken by server
+        preference, or None to send the body uncompressed
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        key, _, value = params.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str, static: bool = False) -> bytes:
+    """
+    Compress a body.
+
+    Args:
+        body: Uncompressed bytes
+        encoding: Content coding from negotiate_encoding
+        static: Use the slower, denser levels meant for bodies that are cached
+
+    Returns:
+        Compressed bytes
+
+    Raises:
+        ValueError: If the coding is not available
+    """
+    if encoding not in _COMPRESSORS:
+        raise ValueError(f"Unsupported content coding: {encoding}")
+    levels = STATIC_LEVELS if static else DYNAMIC_LEVELS
+    return _COMPRESSORS[encoding](body, levels[encoding])
+
+
+class PrecompressedBody:
+    """
+    A response body plus its compressed forms, each built on first use.
+    Kept with cached responses so a hot body is compressed once per coding.
+    Compressing at the static levels takes tens of milliseconds for a large
+    body, so it runs in a thread, once however many requests wait for it.
+    """
+
+    def __init__(self, body: bytes, min_size: int):
+        self.body = body
+        self.min_size = min_size
+        self._encoded: Dict[str, bytes] = {}
+        self._pending: Dict[str, "asyncio.Task[bytes]"] = {}
+
+    async def get(self, encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+        """
+        Get the body in a coding.
+
+        Args:
+            encoding: Negotiated coding, or None for the uncompressed body
+
+        Returns:
+            Tuple of (coding actually used or None, body bytes). Bodies
+            under min_size are always returned uncompressed.
+        """
+        if encoding is None or len(self.body) < self.min_size:
+            return None, self.body
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            task = self._pending.get(encoding)
+            if task is None:
+                task = asyncio.ensure_future(self._build(encoding))
+                self._pending[encoding] = task
+            # Shielded so one request going away does not waste the work
+            encoded = await asyncio.shield(task)
+        return encoding, encoded
+
+    async def _build(self, encoding: str) -> bytes:
+        try:
+            encoded = await asyncio.to_thread(compress, self.body, encoding, True)
+            self._encoded[encoding] = encoded
+            return encoded
+        finally:
+            del self._pending[encoding]
@@ -0,0 +1,79 @@
+"""
+Client disconnect handling.
+Runs request work as a task and cancels it when the client goes away,
+so provider calls made for a gone client are aborted instead of awaited.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, TypeVar
+
+from starlette.requests import Request
+
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Non-standard status (from nginx) for requests the client closed; never seen
+# by the client, but shows up in access logs
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client disconnects before the work is done."""
+
+
+async def wait_for_disconnect(request: Request) -> None:
+    """
+    Wait until the server reports the client gone.
+
+    Reads the ASGI receive channel directly. Request.is_disconnected() only
+    polls it with a cancelled scope, which never sees the disconnect once
+    the channel is wrapped by @app.middleware("http") middlewares.
+    Only use this once the request body has been read.
+    """
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Await work while watching the client connection.
+
+    Args:
+        request: Request whose client is watched
+        awaitable: Work to run, e.g. a provider call
+
+    Returns:
+        The result of the work
+
+    Raises:
+        ClientDisconnected: If the client disconnected first; the work
+            has been cancelled by then
+    """
+    task = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if task.done():
+        return task.result()
+
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+    get_metrics().increment("requests.disconnected")
+    logger.info(f"Client disconnected from {request.url.path}, work cancelled")
+    raise ClientDisconnected()
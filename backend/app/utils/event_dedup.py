@@ -0,0 +1,225 @@
+"""
+Event list merging and deduplication.
+Combines event lists from several responses into one list without repeats,
+including near-duplicates that describe the same event in different words.
+"""
+
+import re
+import json
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+_EVENT_PATTERN = re.compile(
+    r"^\s*(\d{1,4}(?:\s*(?:BCE|BC|CE|AD))?)\s*[:\-–]\s*(.+)$", re.IGNORECASE
+)
+
+STOP_WORDS = frozenset(
+    "a an and as at by for from in into is its of on onto the to was were with".split()
+)
+
+# MinHash signature of NUM_BANDS * ROWS_PER_BAND values. Two events become
+# candidates when any band matches, which happens with high probability
+# above a Jaccard similarity of roughly (1 / NUM_BANDS) ** (1 / ROWS_PER_BAND)
+NUM_BANDS = 16
+ROWS_PER_BAND = 2
+_MERSENNE_PRIME = (1 << 61) - 1
+_HASH_PARAMS = [
+    (
+        zlib.crc32(f"a{i}".encode()) * 2654435761 % _MERSENNE_PRIME | 1,
+        zlib.crc32(f"b{i}".encode()) * 40503 % _MERSENNE_PRIME,
+    )
+    for i in range(NUM_BANDS * ROWS_PER_BAND)
+]
+
+
+def normalize_event_text(event: str) -> str:
+    """
+    Normalize an event string for comparison.
+    Lowercases, drops punctuation and collapses whitespace.
+
+    Args:
+        event: Event string
+
+    Returns:
+        Normalized event string
+    """
+    text = _NON_WORD.sub(" ", event.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def parse_event(event: str) -> Tuple[Optional[str], str]:
+    """
+    Split an event in "[Year]: [Event description]" format.
+
+    Args:
+        event: Event string
+
+    Returns:
+        Tuple of (normalized year or None, description)
+    """
+    match = _EVENT_PATTERN.match(event)
+    if not match:
+        return None, event.strip()
+
+    year = _WHITESPACE.sub(" ", match.group(1).upper())
+    return year, match.group(2).strip()
+
+
+def event_shingles(description: str) -> FrozenSet[str]:
+    """
+    Token shingles of an event description.
+    Stop words are dropped and common suffixes stripped, so that
+    "lands" and "landing" produce the same shingle.
+
+    Args:
+        description: Event description without the year
+
+    Returns:
+        Set of shingles
+    """
+    shingles = set()
+    for token in normalize_event_text(description).split():
+        if token in STOP_WORDS:
+            continue
+        for suffix in ("ing", "ed", "es", "s"):
+            if len(token) > len(suffix) + 3 and token.endswith(suffix):
+                token = token[: -len(suffix)]
+                break
+        shingles.add(token)
+    return frozenset(shingles)
+
+
+@lru_cache(maxsize=65536)
+def _shingle_hashes(shingle: str) -> Tuple[int, ...]:
+    h = zlib.crc32(shingle.encode("utf-8"))
+    return tuple((a * h + b) % _MERSENNE_PRIME for a, b in _HASH_PARAMS)
+
+
+def minhash_signature(shingles: FrozenSet[str]) -> Tuple[int, ...]:
+    """
+    Compute the MinHash signature of a set of shingles.
+    Per-shingle hashes are memoized since event vocabulary repeats heavily.
+
+    Args:
+        shingles: Set of shingles
+
+    Returns:
+        Tuple of NUM_BANDS * ROWS_PER_BAND minimum hash values
+    """
+    if not shingles:
+        return _shingle_hashes("")
+    return tuple(map(min, zip(*map(_shingle_hashes, shingles))))
+
+
+def _jaccard(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def _find(parents: List[int], i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def dedupe_events(events: List[str], threshold: float = 0.5) -> List[str]:
+    """
+    Remove near-duplicate events.
+
+    Events are grouped by year, then candidate pairs within each year are
+    found with MinHash locality-sensitive hashing and confirmed by the
+    Jaccard similarity of their shingles. The first event of each group of
+    duplicates is kept, in order. Strings that are not in "[Year]: [Event]"
+    format are only deduplicated on exact normalized text.
+
+    Args:
+        events: Event strings
+        threshold: Minimum Jaccard similarity for two events to be duplicates
+
+    Returns:
+        Deduplicated list of events
+    """
+    parents = list(range(len(events)))
+    shingles: List[FrozenSet[str]] = []
+    exact: Dict[Tuple[Optional[str], str], int] = {}
+    bands: Dict[Tuple[str, int, Tuple[int, ...]], List[int]] = defaultdict(list)
+
+    for i, event in enumerate(events):
+        year, description = parse_event(event)
+        shingles.append(event_shingles(description))
+
+        exact_key = (year, normalize_event_text(description))
+        if exact_key in exact:
+            parents[i] = exact[exact_key]
+            continue
+        exact[exact_key] = i
+
+        if year is None or not shingles[i]:
+            continue
+
+        signature = minhash_signature(shingles[i])
+        for band in range(NUM_BANDS):
+            rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+            bucket = bands[(year, band, rows)]
+            for j in bucket:
+                root_i, root_j = _find(parents, i), _find(parents, j)
+                if root_i != root_j and _jaccard(shingles[i], shingles[j]) >= threshold:
+                    # Keep the earliest event as the representative
+                    parents[max(root_i, root_j)] = min(root_i, root_j)
+            bucket.append(i)
+
+    return [event for i, event in enumerate(events) if _find(parents, i) == i]
+
+
+def merge_event_lists(
+    event_lists: List[List[str]], threshold: Optional[float] = None
+) -> List[str]:
+    """
+    Merge event lists, dropping events that normalize to the same text.
+    The first occurrence of each event is kept, in order.
+
+    Args:
+        event_lists: Event lists to merge
+        threshold: If set, also drop near-duplicates at this similarity
+
+    Returns:
+        Merged list of unique events
+    """
+    seen = set()
+    merged = []
+
+    for events in event_lists:
+        for event in events:
+            key = normalize_event_text(event)
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(event)
+
+    if threshold is not None:
+        merged = dedupe_events(merged, threshold)
+
+    return merged
+
+
+def dedupe_response(response: str, threshold: float = 0.5) -> str:
+    """
+    Remove near-duplicate events from a cleaned response.
+
+    Args:
+        response: JSON array of strings, as produced by clean_ai_response
+        threshold: Minimum Jaccard similarity for two events to be duplicates
+
+    Returns:
+        JSON array of strings without near-duplicates
+    """
+    events = json.loads(response)
+    deduped = dedupe_events(events, threshold)
+    if len(deduped) == len(events):
+        return response
+    return json.dumps(deduped, ensure_ascii=False)
@@ -0,0 +1,132 @@
+"""
+Compact storage of event lists.
+The variants cached for a date share many of their events. An EventTable
+holds the distinct events of a cache key once, compressed as one blob,
+and each variant is an array of indexes into it. Blobs are compressed
+with a zstd dictionary trained on the events cached so far, which is
+what lets blobs of a few kilobytes compress well.
+"""
+
+import logging
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Joins the events of a table; events containing it are not interned
+SEPARATOR = "\x1e"
+
+# Tables are compressed once per new variant and read on every serve
+COMPRESSION_LEVEL = 9
+
+
+class Codec:
+    """
+    Compresses and decompresses table blobs, with or without a dictionary.
+    A table keeps the codec it was packed with, so it stays readable after
+    a dictionary is trained.
+    """
+
+    def __init__(self, dictionary: Optional["zstandard.ZstdCompressionDict"] = None):
+        self.dictionary = dictionary
+        self._compressor = None
+        self._decompressor = None
+        if zstandard is not None:
+            self._compressor = zstandard.ZstdCompressor(
+                level=COMPRESSION_LEVEL, dict_data=dictionary
+            )
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._compressor is None:
+            return data
+        # The compressor returns a buffer sized for the worst case; copy
+        # the result so a cached blob does not keep the slack alive
+        return bytes(memoryview(self._compressor.compress(data)))
+
+    def decompress(self, blob: bytes) -> bytes:
+        if self._decompressor is None:
+            return blob
+        return self._decompressor.decompress(blob)
+
+
+class EventCodec:
+    """
+    Provides the codec for new tables. Collects the first training_events
+    events it is shown and trains a zstd dictionary of dictionary_size
+    bytes from them; tables packed after that use the dictionary.
+    Without zstandard installed, blobs are stored as plain UTF-8.
+    """
+
+    def __init__(self, dictionary_size: int, training_events: int):
+        self.dictionary_size = dictionary_size
+        self.training_events = training_events
+        self.current = Codec()
+        self._samples: Optional[List[bytes]] = []
+        if zstandard is None or dictionary_size <= 0:
+            self._samples = None
+
+    @property
+    def dictionary_bytes(self) -> int:
+        dictionary = self.current.dictionary
+        return len(dictionary.as_bytes()) if dictionary is not None else 0
+
+    def observe(self, events: List[str]) -> None:
+        """
+        Add events to the training sample, training the dictionary once
+        there are enough.
+        """
+        if self._samples is None:
+            return
+        self._samples.extend(event.encode("utf-8") for event in events)
+        if len(self._samples) < self.training_events:
+            return
+
+        samples, self._samples = self._samples, None
+        try:
+            dictionary = zstandard.train_dictionary(self.dictionary_size, samples)
+        except zstandard.ZstdError as e:
+            logger.warning(f"Could not train event cache dictionary: {e}")
+            return
+        self.current = Codec(dictionary)
+        logger.info(
+            f"Trained {len(dictionary.as_bytes())} byte event cache dictionary "
+            f"from {len(samples)} events"
+        )
+
+
+class EventTable:
+    """
+    Immutable, compressed list of distinct event strings.
+    """
+
+    __slots__ = ("blob", "codec", "size")
+
+    def __init__(self, blob: bytes, codec: Codec, size: int):
+        self.blob = blob
+        self.codec = codec
+        self.size = size
+
+    @classmethod
+    def pack(cls, events: List[str], codec: Codec) -> "EventTable":
+        """
+        Compress a list of events.
+
+        Raises:
+            ValueError: If more than one event is given and one contains
+                the separator
+        """
+        if len(events) > 1 and any(SEPARATOR in event for event in events):
+            raise ValueError("Events must not contain the table separator")
+        data = SEPARATOR.join(events).encode("utf-8")
+        return cls(codec.compress(data), codec, len(events))
+
+    def unpack(self) -> List[str]:
+        text = self.codec.decompress(self.blob).decode("utf-8")
+        if self.size == 1:
+            return [text]
+        return text.split(SEPARATOR) if self.size else []
@@ -0,0 +1,76 @@
+"""
+HTTP caching utilities.
+Helpers for ETags, conditional requests and Cache-Control headers.
+"""
+
+import hashlib
+from typing import Optional
+
+
+def make_etag(*parts: str) -> str:
+    """
+    Build a strong ETag from content.
+
+    Args:
+        parts: Strings that together identify the representation
+
+    Returns:
+        Quoted ETag value
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def weak_etag(etag: str) -> str:
+    """
+    Mark an ETag as weak, as needed once a body has been content-encoded.
+    """
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+    Uses weak comparison, as RFC 9110 requires for If-None-Match.
+
+    Args:
+        if_none_match: Raw If-None-Match header value
+        etag: Current quoted ETag
+
+    Returns:
+        True if the client already has this representation
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+
+    return False
+
+
+def cache_control_header(max_age: int, stale_while_revalidate: int) -> str:
+    """
+    Build a Cache-Control header for shared, revalidatable responses.
+
+    Args:
+        max_age: Seconds the response is fresh
+        stale_while_revalidate: Seconds a stale response may be served while revalidating
+
+    Returns:
+        Cache-Control header value
+    """
+    directives = ["public", f"max-age={max_age}"]
+    if stale_while_revalidate > 0:
+        directives.append(f"stale-while-revalidate={stale_while_revalidate}")
+    return ", ".join(directives)
@@ -0,0 +1,57 @@
+"""
+In-process metrics registry.
+Holds simple counters plus named collectors that report the current
+state of a component (e.g. an HTTP connection pool) when read.
+"""
+
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+Collector = Callable[[], Dict[str, Any]]
+
+
+class Metrics:
+    """
+    Counters and collectors of one process, read by GET /api/metrics.
+    Metrics are per worker process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._collectors: Dict[str, Collector] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def counter(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def register(self, name: str, collector: Collector) -> None:
+        """
+        Register a collector, replacing any previous one of the same name.
+        """
+        self._collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Read all counters and collectors.
+
+        Returns:
+            Dictionary with a "counters" key and one key per collector
+        """
+        with self._lock:
+            snapshot: Dict[str, Any] = {
+                "counters": dict(sorted(self._counters.items()))
+            }
+        for name, collector in sorted(self._collectors.items()):
+            snapshot[name] = collector()
+        return snapshot
+
+
+@lru_cache()
+def get_metrics() -> Metrics:
+    return Metrics()
@@ -0,0 +1,153 @@
+"""
+Opt-in request profiling utilities.
+Contains a low-overhead sampling profiler and helpers for storing
+collapsed-stack profiles in a bounded local directory.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+from typing import List, Dict, Any, Optional, Mapping
+
+logger = logging.getLogger(__name__)
+
+PROFILE_EXTENSION = ".collapsed"
+
+
+class SamplingProfiler:
+    """
+    Periodically samples the call stack of a single thread.
+
+    Samples are taken from a background thread via ``sys._current_frames()``,
+    so the profiled code runs unmodified. Because requests share the event
+    loop thread, samples from concurrent requests are mixed into the profile.
+    Time spent awaiting I/O shows up as event loop frames (e.g. ``select``).
+    """
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+
+            # Collapsed stacks are ordered root-first
+            self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """
+        Render samples in Brendan Gregg's collapsed-stack format,
+        which speedscope and flamegraph.pl can import directly.
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+def should_profile(
+    headers: Mapping[str, str], enabled: bool, header_name: str, sample_rate: float
+) -> bool:
+    """
+    Decide whether a request should be profiled.
+
+    Args:
+        headers: Request headers
+        enabled: Whether profiling is enabled at all
+        header_name: Header that forces profiling when set to a truthy value
+        sample_rate: Fraction of requests to profile without the header
+
+    Returns:
+        True if the request should be profiled
+    """
+    if not enabled:
+        return False
+
+    if headers.get(header_name, "").lower() in ("1", "true", "yes"):
+        return True
+
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def save_profile(directory: str, label: str, content: str, max_files: int) -> str:
+    """
+    Write a profile to disk and prune the oldest profiles beyond max_files.
+
+    Args:
+        directory: Directory where profiles are stored
+        label: Short label included in the file name
+        content: Collapsed-stack profile content
+        max_files: Maximum number of profiles to keep
+
+    Returns:
+        Name of the written profile file
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    filename = f"{time.time_ns()}-{label}{PROFILE_EXTENSION}"
+    with open(os.path.join(directory, filename), "w", encoding="utf-8") as f:
+        f.write(content)
+
+    profiles = list_profiles(directory)
+    for stale in profiles[max_files:]:
+        try:
+            os.remove(os.path.join(directory, stale["name"]))
+        except OSError as e:
+            logger.warning(f"Could not remove old profile {stale['name']}: {e}")
+
+    return filename
+
+
+def list_profiles(directory: str) -> List[Dict[str, Any]]:
+    """
+    List stored profiles, newest first.
+
+    Args:
+        directory: Directory where profiles are stored
+
+    Returns:
+        List of dictionaries with name, size and creation time
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(PROFILE_EXTENSION):
+            stat = entry.stat()
+            profiles.append(
+                {"name": entry.name, "size": stat.st_size, "created": stat.st_mtime}
+            )
+
+    # File names start with a nanosecond timestamp
+    profiles.sort(key=lambda p: p["name"], reverse=True)
+    return profiles
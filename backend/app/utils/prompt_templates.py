@@ -0,0 +1,179 @@
+"""
+Prompt template registry.
+Builds chat messages on the server so clients only need to send a date.
+"""
+
+from datetime import date, timedelta
+from typing import List, Dict, Any, Tuple
+
+HISTORIAN_SYSTEM_PROMPT = """You are acting as a global historian with extensive knowledge of world history. Provide brief and concise responses to user requests without showing any preference for the location of the event. Feel free to include political, cultural, social, or technological events from various parts of the world. Randomize both the selection of events and their geographic origins to keep the user engaged. Return only a list of events, each provided as a string in the format: "[Year]: [Event description]".
+
+## Output Format
+Return a JSON object with a single key "events" mapping to an array of strings. Each string follows the format "[Year]: [Event description]".
+
+Example:
+{
+  "events": [
+    "1453: Fall of Constantinople marks the end of the Byzantine Empire.",
+    "1969: Apollo 11 lands the first humans on the Moon.",
+    "1994: End of apartheid in South Africa."
+  ]
+}"""
+
+DEFAULT_TEMPLATE = "historian"
+
+# JSON schema of the historian output, for providers' structured output modes
+EVENTS_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "events": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["events"],
+    "additionalProperties": False,
+}
+
+# Template registry mapping
+PROMPT_TEMPLATES = {
+    "historian": {
+        "system": HISTORIAN_SYSTEM_PROMPT,
+        "user": "List top historic events that occurred on {date}",
+        "temperature": 0.7,
+        "response_schema": EVENTS_RESPONSE_SCHEMA,
+    },
+}
+
+
+def get_template(name: str) -> Dict[str, Any]:
+    """
+    Get a registered prompt template.
+
+    Args:
+        name: Template name
+
+    Returns:
+        Template dictionary
+
+    Raises:
+        ValueError: If the template is not registered
+    """
+    name = name.lower()
+    if name not in PROMPT_TEMPLATES:
+        raise ValueError(f"Unknown prompt template: {name}")
+    return PROMPT_TEMPLATES[name]
+
+
+def get_supported_templates() -> List[str]:
+    """
+    Get list of all registered template names.
+
+    Returns:
+        List of template names
+    """
+    return list(PROMPT_TEMPLATES.keys())
+
+
+def parse_month_day(month_day: str) -> Tuple[int, int]:
+    """
+    Parse and validate a date in MM-DD format.
+
+    Args:
+        month_day: Date string such as "07-20"
+
+    Returns:
+        Tuple of (month, day)
+
+    Raises:
+        ValueError: If the date is malformed or does not exist
+    """
+    parts = month_day.split("-")
+    if len(parts) != 2 or not all(len(p) == 2 and p.isdigit() for p in parts):
+        raise ValueError(f"Invalid date '{month_day}', expected MM-DD")
+
+    month, day = int(parts[0]), int(parts[1])
+
+    # 2000 is a leap year, so 02-29 is accepted
+    try:
+        date(2000, month, day)
+    except ValueError:
+        raise ValueError(f"Invalid date '{month_day}', no such day")
+
+    return month, day
+
+
+def adjacent_dates(month_day: str, radius: int = 1) -> List[str]:
+    """
+    Get the dates around a date, nearest first, wrapping around the year.
+
+    Args:
+        month_day: Date in MM-DD format
+        radius: Number of days on each side
+
+    Returns:
+        Dates in MM-DD format, e.g. ["07-21", "07-19"] for "07-20"
+
+    Raises:
+        ValueError: If the date is invalid
+    """
+    month, day = parse_month_day(month_day)
+    # 2000 is a leap year, so 02-29 has neighbours
+    center = date(2000, month, day)
+
+    dates = []
+    for offset in range(1, radius + 1):
+        for delta in (offset, -offset):
+            neighbour = center + timedelta(days=delta)
+            if neighbour.year != 2000:
+                # Wrap around the year end without skipping 02-29
+                neighbour = neighbour.replace(year=2000)
+            dates.append(neighbour.strftime("%m-%d"))
+    return dates
+
+
+def date_range(start: str, end: str) -> List[str]:
+    """
+    Get the dates from start to end inclusive, wrapping around the year.
+
+    Args:
+        start: First date in MM-DD format
+        end: Last date in MM-DD format
+
+    Returns:
+        Dates in MM-DD format, e.g. ["12-31", "01-01"] for "12-31" to "01-01"
+
+    Raises:
+        ValueError: If either date is invalid
+    """
+    current = date(2000, *parse_month_day(start))
+    last = date(2000, *parse_month_day(end))
+
+    dates = [current.strftime("%m-%d")]
+    while current != last:
+        current += timedelta(days=1)
+        if current.year != 2000:
+            # Wrap around the year end without skipping 02-29
+            current = current.replace(year=2000)
+        dates.append(current.strftime("%m-%d"))
+    return dates
+
+
+def build_messages(template_name: str, month_day: str) -> List[Dict[str, str]]:
+    """
+    Build chat messages for a date from a registered template.
+
+    Args:
+        template_name: Template name
+        month_day: Date in MM-DD format
+
+    Returns:
+        List of message dictionaries with 'role' and 'content' keys
+
+    Raises:
+        ValueError: If the template or date is invalid
+    """
+    template = get_template(template_name)
+    parse_month_day(month_day)
+
+    return [
+        {"role": "system", "content": template["system"]},
+        {"role": "user", "content": template["user"].format(date=month_day)},
+    ]
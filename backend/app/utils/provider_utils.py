@@ -19,9 +19,10 @@ PROVIDER_CONFIG = {
     "gemini": {
         "default_models": ["gemini-2.0-flash"],
         "supported_roles": [
+            "system",
             "user",
             "model",
-        ],  # Gemini uses 'model' instead of 'assistant'
+        ],  # Gemini uses 'model' instead of 'assistant', system goes to system_instruction
         "max_temperature": 1.0,
     },
 }
@@ -125,7 +126,8 @@ def _normalize_messages_for_gemini(
 ) -> List[Dict[str, str]]:
     """
     Normalize messages for Gemini provider.
-    Converts OpenAI format to Gemini format.
+    Converts OpenAI format to Gemini format. System and developer messages
+    keep the 'system' role so the service can send them as system_instruction.
 
     Args:
         messages: List of message dictionaries
@@ -142,15 +144,9 @@ def _normalize_messages_for_gemini(
         # Map roles for Gemini
         if role in ["assistant", "model"]:
             role = "model"
-        elif role == "system":
-            # Gemini doesn't have system role, prepend to first user message
-            if normalized and normalized[-1]["role"] == "user":
-                normalized[-1][
-                    "content"
-                ] = f"System: {content}\n\n{normalized[-1]['content']}"
-            else:
-                normalized.append({"role": "user", "content": f"System: {content}"})
-            continue
+        elif role in ["system", "developer"]:
+            # Gemini has no system turns, the service moves these to system_instruction
+            role = "system"
         elif role == "user":
             role = "user"
         else:
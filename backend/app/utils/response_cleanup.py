@@ -1,11 +1,42 @@
 import re
 import json
 import logging
-from typing import Any, Union, List
+from typing import Any, Optional, Union, List
+
+from .metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
 
+def parse_json_events(response_text: str) -> Optional[str]:
+    """
+    Fast path for responses that are already valid JSON, as structured
+    output guarantees: an {"events": [...]} object or a bare array.
+
+    Args:
+        response_text: Raw response text
+
+    Returns:
+        JSON array of strings, or None if the heuristic cleanup is needed
+    """
+    try:
+        parsed = json.loads(response_text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+    if isinstance(parsed, dict) and isinstance(parsed.get("events"), list):
+        parsed = parsed["events"]
+    if not isinstance(parsed, list):
+        return None
+    return normalize_to_string_array(parsed)
+
+
+def _fallback(step: str, result: str) -> str:
+    # Counts which heuristic finally produced the result
+    get_metrics().increment(f"cleanup.fallback.{step}")
+    return result
+
+
 def clean_ai_response(response_text: str, provider: str = "") -> str:
     """
     Universal response cleaner for different AI providers.
@@ -14,6 +45,13 @@ def clean_ai_response(response_text: str, provider: str = "") -> str:
     if not response_text:
         return json.dumps([])
 
+    fast = parse_json_events(response_text)
+    if fast is not None:
+        get_metrics().increment("cleanup.fast_path")
+        return fast
+
+    get_metrics().increment("cleanup.fallback")
+    logger.info(f"{provider} response is not plain JSON, running heuristic cleanup")
     original_response = response_text
 
     try:
@@ -52,7 +90,7 @@ def clean_ai_response(response_text: str, provider: str = "") -> str:
             parsed_json = json.loads(response_text)
 
             # Convert to array of strings format
-            return normalize_to_string_array(parsed_json)
+            return _fallback("extract", normalize_to_string_array(parsed_json))
 
         except json.JSONDecodeError as e:
             logger.warning(f"Response is not valid JSON after cleaning: {e}")
@@ -62,14 +100,14 @@ def clean_ai_response(response_text: str, provider: str = "") -> str:
             fixed_response = fix_common_json_issues(response_text)
             try:
                 parsed_json = json.loads(fixed_response)
-                return normalize_to_string_array(parsed_json)
+                return _fallback("repair", normalize_to_string_array(parsed_json))
             except json.JSONDecodeError:
                 pass
 
         # Step 7: Try to parse as a simple text response
         if not response_text.startswith("["):
             # If it's not already an array, try to convert plain text to array
-            return parse_text_to_string_array(response_text)
+            return _fallback("text_list", parse_text_to_string_array(response_text))
 
         # Step 8: Fallback - if it looks like an array, try to parse it
         if response_text.startswith("[") and response_text.endswith("]"):
@@ -77,7 +115,7 @@ def clean_ai_response(response_text: str, provider: str = "") -> str:
                 # Attempt a more lenient JSON parse
                 fixed_response = fix_common_json_issues(response_text)
                 parsed_json = json.loads(fixed_response)
-                return normalize_to_string_array(parsed_json)
+                return _fallback("repair", normalize_to_string_array(parsed_json))
             except:
                 pass
 
@@ -89,12 +127,16 @@ def clean_ai_response(response_text: str, provider: str = "") -> str:
         logger.error(f"Attempted cleanup: {response_text[:200]}...")
 
         # Return as a single-item array
-        return json.dumps([response_text.strip()], ensure_ascii=False)
+        return _fallback(
+            "single_item", json.dumps([response_text.strip()], ensure_ascii=False)
+        )
 
     except Exception as e:
         logger.error(f"Error cleaning {provider} response: {e}")
         # Return original as single-item array
-        return json.dumps([original_response.strip()], ensure_ascii=False)
+        return _fallback(
+            "error", json.dumps([original_response.strip()], ensure_ascii=False)
+        )
 
 
 def normalize_to_string_array(data: Any) -> str:
@@ -0,0 +1,72 @@
+"""
+Per-request stage timing utilities.
+Records how long each stage of a request takes and renders the
+result as a Server-Timing header.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar(
+    "stage_timer", default=None
+)
+
+
+class StageTimer:
+    """
+    Accumulates stage durations in milliseconds.
+    Repeated stages are summed, first-seen order is kept.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + duration_ms
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 3) for name, ms in self.durations.items()}
+
+    def server_timing_header(self) -> str:
+        return ", ".join(f"{name};dur={ms:.3f}" for name, ms in self.durations.items())
+
+
+def start_request_timer() -> StageTimer:
+    """
+    Create a timer and make it current for the running request context.
+    """
+    timer = StageTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+def get_request_timer() -> Optional[StageTimer]:
+    """
+    Get the timer of the current request, if any.
+    """
+    return _current_timer.get()
+
+
+@contextmanager
+def record_stage(name: str) -> Iterator[None]:
+    """
+    Time a stage against the current request timer.
+    Does nothing when called outside a timed request.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    with timer.stage(name):
+        yield
@@ -0,0 +1,14 @@
+"""
+Gunicorn worker classes for the production server.
+"""
+
+from uvicorn.workers import UvicornWorker
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker pinned to uvloop and httptools, the fastest event loop
+    and HTTP parser, instead of auto-detecting them.
+    """
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
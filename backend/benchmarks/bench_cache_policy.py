@@ -0,0 +1,169 @@
+"""
+Cache policy benchmark: hit ratio of W-TinyLFU against LRU on request traces.
+
+Replays a request trace through each policy the way the caches use them:
+every request is recorded, hits are touched and misses inserted. The
+trace is read from access logs (uvicorn or gunicorn, one request per
+line) or generated: date lookups with skewed popularity (today's date,
+holidays, famous days) mixed with free-form chat prompts, most of them
+asked once.
+
+Usage:
+    python -m benchmarks.bench_cache_policy --sizes 64 128 256 512
+    python -m benchmarks.bench_cache_policy --log access.log --sizes 256 1024
+"""
+
+import argparse
+import itertools
+import random
+import re
+import time
+from typing import List
+from urllib.parse import parse_qs, urlsplit
+
+from app.services.event_cache import make_cache_key
+from app.utils.cache_policy import POLICIES, CachePolicy
+from app.utils.prompt_templates import DEFAULT_TEMPLATE, date_range
+
+PROVIDERS = ["openai", "gemini"]
+HOLIDAYS = [
+    "01-01", "02-14", "03-17", "05-01", "07-04", "10-31", "11-11", "12-24",
+    "12-25", "12-31",
+]  # fmt: skip
+REQUEST_LINE = re.compile(r'"(GET|POST) (\S+) HTTP/[\d.]+"')
+EVENTS_PATH = re.compile(r"^/api/events/(\d\d-\d\d)$")
+
+
+def parse_log(path: str, default_provider: str) -> List[str]:
+    """
+    Read cache keys from access log lines. Events requests map to their
+    cache key. Chat requests are counted as distinct prompts, since access
+    logs do not carry request bodies; that overstates how many prompts
+    are asked once.
+    """
+    trace = []
+    chats = itertools.count()
+    with open(path) as log:
+        for line in log:
+            match = REQUEST_LINE.search(line)
+            if match is None:
+                continue
+            method, target = match.groups()
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+            events = EVENTS_PATH.match(url.path)
+            if method == "GET" and events:
+                trace.append(
+                    make_cache_key(
+                        query.get("template", [DEFAULT_TEMPLATE])[0].lower(),
+                        query.get("provider", [default_provider])[0].lower(),
+                        events.group(1),
+                    )
+                )
+            elif method == "POST" and url.path == "/api/chat":
+                trace.append(f"chat:{next(chats)}")
+    return trace
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    return [1 / (rank**exponent) for rank in range(1, count + 1)]
+
+
+def generate_trace(args) -> List[str]:
+    """
+    Generate args.days days of args.requests_per_day requests. Each day
+    has its own "today"; the other dates are ranked once by fame and
+    drawn by Zipf's law, with holidays among the most famous.
+    """
+    rng = random.Random(args.seed)
+    dates = date_range("01-01", "12-31")
+    others = [d for d in dates if d not in HOLIDAYS]
+    rng.shuffle(others)
+    ranked = HOLIDAYS + others
+    date_weights = zipf_weights(len(ranked), args.date_skew)
+    prompt_weights = zipf_weights(args.repeated_prompts, 1.0)
+    one_off = itertools.count()
+
+    trace = []
+    start = rng.randrange(len(dates))
+    for day in range(args.days):
+        today = dates[(start + day) % len(dates)]
+        for _ in range(args.requests_per_day):
+            if rng.random() < args.chat_share:
+                if rng.random() < args.one_off_share:
+                    trace.append(f"chat:once:{next(one_off)}")
+                else:
+                    prompt = rng.choices(range(args.repeated_prompts), prompt_weights)
+                    trace.append(f"chat:{prompt[0]}")
+                continue
+
+            if rng.random() < args.today_share:
+                month_day = today
+            else:
+                month_day = rng.choices(ranked, date_weights)[0]
+            provider = rng.choices(PROVIDERS, [0.7, 0.3])[0]
+            trace.append(make_cache_key(DEFAULT_TEMPLATE, provider, month_day))
+    return trace
+
+
+def replay(policy: CachePolicy, trace: List[str]) -> float:
+    """
+    Returns:
+        The hit ratio
+    """
+    cached = set()
+    hits = 0
+    for key in trace:
+        policy.record(key)
+        if key in cached:
+            hits += 1
+            policy.touch(key)
+        else:
+            cached.add(key)
+            cached.difference_update(policy.insert(key))
+    return hits / len(trace)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--log", help="Access log to replay instead of a generated trace"
+    )
+    parser.add_argument("--default-provider", default="openai")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 256, 512])
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--requests-per-day", type=int, default=20000)
+    parser.add_argument("--chat-share", type=float, default=0.3)
+    parser.add_argument("--one-off-share", type=float, default=0.8)
+    parser.add_argument("--repeated-prompts", type=int, default=2000)
+    parser.add_argument("--today-share", type=float, default=0.2)
+    parser.add_argument("--date-skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.log:
+        trace = parse_log(args.log, args.default_provider)
+    else:
+        trace = generate_trace(args)
+    if not trace:
+        parser.error("No events or chat requests in the trace")
+    distinct = len(set(trace))
+    print(
+        f"{len(trace)} requests, {distinct} distinct keys, "
+        f"at most {1 - distinct / len(trace):.1%} can hit"
+    )
+    print("Hit ratio and policy time per request:")
+
+    print(f"\n{'size':>6} " + " ".join(f"{name:>14}" for name in POLICIES))
+    for size in args.sizes:
+        cells = []
+        for name, policy in POLICIES.items():
+            start = time.perf_counter()
+            ratio = replay(policy(size), trace)
+            us = (time.perf_counter() - start) * 1e6 / len(trace)
+            cells.append(f"{ratio:>6.1%} {us:>4.1f} us")
+        print(f"{size:>6} " + " ".join(f"{cell:>14}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compression benchmark: CPU time spent against bytes saved.
+
+Builds a single-date events response and a 30-date batch of them, then
+compresses each with every available coding at the per-request (dynamic)
+and cached (static) levels used by app.utils.compression.
+
+Usage:
+    python -m benchmarks.bench_compression
+"""
+
+import json
+import random
+import time
+
+from app.utils.compression import (
+    DYNAMIC_LEVELS,
+    STATIC_LEVELS,
+    _COMPRESSORS,
+    available_encodings,
+)
+
+SUBJECTS = [
+    "Treaty of {place} is signed, ending the war between {a} and {b}.",
+    "{a} declares independence from {b}.",
+    "The first {thing} opens in {place}.",
+    "Earthquake strikes {place}, killing thousands.",
+    "{a} and {b} establish diplomatic relations.",
+    "Construction of the {thing} begins in {place}.",
+]
+PLACES = ["Paris", "Kyoto", "Lima", "Cairo", "Delhi", "Vienna", "Accra", "Quebec"]
+COUNTRIES = ["France", "Japan", "Peru", "Egypt", "India", "Austria", "Ghana", "Spain"]
+THINGS = ["railway", "university", "observatory", "public library", "canal"]
+
+
+def events_response(month_day: str, rng: random.Random) -> dict:
+    events = [
+        f"{rng.randint(800, 2020)}: "
+        + rng.choice(SUBJECTS).format(
+            place=rng.choice(PLACES),
+            a=rng.choice(COUNTRIES),
+            b=rng.choice(COUNTRIES),
+            thing=rng.choice(THINGS),
+        )
+        for _ in range(10)
+    ]
+    return {
+        "response": json.dumps(events),
+        "provider": "openai",
+        "date": month_day,
+        "template": "historian",
+    }
+
+
+def measure(body: bytes, encoding: str, level: int, repeat: int):
+    compressor = _COMPRESSORS[encoding]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressed = compressor(body, level)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    return len(compressed), elapsed_ms
+
+
+def main():
+    rng = random.Random(7)
+    payloads = {
+        "single date": json.dumps(events_response("07-20", rng)).encode(),
+        "30-date batch": json.dumps(
+            [events_response(f"07-{day:02d}", rng) for day in range(1, 31)]
+        ).encode(),
+    }
+
+    print(
+        f"{'payload':<14} {'coding':<6} {'mode':<7} {'level':>5} {'bytes':>8} "
+        f"{'ratio':>6} {'cpu ms':>8} {'KB saved/ms':>12}"
+    )
+    for name, body in payloads.items():
+        print(f"{name:<14} {'none':<6} {'':<7} {'':>5} {len(body):>8}")
+        for encoding in available_encodings():
+            for mode, levels in (
+                ("dynamic", DYNAMIC_LEVELS),
+                ("static", STATIC_LEVELS),
+            ):
+                level = levels[encoding]
+                repeat = 20 if mode == "static" else 200
+                size, cpu_ms = measure(body, encoding, level, repeat)
+                saved_kb = (len(body) - size) / 1024
+                print(
+                    f"{name:<14} {encoding:<6} {mode:<7} {level:>5} {size:>8} "
+                    f"{len(body) / size:>6.2f} {cpu_ms:>8.3f} {saved_kb / cpu_ms:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
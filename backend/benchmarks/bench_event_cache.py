@@ -0,0 +1,230 @@
+"""
+Event cache benchmark: memory per cached variant and throughput.
+
+Fills the event cache with generated-looking responses for every date
+and several providers and variants, where variants of a date repeat
+many of the same well-known events, as LLM variants do. Compares the
+compact format (interned event tables compressed with a trained zstd
+dictionary) with the previous format, reproduced here: each variant
+kept its response string and, once served, its serialized body.
+
+Usage:
+    python -m benchmarks.bench_event_cache --variants 5
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from app.services.event_cache import EventCache, make_cache_key
+from app.utils.compression import PrecompressedBody
+from app.utils.http_cache import make_etag
+from app.utils.prompt_templates import date_range
+
+PROVIDERS = ["openai", "gemini"]
+SUBJECTS = [
+    "The Treaty of {place} is signed, formally ending the long war between "
+    "{a} and {b} and redrawing the borders of the region.",
+    "{a} declares its independence from {b} after years of unrest, "
+    "a move quickly recognized by its neighbours.",
+    "The first {thing} in {place} opens to the public, drawing crowds "
+    "from across {a} on its opening day.",
+    "A powerful earthquake strikes {place}, destroying much of the old city "
+    "and prompting relief efforts from {a} and {b}.",
+    "{a} and {b} establish formal diplomatic relations, exchanging "
+    "ambassadors for the first time in their history.",
+    "Construction of the great {thing} begins in {place}, a project that "
+    "{person} had championed for more than a decade.",
+    "{person} is crowned in a lavish ceremony in {place}, beginning a reign "
+    "that would reshape the politics of {a}.",
+    "{person} publishes an influential treatise on the {thing} in {place}, "
+    "later translated and widely read in {b}.",
+]
+PLACES = ["Paris", "Kyoto", "Lima", "Cairo", "Delhi", "Vienna", "Accra", "Quebec"]
+COUNTRIES = ["France", "Japan", "Peru", "Egypt", "India", "Austria", "Ghana", "Spain"]
+THINGS = ["railway", "university", "observatory", "public library", "canal"]
+PEOPLE = ["Queen Maria", "King Henry", "Emperor Meiji", "Sultan Ahmed", "Tsar Ivan"]
+
+
+@dataclass
+class PreviousCachedEvents:
+    """The previous cache value: response string plus serialized body."""
+
+    response: str
+    provider: str
+    etag: str
+    stored_at: float
+    body: Optional[PrecompressedBody] = field(default=None, compare=False)
+
+
+def make_event(rng: random.Random) -> str:
+    return f"{rng.randint(800, 2020)}: " + rng.choice(SUBJECTS).format(
+        place=rng.choice(PLACES),
+        a=rng.choice(COUNTRIES),
+        b=rng.choice(COUNTRIES),
+        thing=rng.choice(THINGS),
+        person=rng.choice(PEOPLE),
+    )
+
+
+def make_responses(args) -> Dict[str, List[str]]:
+    """
+    Responses per cache key. Each date has a set of well-known events
+    that variants of every provider draw most of their events from.
+    """
+    rng = random.Random(7)
+    responses = {}
+    for month_day in date_range("01-01", "12-31")[: args.dates]:
+        known = [make_event(rng) for _ in range(args.known_events)]
+        for provider in PROVIDERS:
+            variants = []
+            for _ in range(args.variants):
+                events = rng.sample(known, args.shared_events) + [
+                    make_event(rng) for _ in range(10 - args.shared_events)
+                ]
+                rng.shuffle(events)
+                variants.append(json.dumps(events, ensure_ascii=False))
+            responses[make_cache_key("historian", provider, month_day)] = variants
+    return responses
+
+
+def payload_body(month_day: str, provider: str, response: str) -> bytes:
+    return json.dumps(
+        {
+            "response": response,
+            "provider": provider,
+            "model": None,
+            "usage": None,
+            "timings": None,
+            "date": month_day,
+            "template": "historian",
+        }
+    ).encode()
+
+
+def measure(build: Callable[[], object]):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, size, seconds
+
+
+def fill_previous(responses: Dict[str, List[str]], served: bool):
+    cache = {}
+    # One loop for every served body, bodies are compressed in its threads
+    loop = asyncio.new_event_loop()
+    try:
+        for key, variants in responses.items():
+            _, provider, month_day = key.split(":")
+            entries = []
+            for response in variants:
+                # A response of its own, as each one comes from its own provider call
+                response = response.encode().decode()
+                entry = PreviousCachedEvents(
+                    response=response,
+                    provider=provider,
+                    etag=make_etag(key, response),
+                    stored_at=time.monotonic(),
+                )
+                if served:
+                    entry.body = PrecompressedBody(
+                        payload_body(month_day, provider, response), 1024
+                    )
+                    loop.run_until_complete(entry.body.get("gzip"))
+                entries.append(entry)
+            cache[key] = entries
+    finally:
+        loop.close()
+    return cache
+
+
+def fill_compact(responses: Dict[str, List[str]], args) -> EventCache:
+    cache = EventCache(
+        max_entries=len(responses),
+        ttl_seconds=3600,
+        variants_per_key=args.variants,
+        dictionary_size=args.dictionary_size,
+        dictionary_training_events=args.training_events,
+    )
+    for key, variants in responses.items():
+        _, provider, _ = key.split(":")
+        for response in variants:
+            cache.set(key, response, provider)
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dates", type=int, default=366)
+    parser.add_argument("--variants", type=int, default=5)
+    parser.add_argument("--known-events", type=int, default=20)
+    parser.add_argument("--shared-events", type=int, default=6)
+    parser.add_argument("--dictionary-size", type=int, default=16384)
+    parser.add_argument("--training-events", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=20000)
+    args = parser.parse_args()
+
+    responses = make_responses(args)
+    count = sum(len(v) for v in responses.values())
+    raw_bytes = sum(len(r.encode()) for v in responses.values() for r in v)
+    print(
+        f"{len(responses)} keys, {count} variants, "
+        f"{raw_bytes / count:.0f} bytes of JSON per variant, "
+        f"{args.shared_events} of 10 events per variant shared within a date"
+    )
+
+    results = []
+    for name, build in (
+        ("previous", lambda: fill_previous(responses, served=False)),
+        ("previous, served", lambda: fill_previous(responses, served=True)),
+        ("compact", lambda: fill_compact(responses, args)),
+    ):
+        kept, size, seconds = measure(build)
+        results.append((name, kept, size, seconds))
+
+    previous_served = results[1][2]
+    print(f"\n{'format':<18} {'bytes/variant':>14} {'vs served':>10} {'sets/s':>10}")
+    for name, _, size, seconds in results:
+        print(
+            f"{name:<18} {size / count:>14.0f} {previous_served / size:>9.1f}x "
+            f"{count / seconds:>10.0f}"
+        )
+
+    cache: EventCache = results[2][1]
+    stats = cache.stats()
+    print(
+        f"\ncompact: {stats['stored_bytes'] / count:.0f} bytes of tables per variant, "
+        f"dictionary {stats['dictionary_bytes']} bytes"
+    )
+
+    keys = list(responses)
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(args.reads):
+        cache.get(rng.choice(keys)).response
+    read_us = (time.perf_counter() - start) * 1e6 / args.reads
+
+    previous = results[0][1]
+    start = time.perf_counter()
+    for _ in range(args.reads):
+        rng.choice(previous[rng.choice(keys)]).response
+    previous_us = (time.perf_counter() - start) * 1e6 / args.reads
+    print(
+        f"read a variant's response: compact {read_us:.1f} us, "
+        f"previous {previous_us:.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
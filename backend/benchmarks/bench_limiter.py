@@ -0,0 +1,179 @@
+"""
+Concurrency limit simulation: fixed limits vs AIMD vs gradient.
+
+Starts the fake LLM with a capacity model, then drives provider calls
+through the scheduler and the concurrency limiter, the same path
+complete_chat takes, from a fixed pool of closed-loop clients. Midway
+the fake LLM's capacity drops (the provider slows down) and later comes
+back. Reports per phase: successful calls per second, 429s per second,
+provider latency, end-to-end latency (queue + call) and the average limit.
+
+Usage:
+    python -m benchmarks.bench_limiter --clients 48 --phase-seconds 10
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from app.services.concurrency_limit import ConcurrencyLimiter, create_limit
+from app.services.openai_service import OpenAIService
+from app.services.scheduler import BATCH, INTERACTIVE, REFRESH, PriorityScheduler
+from benchmarks.bench_server import percentile, start_process, wait_until_ready
+
+WEIGHTS = {INTERACTIVE: 8, REFRESH: 2, BATCH: 1}
+
+
+class PhaseStats:
+    def __init__(self):
+        self.ok = 0
+        self.rejected = 0
+        self.provider_ms: List[float] = []
+        self.total_ms: List[float] = []
+        self.limits: List[int] = []
+
+
+async def run_strategy(name: str, args, llm_url: str) -> Dict[str, PhaseStats]:
+    algorithm, _, fixed = name.partition("-")
+    initial = int(fixed) if fixed else args.initial_limit
+    scheduler = PriorityScheduler(
+        name, limit=initial, max_queue=args.clients * 2, weights=WEIGHTS
+    )
+    limiter = ConcurrencyLimiter(
+        scheduler, create_limit(algorithm, initial, args.min_limit, args.max_limit)
+    )
+    # max_retries=0: a 429 should reach the limiter, not be retried by the SDK
+    service = OpenAIService(api_key="fake-key", base_url=f"{llm_url}/v1")
+    service.client = service.client.with_options(max_retries=0)
+    messages = [{"role": "user", "content": "What happened on July 20?"}]
+
+    phases = [
+        ("normal", args.capacity),
+        ("slowdown", args.slow_capacity),
+        ("recovered", args.capacity),
+    ]
+    stats = {phase: PhaseStats() for phase, _ in phases}
+    current = {"phase": phases[0][0]}
+
+    async def client():
+        while current["phase"] is not None:
+            start = time.perf_counter()
+            await scheduler.acquire(INTERACTIVE)
+            called = time.perf_counter()
+            ok = True
+            try:
+                async with limiter.measure():
+                    await service.chat_completion(messages=messages)
+            except Exception:
+                ok = False
+            finally:
+                scheduler.release(INTERACTIVE)
+
+            # Calls count towards the phase they finish in
+            if current["phase"] is None:
+                return
+            phase = stats[current["phase"]]
+            if ok:
+                phase.ok += 1
+                phase.total_ms.append((time.perf_counter() - start) * 1000)
+                phase.provider_ms.append((time.perf_counter() - called) * 1000)
+            else:
+                phase.rejected += 1
+                # Back off briefly like a real caller would before retrying
+                await asyncio.sleep(0.05)
+
+    async def sample_limit():
+        while current["phase"] is not None:
+            stats[current["phase"]].limits.append(scheduler.limit)
+            await asyncio.sleep(0.1)
+
+    async with httpx.AsyncClient(base_url=llm_url) as admin:
+        tasks = [asyncio.ensure_future(client()) for _ in range(args.clients)]
+        tasks.append(asyncio.ensure_future(sample_limit()))
+        for phase, capacity in phases:
+            await admin.post(
+                "/admin/capacity",
+                json={"capacity": capacity, "max_in_flight": capacity * 2},
+            )
+            current["phase"] = phase
+            await asyncio.sleep(args.phase_seconds)
+        current["phase"] = None
+        await asyncio.gather(*tasks)
+
+    await service.client.close()
+    return stats
+
+
+def report(name: str, stats: Dict[str, PhaseStats], seconds: float) -> None:
+    for phase, s in stats.items():
+        provider = s.provider_ms or [0.0]
+        total = s.total_ms or [0.0]
+        print(
+            f"{name:>10} | {phase:>9} | {s.ok / seconds:7.1f} ok/s | "
+            f"{s.rejected / seconds:6.1f} 429/s | "
+            f"provider p50 {percentile(provider, 50):6.0f} ms | "
+            f"total p50 {percentile(total, 50):6.0f} p99 {percentile(total, 99):6.0f} ms | "
+            f"limit {statistics.mean(s.limits or [0]):5.1f}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=48)
+    parser.add_argument("--phase-seconds", type=float, default=10)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    # Real completions vary in latency regardless of load
+    parser.add_argument("--jitter-ms", type=float, default=250)
+    parser.add_argument("--capacity", type=int, default=16)
+    parser.add_argument("--slow-capacity", type=int, default=4)
+    parser.add_argument("--initial-limit", type=int, default=8)
+    parser.add_argument("--min-limit", type=int, default=2)
+    parser.add_argument("--max-limit", type=int, default=128)
+    parser.add_argument(
+        "--strategies", default="fixed-4,fixed-32,aimd,gradient", type=str
+    )
+    parser.add_argument("--llm-port", type=int, default=9100)
+    args = parser.parse_args()
+    # The services log every failed call; 429s are expected here
+    logging.disable(logging.ERROR)
+
+    llm_url = f"http://127.0.0.1:{args.llm_port}"
+    fake_llm = start_process(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.fake_llm",
+            "--port",
+            str(args.llm_port),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--jitter-ms",
+            str(args.jitter_ms),
+        ],
+        dict(os.environ),
+    )
+    try:
+        await wait_until_ready(f"{llm_url}/v1/models/fake", timeout=30)
+        print(
+            f"{args.clients} clients, fake LLM latency {args.latency_ms:.0f} "
+            f"± {args.jitter_ms:.0f} ms, "
+            f"capacity {args.capacity} -> {args.slow_capacity} -> {args.capacity} "
+            f"(429 past 2x capacity), {args.phase_seconds:.0f}s per phase"
+        )
+        for name in args.strategies.split(","):
+            stats = await run_strategy(name, args, llm_url)
+            report(name, stats, args.phase_seconds)
+    finally:
+        fake_llm.terminate()
+        fake_llm.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
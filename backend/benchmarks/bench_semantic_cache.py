@@ -0,0 +1,147 @@
+"""
+Semantic cache benchmark: lookup latency at scale and paraphrase hit rate.
+
+Fills a cache with free-form history prompts, most about one of the 366
+dates and some undated, then times lookups of cached questions asked
+another way (hits) and of the same questions about another country
+(misses). Dated prompts are spread over one partition per date; undated
+ones share a single partition, the worst case, bounded by
+--max-partition-entries.
+
+Usage:
+    python -m benchmarks.bench_semantic_cache --entries 100000
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from app.services.semantic_cache import SemanticCache
+from app.utils.prompt_templates import date_range
+from benchmarks.bench_server import percentile
+
+SCOPE = ("openai", None, 0.7, None, ())
+DATED_ASKS = [
+    "What happened on {date} {topic}?",
+    "events on {date} {topic}",
+    "Tell me about {topic} on {date}",
+    "{topic}: what happened {date}?",
+]
+UNDATED_ASKS = [
+    "Tell me about {topic}",
+    "What were the {topic}?",
+    "{topic} in history",
+    "list the {topic} please",
+]
+ADJECTIVES = "major famous notable forgotten key early late naval royal".split()
+SUBJECTS = (
+    "battles treaties inventions discoveries elections coronations strikes "
+    "expeditions launches earthquakes riots premieres foundings trials"
+).split()
+PLACES = (
+    "france japan peru egypt india austria ghana spain brazil canada "
+    "mexico china norway kenya chile poland italy greece turkey iran"
+).split()
+MONTH_NAMES = (
+    "January February March April May June July "
+    "August September October November December"
+).split()
+
+
+def make_topic(rng: random.Random) -> str:
+    return f"{rng.choice(ADJECTIVES)} {rng.choice(SUBJECTS)} in {rng.choice(PLACES)}"
+
+
+def ask(rng: random.Random, month_day: str, topic: str) -> str:
+    if not month_day:
+        return rng.choice(UNDATED_ASKS).format(topic=topic)
+    month, day = month_day.split("-")
+    spoken = f"{MONTH_NAMES[int(month) - 1]} {int(day)}"
+    return rng.choice(DATED_ASKS).format(date=spoken, topic=topic)
+
+
+def time_lookups(cache: SemanticCache, prompts: List[str]) -> Tuple[List[float], int]:
+    latencies = []
+    hits = 0
+    for text in prompts:
+        start = time.perf_counter()
+        match = cache.lookup(text, SCOPE)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += match is not None
+    return latencies, hits
+
+
+def report(name: str, cache: SemanticCache, sample, rng: random.Random) -> None:
+    # Half in the singular ("battle" for "battles"), which normalization
+    # does not undo
+    present = [
+        ask(rng, month_day, topic.replace("s in ", " in ") if i % 2 else topic)
+        for i, (month_day, topic) in enumerate(sample)
+    ]
+    hit_ms, hits = time_lookups(cache, present)
+    absent = [
+        ask(rng, month_day, topic.rsplit(" ", 1)[0] + " portugal")
+        for month_day, topic in sample
+    ]
+    miss_ms, false_hits = time_lookups(cache, absent)
+    print(
+        f"{name:<8} | hit p50 {percentile(hit_ms, 50):.3f} "
+        f"p99 {percentile(hit_ms, 99):.3f} ms | "
+        f"miss p50 {percentile(miss_ms, 50):.3f} "
+        f"p99 {percentile(miss_ms, 99):.3f} ms | "
+        f"rephrased hits {hits / len(sample):.0%} | "
+        f"false hits {false_hits / len(sample):.1%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--dimensions", type=int, default=512)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--max-partition-entries", type=int, default=2048)
+    parser.add_argument("--undated-share", type=float, default=0.1)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    dates = date_range("01-01", "12-31")
+    cache = SemanticCache(
+        max_entries=args.entries,
+        threshold=args.threshold,
+        ttl_seconds=3600,
+        dimensions=args.dimensions,
+        max_partition_entries=args.max_partition_entries,
+    )
+
+    start = time.perf_counter()
+    stored: List[Tuple[str, str]] = []
+    while len(cache) < args.entries:
+        month_day = "" if rng.random() < args.undated_share else rng.choice(dates)
+        topic = make_topic(rng)
+        cache.store(ask(rng, month_day, topic), SCOPE, "[]")
+        stored.append((month_day, topic))
+    fill_seconds = time.perf_counter() - start
+
+    stats = cache.stats()
+    vectors_mb = sum(p.vectors.nbytes for p in cache._partitions.values()) / 2**20
+    print(
+        f"numpy {np.__version__}, {args.dimensions} dimensions: "
+        f"{stats['entries']} entries in {stats['partitions']} partitions "
+        f"(largest {stats['largest_partition']}), vectors {vectors_mb:.0f} MB, "
+        f"filled in {fill_seconds:.0f}s"
+    )
+
+    # Undated prompts beyond the partition cap were evicted while filling,
+    # so only the most recent ones are sampled
+    undated = [item for item in stored if not item[0]]
+    dated = [item for item in stored if item[0]]
+    report("dated", cache, rng.sample(dated, args.lookups), rng)
+    report("undated", cache, undated[-args.max_partition_entries // 2 :], rng)
+
+
+if __name__ == "__main__":
+    main()
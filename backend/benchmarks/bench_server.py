@@ -0,0 +1,182 @@
+"""
+Throughput benchmark: development server vs production server profile.
+
+Starts the fake LLM, then boots the API in each mode against it and drives
+POST /api/chat with concurrent clients. Reports boot time (until /api/ready
+returns 200), requests per second and latency percentiles.
+
+Usage:
+    python -m benchmarks.bench_server --mode both --concurrency 32 --duration 15
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+MODES = {
+    # What the Dockerfile used to run, minus `uv run` (pass --dev-cmd to include it)
+    "dev": [sys.executable, "-m", "fastapi", "run", "app/main.py", "--port", "{port}"],
+    "prod": [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "-c",
+        "gunicorn.conf.py",
+        "--bind",
+        "127.0.0.1:{port}",
+        "app.main:app",
+    ],
+}
+
+
+def start_process(cmd, env):
+    return subprocess.Popen(
+        cmd,
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_ready(url: str, timeout: float = 60) -> float:
+    start = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - start < timeout:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+async def run_load(base_url: str, concurrency: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+
+        async def worker(worker_id: int):
+            nonlocal errors
+            i = 0
+            while time.perf_counter() < deadline:
+                payload = {
+                    "messages": [
+                        {"role": "user", "content": f"Events {worker_id}-{i}"}
+                    ],
+                    "provider": "openai",
+                }
+                start = time.perf_counter()
+                try:
+                    response = await client.post("/api/chat", json=payload)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                i += 1
+
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+
+    return latencies, errors
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def bench_mode(mode, cmd, args, env):
+    port = args.port
+    process = start_process([part.format(port=port) for part in cmd], env)
+    try:
+        boot = await wait_until_ready(f"http://127.0.0.1:{port}/api/ready")
+        latencies, errors = await run_load(
+            f"http://127.0.0.1:{port}", args.concurrency, args.duration
+        )
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    ms = [latency * 1000 for latency in latencies]
+    print(
+        f"{mode:>5} | boot {boot:6.2f}s | {len(ms) / args.duration:8.1f} req/s | "
+        f"p50 {percentile(ms, 50):7.1f} ms | p99 {percentile(ms, 99):7.1f} ms | "
+        f"errors {errors}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["dev", "prod", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--llm-port", type=int, default=9100)
+    parser.add_argument(
+        "--dev-cmd", help="Override the dev command, e.g. 'uv run fastapi run ...'"
+    )
+    args = parser.parse_args()
+
+    modes = dict(MODES)
+    if args.dev_cmd:
+        modes["dev"] = args.dev_cmd.split() + ["--port", "{port}"]
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "fake-key",
+            "GEMINI_API_KEY": "",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{args.llm_port}/v1",
+            "EVENT_STORE_PATH": os.path.join(data_dir, "events.db"),
+            "WEB_CONCURRENCY": str(args.workers),
+            "LOG_LEVEL": "warning",
+        }
+
+        fake_llm = start_process(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.fake_llm",
+                "--port",
+                str(args.llm_port),
+                "--latency-ms",
+                str(args.latency_ms),
+            ],
+            env,
+        )
+        try:
+            await wait_until_ready(
+                f"http://127.0.0.1:{args.llm_port}/v1/models/fake", timeout=30
+            )
+            print(
+                f"concurrency {args.concurrency}, {args.duration:.0f}s per mode, "
+                f"fake LLM latency {args.latency_ms:.0f} ms, prod workers {args.workers}"
+            )
+            selected = ["dev", "prod"] if args.mode == "both" else [args.mode]
+            for mode in selected:
+                await bench_mode(mode, modes[mode], args, env)
+        finally:
+            fake_llm.terminate()
+            fake_llm.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+Fake OpenAI-compatible LLM server for benchmarks.
+
+Answers chat completions with a canned list of events after a fixed latency,
+so the API can be load tested without provider cost or rate limits.
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1.
+
+With --capacity, requests beyond that many in flight share it (latency
+grows with load, like a saturated provider), and with --max-in-flight the
+excess is refused with 429. POST /admin/capacity changes both at runtime
+to simulate a provider slowing down.
+
+Usage:
+    python -m benchmarks.fake_llm --port 9100 --latency-ms 200
+    python -m benchmarks.fake_llm --capacity 32 --max-in-flight 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+EVENTS = [
+    "1453: Fall of Constantinople marks the end of the Byzantine Empire.",
+    "1969: Apollo 11 lands the first humans on the Moon.",
+    "1994: End of apartheid in South Africa.",
+    "1789: Storming of the Bastille begins the French Revolution.",
+    "1215: King John seals the Magna Carta.",
+    "1947: India gains independence from British rule.",
+    "1989: The Berlin Wall falls.",
+    "1869: The Suez Canal opens.",
+]
+
+app = FastAPI(title="Fake LLM")
+app.state.latency_ms = float(os.getenv("FAKE_LLM_LATENCY_MS", "200"))
+app.state.jitter_ms = float(os.getenv("FAKE_LLM_JITTER_MS", "0"))
+app.state.error_rate = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+# 0 means unlimited
+app.state.capacity = int(os.getenv("FAKE_LLM_CAPACITY", "0"))
+app.state.max_in_flight = int(os.getenv("FAKE_LLM_MAX_IN_FLIGHT", "0"))
+app.state.in_flight = 0
+
+
+async def _simulate_latency() -> None:
+    jitter = random.uniform(-app.state.jitter_ms, app.state.jitter_ms)
+    latency = max(0.0, app.state.latency_ms + jitter)
+    if app.state.capacity:
+        # Processor sharing: past capacity, every request slows down
+        latency *= max(1.0, app.state.in_flight / app.state.capacity)
+    await asyncio.sleep(latency / 1000)
+
+
+def _error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"message": message, "type": "server_error"}},
+    )
+
+
+@app.post("/admin/capacity")
+async def set_capacity(body: dict):
+    app.state.capacity = int(body.get("capacity", app.state.capacity))
+    app.state.max_in_flight = int(body.get("max_in_flight", app.state.max_in_flight))
+    return {"capacity": app.state.capacity, "max_in_flight": app.state.max_in_flight}
+
+
+@app.get("/v1/models/{model}")
+async def retrieve_model(model: str):
+    return {"id": model, "object": "model", "created": 0, "owned_by": "fake"}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    if app.state.max_in_flight and app.state.in_flight >= app.state.max_in_flight:
+        return _error(429, "Simulated rate limit")
+
+    app.state.in_flight += 1
+    try:
+        await _simulate_latency()
+    finally:
+        app.state.in_flight -= 1
+
+    if random.random() < app.state.error_rate:
+        return _error(503, "Simulated overload")
+
+    content = json.dumps({"events": random.sample(EVENTS, 5)})
+    return {
+        "id": f"chatcmpl-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 250, "completion_tokens": 80, "total_tokens": 330},
+    }
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=app.state.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=app.state.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=app.state.error_rate)
+    parser.add_argument("--capacity", type=int, default=app.state.capacity)
+    parser.add_argument("--max-in-flight", type=int, default=app.state.max_in_flight)
+    args = parser.parse_args()
+
+    app.state.latency_ms = args.latency_ms
+    app.state.jitter_ms = args.jitter_ms
+    app.state.error_rate = args.error_rate
+    app.state.capacity = args.capacity
+    app.state.max_in_flight = args.max_in_flight
+    # workers=1 explicitly, uvicorn otherwise honours WEB_CONCURRENCY
+    uvicorn.run(app, host=args.host, port=args.port, workers=1, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Gunicorn configuration for the production server.
+
+Run with: gunicorn -c gunicorn.conf.py app.main:app
+Every setting can be overridden with the environment variables below.
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+
+# Async workers are CPU-bound only while cleaning and serializing,
+# so one worker per core keeps every core busy without oversubscribing
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "app.workers.ProductionUvicornWorker"
+
+# Import the app once in the master process and fork workers from it,
+# so workers share imported modules copy-on-write and boot faster.
+# Startup work (provider warm-up, background workers) still runs per worker
+# in the lifespan hook, after the fork.
+preload_app = True
+
+# Graceful shutdown: finish in-flight requests before exiting
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")